@@ -0,0 +1,230 @@
+"""Content-addressed cache of Apify actor results.
+
+Results are keyed by a SHA-256 of ``(actor_id, run_input)`` in canonical JSON,
+so any two calls with identical inputs share an entry regardless of which code
+path (scheduler, manual scrape, debug script) issued them.
+
+* **Memory tier** – LRU ``OrderedDict`` bounded by ``APIFY_CACHE_MAX_ENTRIES``.
+* **Disk tier** – one gzip-compressed JSON file per key under
+  ``APIFY_CACHE_DIR`` so fresh results survive restarts; the oldest files are
+  evicted once the directory exceeds ``APIFY_CACHE_MAX_BYTES``.
+* **TTL** – entries older than ``APIFY_CACHE_TTL_SEC`` are ignored (and
+  dropped) on read.
+* **Single-flight** – concurrent calls for the same key wait for the one
+  in-flight actor run instead of starting their own.
+
+Only successful runs are stored; the compute function signals failure by
+raising.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+Items = List[dict[str, Any]]
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent / ".cache" / "apify"
+
+
+def cache_key(actor_id: str, run_input: dict[str, Any]) -> str:
+    """Stable hash of an actor call (canonical JSON, sorted keys)."""
+    canonical = json.dumps([actor_id, run_input], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class ActorCache:
+    """Two-tier TTL cache with per-key request coalescing."""
+
+    def __init__(
+        self,
+        directory: Optional[Path] = DEFAULT_CACHE_DIR,
+        ttl_sec: float = 900,
+        max_entries: int = 64,
+        max_disk_bytes: int = 64 * 1024 * 1024,
+    ) -> None:
+        self.directory = Path(directory) if directory else None
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, tuple[float, Items]]" = OrderedDict()
+        self._inflight: dict[str, Future] = {}
+
+        if self.directory is not None:
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+            except OSError as exc:
+                logger.warning("Actor cache dir %s unavailable (%s); memory only", self.directory, exc)
+                self.directory = None
+
+    # ------------------ Public API ------------------
+
+    def get_or_compute(
+        self,
+        actor_id: str,
+        run_input: dict[str, Any],
+        compute: Callable[[], Items],
+        *,
+        bypass: bool = False,
+    ) -> Items:
+        """Return cached items for the call, or run **compute** once and store them.
+
+        With **bypass** the cache is not read (the result is still stored), but
+        an identical call already in flight is joined since its result is fresh.
+        """
+        key = cache_key(actor_id, run_input)
+
+        if not bypass:
+            cached = self.get(key)
+            if cached is not None:
+                logger.debug("Actor cache hit for %s (%s)", actor_id, key[:12])
+                return cached
+
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+
+        if not owner:
+            logger.debug("Joining in-flight actor run %s (%s)", actor_id, key[:12])
+            return future.result()
+
+        try:
+            items = compute()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            self.put(key, items)
+            future.set_result(items)
+            return items
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def get(self, key: str) -> Optional[Items]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                stored_at, items = entry
+                if now - stored_at <= self.ttl_sec:
+                    self._memory.move_to_end(key)
+                    return items
+                del self._memory[key]
+
+        entry = self._read_disk(key)
+        if entry is None:
+            return None
+        stored_at, items = entry
+        if now - stored_at > self.ttl_sec:
+            self._remove_disk(key)
+            return None
+        self._remember(key, stored_at, items)
+        return items
+
+    def put(self, key: str, items: Items) -> None:
+        stored_at = time.time()
+        self._remember(key, stored_at, items)
+        self._write_disk(key, stored_at, items)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        if self.directory is not None:
+            for path in self.directory.glob("*.json.gz"):
+                path.unlink(missing_ok=True)
+
+    # ------------------ Memory tier ------------------
+
+    def _remember(self, key: str, stored_at: float, items: Items) -> None:
+        with self._lock:
+            self._memory[key] = (stored_at, items)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    # ------------------ Disk tier ------------------
+
+    def _path(self, key: str) -> Optional[Path]:
+        return self.directory / f"{key}.json.gz" if self.directory is not None else None
+
+    def _read_disk(self, key: str) -> Optional[tuple[float, Items]]:
+        path = self._path(key)
+        if path is None or not path.exists():
+            return None
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as fh:
+                doc = json.load(fh)
+            return float(doc["storedAt"]), doc["items"]
+        except (OSError, ValueError, KeyError) as exc:
+            logger.warning("Discarding unreadable actor cache file %s: %s", path.name, exc)
+            path.unlink(missing_ok=True)
+            return None
+
+    def _write_disk(self, key: str, stored_at: float, items: Items) -> None:
+        path = self._path(key)
+        if path is None:
+            return
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with gzip.open(tmp, "wt", encoding="utf-8") as fh:
+                json.dump({"storedAt": stored_at, "items": items}, fh, separators=(",", ":"), default=str)
+            os.replace(tmp, path)
+        except (OSError, TypeError, ValueError) as exc:
+            logger.warning("Failed to persist actor cache entry %s: %s", key[:12], exc)
+            tmp.unlink(missing_ok=True)
+            return
+        self._evict_disk()
+
+    def _remove_disk(self, key: str) -> None:
+        path = self._path(key)
+        if path is not None:
+            path.unlink(missing_ok=True)
+
+    def _evict_disk(self) -> None:
+        """Delete oldest files until the directory fits in ``max_disk_bytes``."""
+        assert self.directory is not None
+        files = []
+        total = 0
+        for path in self.directory.glob("*.json.gz"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+        if total <= self.max_disk_bytes:
+            return
+        files.sort()
+        for _, size, path in files:
+            if total <= self.max_disk_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+def cache_from_env() -> ActorCache:
+    """Build the process-wide cache from ``APIFY_CACHE_*`` env settings."""
+    directory = os.getenv("APIFY_CACHE_DIR")
+    return ActorCache(
+        directory=Path(directory) if directory else DEFAULT_CACHE_DIR,
+        ttl_sec=float(os.getenv("APIFY_CACHE_TTL_SEC", 900)),
+        max_entries=int(os.getenv("APIFY_CACHE_MAX_ENTRIES", 64)),
+        max_disk_bytes=int(os.getenv("APIFY_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+    )
@@ -4,17 +4,23 @@ from __future__ import annotations
 
 from typing import Optional
 
+import logging
 import os
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from pydantic import BaseModel
 
-from firebase_admin import auth as firebase_auth
-
+from backend import tracing
 from backend.firebase import init_firebase
+from backend.token_verifier import InvalidTokenError, verifier_from_env
 
 # Ensure Firebase Admin is initialised once.
-init_firebase()
+_app = init_firebase()
+
+# Verified tokens are cached until they expire; see backend.token_verifier.
+token_verifier = verifier_from_env(_app.project_id)
+
+logger = logging.getLogger(__name__)
 
 # Security scheme (expecting "Authorization: Bearer <id_token>")
 security = HTTPBearer(auto_error=True)
@@ -25,8 +31,8 @@ class TokenData(BaseModel):
     email: Optional[str] = None
 
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> TokenData:
-    """Verify Firebase ID token and return TokenData."""
+async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> TokenData:
+    """Verify Firebase ID token and return TokenData (cached, non-blocking)."""
 
     token = credentials.credentials
     credentials_exception = HTTPException(
@@ -36,9 +42,13 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security))
     )
 
     try:
-        decoded = firebase_auth.verify_id_token(token)
+        with tracing.span("auth.verify_token"):
+            decoded = await token_verifier.verify(token)
+    except InvalidTokenError:
+        raise credentials_exception
     except Exception:
-        # Any verification error should yield 401
+        # Any verification error (e.g. certs unreachable) should yield 401
+        logger.exception("ID token verification failed")
         raise credentials_exception
 
     uid = decoded.get("uid")
@@ -1,4 +1,5 @@
 from sqlmodel import SQLModel, create_engine, Session
+from sqlalchemy import event
 from typing import Generator
 import os
 
@@ -13,6 +14,17 @@ engine = create_engine(
 )
 
 
+if "sqlite" in DATABASE_URL:
+    @event.listens_for(engine, "connect")
+    def _sqlite_pragmas(dbapi_conn, _record):
+        """WAL lets readers proceed while a writer commits (SQLite repository)."""
+        cur = dbapi_conn.cursor()
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute("PRAGMA synchronous=NORMAL")
+        cur.execute("PRAGMA busy_timeout=5000")
+        cur.close()
+
+
 def create_db_and_tables():
     """Create database tables"""
     SQLModel.metadata.create_all(engine)
@@ -0,0 +1,64 @@
+"""Fault-injecting repository stand-in.
+
+Wraps any backend and makes selected calls fail or stall, to exercise the
+stale-while-error path (``backend.last_good``) without touching Firestore.
+Enabled with ``REPO_FAULTS``, a comma-separated spec::
+
+    REPO_FAULTS="error=1"                       # every call raises
+    REPO_FAULTS="delay=5,ops=get_status|list_cities"
+    REPO_FAULTS="error=0.3,delay=0.5"           # 30 % fail, all slowed
+
+``error`` is a failure probability, ``delay`` seconds slept before the call
+and ``ops`` limits faults to those method names. The wrapper is reachable
+as ``backend.repository.faults``; its attributes can be changed at runtime
+(``faults.error_rate = 0`` to "recover").
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from typing import Any, Optional
+
+
+class InjectedFault(RuntimeError):
+    """Raised by ``FaultyRepository`` in place of a real backend error."""
+
+
+class FaultyRepository:
+    def __init__(self, inner: Any, error_rate: float = 0.0, delay: float = 0.0, ops: Optional[set[str]] = None) -> None:
+        self._inner = inner
+        self.error_rate = error_rate
+        self.delay = delay
+        self.ops = ops
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._inner, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            if self.ops is None or name in self.ops:
+                if self.delay > 0:
+                    time.sleep(self.delay)
+                if self.error_rate > 0 and random.random() < self.error_rate:
+                    raise InjectedFault(f"Injected failure in {name}")
+            return attr(*args, **kwargs)
+
+        return call
+
+
+def parse_faults(spec: str) -> dict[str, Any]:
+    """``"error=0.5,delay=2,ops=a|b"`` -> keyword arguments for ``FaultyRepository``."""
+    kwargs: dict[str, Any] = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        key, _, value = part.partition("=")
+        if key == "error":
+            kwargs["error_rate"] = float(value)
+        elif key == "delay":
+            kwargs["delay"] = float(value)
+        elif key == "ops":
+            kwargs["ops"] = set(filter(None, value.split("|")))
+        else:
+            raise ValueError(f"Unknown REPO_FAULTS key {key!r} (expected error, delay or ops)")
+    return kwargs
@@ -1,12 +1,14 @@
 """Firestore repository functions for Status and Cities collections."""
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from typing import Any, List, Optional
 
 from firebase_admin import firestore  # type: ignore
 
 from backend.firebase import init_firebase
+from backend.posts import Post
+from backend.repo_base import DEFAULT_SETTINGS, MAX_CITY_POSTS, journey_from_cities, scrape_job_is_live
 
 init_firebase()
 _client = firestore.client()
@@ -15,6 +17,11 @@ STATUS_COLL = _client.collection("status").document("current")
 CITIES_COLL = _client.collection("cities")
 MERCH_COLL = _client.collection("merch")
 SETTINGS_DOC = _client.collection("settings").document("globals")
+INTERVAL_DECISIONS_COLL = _client.collection("scrapeIntervalDecisions")
+LEASES_COLL = _client.collection("leases")
+POLYGONS_COLL = _client.collection("polygons")
+SCRAPE_JOBS_COLL = _client.collection("scrapeJobs")
+SCRAPE_CLAIMS_COLL = _client.collection("scrapeJobClaims")
 
 # Posts subcollection name constant
 POSTS_SUB = "posts"
@@ -59,41 +66,49 @@ def update_city(city_id: int, data: dict[str, Any]) -> dict[str, Any]:
 # ------------------ Posts ------------------
 
 
-def save_city_posts(city_id: int, posts: list[dict[str, Any]]) -> None:
-    """Replace the city's posts subcollection with the provided list (max 100)."""
+def save_city_posts(city_id: int, posts: list[Post]) -> int:
+    """Replace the city's posts subcollection with the provided list (max 100).
+
+    Only the compact ``Post.to_dict()`` record is stored, under a stable
+    ``<platform>_<postId>`` document id. Returns how many of the saved posts
+    were not stored before (the scrape's *new* yield).
+    """
     doc_ref = CITIES_COLL.document(str(city_id))
     batch = _client.batch()
-
-    # Delete existing docs (simpler; limit 100) – Firestore limits to 500 per batch.
-    existing = doc_ref.collection(POSTS_SUB).stream()
-    for doc in existing:
-        batch.delete(doc.reference)
-
-    # Add new posts (cap 100)
-    for p in posts[:100]:
-        new_ref = doc_ref.collection(POSTS_SUB).document()
-        batch.set(new_ref, p)
+    keep = posts[:MAX_CITY_POSTS]
+    keep_ids = {p.doc_id for p in keep}
+
+    # Delete docs no longer in the list (limit 100) – Firestore limits to 500
+    # per batch. Docs that stay are overwritten by the set below. Only refs
+    # are listed; document bodies are not read.
+    existing_ids: set[str] = set()
+    for ref in doc_ref.collection(POSTS_SUB).list_documents():
+        existing_ids.add(ref.id)
+        if ref.id not in keep_ids:
+            batch.delete(ref)
+
+    for p in keep:
+        new_ref = doc_ref.collection(POSTS_SUB).document(p.doc_id)
+        batch.set(new_ref, p.to_dict())
 
     batch.commit()
+    return len(keep_ids - existing_ids)
 
 
 def list_city_posts(city_id: int) -> list[dict[str, Any]]:
-    doc_ref = CITIES_COLL.document(str(city_id))
-    return [d.to_dict() | {"id": d.id} for d in doc_ref.collection(POSTS_SUB).stream()]
+    """Return the city's posts best-first, ordered by their stored ``score``."""
+    posts_ref = CITIES_COLL.document(str(city_id)).collection(POSTS_SUB)
+    query = posts_ref.order_by("score", direction=firestore.Query.DESCENDING)
+    docs = [d.to_dict() | {"id": d.id} for d in query.stream()]
+    if not docs:
+        # Posts saved before scores existed lack the field and are excluded by
+        # order_by; serve them unordered until the next scrape replaces them.
+        docs = [d.to_dict() | {"id": d.id} for d in posts_ref.stream()]
+    return docs
 
 # ------------------ Settings ------------------
 
 
-DEFAULT_SETTINGS = {
-    "socialScrapeIntervalMin": 60,
-    "instagramUsername": "",
-    "twitterUsername": "",
-    "tiktokUsername": "",
-    "twitchUsername": "",
-    "youtubeUsername": "",
-}
-
-
 def get_settings() -> dict[str, Any]:
     doc = SETTINGS_DOC.get()
     data = doc.to_dict() if doc.exists else {}
@@ -107,6 +122,11 @@ def update_settings(data: dict[str, Any]) -> dict[str, Any]:
     return get_settings()
 
 
+def add_interval_decision(data: dict[str, Any]) -> None:
+    """Append one adaptive scrape-interval decision (kept for policy tuning)."""
+    INTERVAL_DECISIONS_COLL.add(data)
+
+
 # ------------------ Merch ------------------
 
 
@@ -125,6 +145,79 @@ def update_merch(item_id: str, data: dict[str, Any]) -> dict[str, Any]:
     doc_ref.set(data, merge=True)
     return doc_ref.get().to_dict() | {"id": item_id}
 
+# ------------------ Polygons ------------------
+
+
+def get_polygon(polygon_id: str) -> Optional[dict[str, Any]]:
+    doc = POLYGONS_COLL.document(polygon_id).get()
+    return doc.to_dict() if doc.exists else None
+
+
+def save_polygon(polygon_id: str, data: dict[str, Any]) -> None:
+    """Store a content-addressed polygon (same id always means same content)."""
+    POLYGONS_COLL.document(polygon_id).set(data)
+
+
+# ------------------ Leases ------------------
+
+
+@firestore.transactional
+def _claim_lease(transaction, ref, owner: str, ttl_sec: float) -> bool:
+    snap = ref.get(transaction=transaction)
+    now = datetime.now(timezone.utc)
+    if snap.exists:
+        data = snap.to_dict() or {}
+        expires = data.get("expiresAt")
+        if data.get("owner") != owner and expires is not None and expires > now:
+            return False
+    transaction.set(ref, {"owner": owner, "expiresAt": now + timedelta(seconds=ttl_sec)})
+    return True
+
+
+def acquire_lease(name: str, owner: str, ttl_sec: float) -> bool:
+    """Claim or renew the named lease for **owner**; False if someone else holds it."""
+    return _claim_lease(_client.transaction(), LEASES_COLL.document(name), owner, ttl_sec)
+
+
+def release_lease(name: str, owner: str) -> None:
+    """Drop the lease if **owner** still holds it, so a follower can take over at once."""
+    ref = LEASES_COLL.document(name)
+    snap = ref.get()
+    if snap.exists and (snap.to_dict() or {}).get("owner") == owner:
+        ref.delete()
+
+
+# ------------------ Scrape jobs ------------------
+
+
+@firestore.transactional
+def _claim_scrape_job(transaction, claim_ref, job: dict[str, Any], stale_before: str) -> dict[str, Any]:
+    claim = claim_ref.get(transaction=transaction)
+    job_id = (claim.to_dict() or {}).get("jobId") if claim.exists else None
+    if job_id:
+        current = SCRAPE_JOBS_COLL.document(job_id).get(transaction=transaction)
+        if current.exists and scrape_job_is_live(current.to_dict(), stale_before):
+            return current.to_dict()
+    transaction.set(SCRAPE_JOBS_COLL.document(job["id"]), job)
+    transaction.set(claim_ref, {"jobId": job["id"]})
+    return job
+
+
+def claim_scrape_job(job: dict[str, Any], stale_before: str) -> dict[str, Any]:
+    """Make **job** its city's active scrape unless a live one exists; returns the active job."""
+    claim_ref = SCRAPE_CLAIMS_COLL.document(str(job["city_id"]))
+    return _claim_scrape_job(_client.transaction(), claim_ref, job, stale_before)
+
+
+def get_scrape_job(job_id: str) -> Optional[dict[str, Any]]:
+    snap = SCRAPE_JOBS_COLL.document(job_id).get()
+    return snap.to_dict() if snap.exists else None
+
+
+def update_scrape_job(job_id: str, data: dict[str, Any]) -> None:
+    SCRAPE_JOBS_COLL.document(job_id).set(data, merge=True)
+
+
 # ------------------ Sleep flag ------------------
 
 
@@ -142,30 +235,4 @@ def set_sleep_flag(is_sleep: bool) -> bool:
 
 
 def compute_journey() -> dict[str, Any]:
-    all_cities = list_cities()
-
-    def has_coords(c: dict[str, Any]) -> bool:
-        lat = c.get("lat") or 0.0
-        lng = c.get("lng") or 0.0
-        return not (abs(lat) < 0.0001 and abs(lng) < 0.0001)
-
-    cities = [c for c in all_cities if has_coords(c)]
-
-    # Ensure order is an int even if missing
-    for c in cities:
-        if c.get("order") is None:
-            c["order"] = 0
-
-    cities.sort(key=lambda c: c["order"])
-
-    current = next((c for c in cities if c.get("isCurrent")), (cities[0] if cities else None))
-
-    if current and current.get("order") is not None:
-        path = [c for c in cities if c["order"] < current["order"]]
-    else:
-        path = []
-
-    return {
-        "currentCity": current,
-        "path": path,
-    }
+    return journey_from_cities(list_cities())
@@ -0,0 +1,106 @@
+"""``index.html`` with the map's initial state inlined.
+
+The SPA needs the status, journey and sleep flag before it can draw its
+first frame. ``InitialStatePage`` serves the built ``index.html`` with that
+data embedded as ``<script id="initial-state" type="application/json">``,
+so the page renders without waiting on any API call.
+
+The template is read once and split around the insertion point. The page
+is re-rendered only when the state actually changes: state is re-read
+after an ``invalidate()`` (status, sleep and city writes in this process)
+or after ``ttl`` seconds (writes made by other workers), and the HTML is
+rebuilt only if the serialized state differs from the last one.
+
+Enabled by default when the frontend is built; ``INLINE_INITIAL_STATE=0``
+serves the plain file.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+SCRIPT_ID = "initial-state"
+
+
+def _script(state_json: str) -> str:
+    # "</script>" or "<!--" inside a string value must not end the element.
+    safe = state_json.replace("<", "\\u003c").replace("\u2028", "\\u2028").replace("\u2029", "\\u2029")
+    return f'<script id="{SCRIPT_ID}" type="application/json">{safe}</script>'
+
+
+class InitialStatePage:
+    def __init__(
+        self,
+        template_path: Path,
+        repo: Any,
+        ttl: float = 5.0,
+        extra: Optional[Callable[[], dict[str, Any]]] = None,
+    ) -> None:
+        template = template_path.read_text(encoding="utf-8")
+        # Before the app's own scripts, so the state is parsed first.
+        cut = template.find("</head>")
+        if cut < 0:
+            cut = template.find("<body")
+        if cut < 0:
+            raise ValueError(f"No </head> or <body> in {template_path}")
+        self._head, self._tail = template[:cut], template[cut:]
+        self.repo = repo
+        self.ttl = ttl
+        self.extra = extra
+        self._state_json: Optional[str] = None
+        self._html: bytes = template.encode("utf-8")
+        self._loaded_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        """Re-read the state on the next request."""
+        self._loaded_at = float("-inf")
+
+    def _load_state(self) -> dict[str, Any]:
+        state = {
+            "status": self.repo.get_status(),
+            "journey": self.repo.compute_journey(),
+            "sleep": {"isSleep": self.repo.get_sleep_flag()},
+        }
+        if self.extra is not None:
+            state.update(self.extra())
+        return state
+
+    async def html(self) -> bytes:
+        if time.monotonic() - self._loaded_at < self.ttl:
+            return self._html
+        async with self._lock:
+            if time.monotonic() - self._loaded_at < self.ttl:
+                return self._html
+            try:
+                state = await asyncio.to_thread(self._load_state)
+            except Exception:
+                # Serve the last render (or the bare template); the app
+                # falls back to the API when no state is inlined.
+                logger.exception("Failed to load initial state for index.html")
+                return self._html
+            state_json = json.dumps(state, default=str, separators=(",", ":"), sort_keys=True)
+            if state_json != self._state_json:
+                self._state_json = state_json
+                self._html = (self._head + _script(state_json) + self._tail).encode("utf-8")
+            self._loaded_at = time.monotonic()
+            return self._html
+
+
+def page_from_env(
+    frontend_dist: str, repo: Any, extra: Optional[Callable[[], dict[str, Any]]] = None
+) -> Optional[InitialStatePage]:
+    if os.getenv("INLINE_INITIAL_STATE", "1").lower() in ("0", "false", "no"):
+        return None
+    index_path = Path(frontend_dist) / "index.html"
+    if not index_path.is_file():
+        return None
+    return InitialStatePage(index_path, repo, ttl=float(os.getenv("INITIAL_STATE_TTL_SEC", "5")), extra=extra)
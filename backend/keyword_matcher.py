@@ -0,0 +1,191 @@
+"""Compiled multi-keyword matcher used to filter scraped social posts.
+
+A scrape checks every post against the same city/state/extra keywords.
+Instead of lower-casing each term and running one substring scan per term and
+post (O(posts × terms × text)), :class:`KeywordMatcher` compiles all terms once
+per scrape so each post costs a single pass over its text, independent of how
+many terms are configured:
+
+* With ``pyahocorasick`` installed the terms are compiled into an Aho-Corasick
+  automaton (C implementation). For whole-word matching it runs over the
+  same token normal form as the fallback (words joined by single spaces,
+  padded), so both engines return the same results.
+* Otherwise a pure-Python word-level automaton is used: the text is tokenised
+  once (``casefold`` → ``translate`` → ``split``) and tokens are looked up in a
+  set of single-word terms plus a table of phrases keyed by their first word.
+
+Options:
+
+* ``word_boundary`` – only match whole words ("Austin" no longer matches
+  "Austintown"). ``False`` restores plain substring semantics.
+* ``casefold`` – compare using Unicode case folding (``"STRASSE"`` matches
+  ``"straße"``) rather than exact case.
+* ``hashtags`` – also match the hashtag spelling of multi-word terms, e.g.
+  "New York" matches ``#NewYork`` / ``#new_york``. Single-word terms always
+  match their hashtag (``#austin``).
+
+Limitation: with ``word_boundary`` every non-word character is a separator,
+so terms are reduced to their word characters – "C++" is the word "c" and
+also matches "learning c today". Terms that differ only in punctuation are
+not distinguishable.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Iterable
+
+try:
+    import ahocorasick  # type: ignore
+except ImportError:  # Optional accelerator; fall back to the token automaton
+    ahocorasick = None  # type: ignore
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class _SeparatorTable(dict):
+    """``str.translate`` table mapping every non-word character to a space.
+
+    Entries are computed lazily per code point and cached, so arbitrary
+    Unicode (emoji, curly quotes, CJK punctuation) is handled without building
+    a table for the whole code space.
+    """
+
+    def __missing__(self, code: int) -> int:
+        value = code if _is_word_char(chr(code)) else 0x20
+        self[code] = value
+        return value
+
+
+_SEPARATORS = _SeparatorTable()
+
+
+class KeywordMatcher:
+    """Match text against many keywords after compiling them once."""
+
+    __slots__ = (
+        "terms",
+        "word_boundary",
+        "casefold",
+        "hashtags",
+        "_automaton",
+        "_pattern",
+        "_words",
+        "_phrases",
+    )
+
+    def __init__(
+        self,
+        terms: Iterable[str],
+        *,
+        word_boundary: bool = True,
+        casefold: bool = True,
+        hashtags: bool = True,
+    ) -> None:
+        self.word_boundary = word_boundary
+        self.casefold = casefold
+        self.hashtags = hashtags
+
+        self._automaton: Any = None
+        self._pattern: re.Pattern[str] | None = None
+        self._words: set[str] = set()
+        # first word -> remaining words of each phrase starting with it
+        self._phrases: dict[str, list[tuple[str, ...]]] = {}
+
+        # Each term is kept as word tokens. With word boundaries the needle is
+        # the tokens joined by single spaces – the same normal form the text is
+        # reduced to – so both engines agree on "new  york" or "New-York".
+        # Plain substring needles are the folded text with collapsed whitespace.
+        seen: set[tuple[str, ...]] = set()
+        kept: list[str] = []
+        needles: set[str] = set()
+        for term in terms:
+            if not isinstance(term, str):
+                continue
+            tokens = tuple(self._tokens(term))
+            if not tokens or tokens in seen:
+                continue
+            seen.add(tokens)
+            kept.append(term.strip())
+            needles.add(" ".join(tokens) if word_boundary else " ".join(self._fold(term).split()))
+            if hashtags and word_boundary and len(tokens) > 1:
+                # "#NewYork" and "#new_york" are a single word in the text.
+                needles.add("".join(tokens))
+                needles.add("_".join(tokens))
+        self.terms: tuple[str, ...] = tuple(kept)
+
+        if not seen:
+            return
+        if ahocorasick is not None:
+            automaton = ahocorasick.Automaton()
+            for needle in needles:
+                if word_boundary:
+                    # Padded: a hit in the padded token text is a whole-word hit.
+                    needle = f" {needle} "
+                automaton.add_word(needle, len(needle))
+            automaton.make_automaton()
+            self._automaton = automaton
+        elif not word_boundary:
+            alternatives = sorted(needles, key=len, reverse=True)
+            self._pattern = re.compile("|".join(re.escape(a) for a in alternatives))
+        else:
+            for tokens in seen:
+                if len(tokens) == 1:
+                    self._words.add(tokens[0])
+                    continue
+                self._phrases.setdefault(tokens[0], []).append(tokens[1:])
+                if hashtags:
+                    self._words.add("".join(tokens))
+                    self._words.add("_".join(tokens))
+
+    # ------------------ Helpers ------------------
+
+    def _fold(self, text: str) -> str:
+        return text.casefold() if self.casefold else text
+
+    def _tokens(self, text: str) -> list[str]:
+        return self._fold(text).translate(_SEPARATORS).split()
+
+    # ------------------ Matching ------------------
+
+    def matches(self, text: str | None) -> bool:
+        """Return True if any term occurs in **text**."""
+        if not text:
+            return False
+        if self._automaton is not None:
+            if self.word_boundary:
+                return self._match_automaton(" " + " ".join(self._tokens(text)) + " ")
+            return self._match_automaton(self._fold(text))
+        if self._pattern is not None:
+            return self._pattern.search(self._fold(text)) is not None
+        if not (self._words or self._phrases):
+            return False
+        return self._match_tokens(self._tokens(text))
+
+    def _match_automaton(self, text: str) -> bool:
+        for _ in self._automaton.iter(text):
+            return True
+        return False
+
+    def _match_tokens(self, tokens: list[str]) -> bool:
+        if not self._words.isdisjoint(tokens):
+            return True
+        if self._phrases.keys().isdisjoint(tokens):
+            return False
+        for i, tok in enumerate(tokens):
+            for rest in self._phrases.get(tok, ()):
+                if tuple(tokens[i + 1 : i + 1 + len(rest)]) == rest:
+                    return True
+        return False
+
+    def __bool__(self) -> bool:
+        return bool(self._automaton is not None or self._pattern or self._words or self._phrases)
+
+    def __repr__(self) -> str:
+        engine = "aho-corasick" if self._automaton is not None else "python"
+        return (
+            f"KeywordMatcher({len(self.terms)} terms, engine={engine}, "
+            f"word_boundary={self.word_boundary}, casefold={self.casefold}, hashtags={self.hashtags})"
+        )
@@ -0,0 +1,251 @@
+"""Stale-while-error serving for the public map reads.
+
+When Firestore is slow or down, ``get_status``/``list_cities`` used to
+raise and every viewer saw an error. Public reads now go through
+``StaleWhileError``:
+
+* ``Dependency`` runs the blocking call in a worker thread with a
+  per-dependency timeout behind a ``CircuitBreaker``. After
+  ``failure_threshold`` consecutive failures the breaker opens and calls
+  fail fast (``CircuitOpen``) for ``reset_after`` seconds, then one probe is
+  let through (half-open) to decide whether to close it again.
+* ``LastGoodStore`` keeps the last successful result per key in memory and
+  mirrors it to ``LAST_GOOD_DIR`` (default ``backend/.cache/last_good``), so
+  a restarted worker can still answer while the store is unreachable.
+* On failure the last good value is returned together with a ``Stale``
+  marker (callers set ``X-Stale-Age``/``X-Stale-Source``) and one
+  background task per key retries with backoff until a fresh value lands.
+  With nothing to fall back on the original error propagates.
+
+A timed-out call keeps running in its thread; only the caller stops
+waiting.
+
+Configuration: ``REPO_TIMEOUT_SEC`` (2), ``REPO_BREAKER_FAILURES`` (5),
+``REPO_BREAKER_RESET_SEC`` (30), ``LAST_GOOD_DIR``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from backend import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIR = Path(__file__).resolve().parent / ".cache" / "last_good"
+MAX_REFRESH_BACKOFF_SEC = 30.0
+
+stale_responses = metrics.Counter("stale_responses_total", "Responses served from the last good value", ("key", "source"))
+breaker_open = metrics.Gauge("circuit_breaker_open", "1 while the dependency's circuit breaker is open", ("dependency",))
+dependency_failures = metrics.Counter(
+    "dependency_failures_total", "Failed dependency calls by reason", ("dependency", "reason")
+)
+
+
+class CircuitOpen(RuntimeError):
+    """The dependency's breaker is open; the call was not attempted."""
+
+
+# ------------------ Dependency ------------------
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_after: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_after else "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+
+class Dependency:
+    """A blocking dependency called with a timeout behind a circuit breaker."""
+
+    def __init__(self, name: str, timeout: float, breaker: CircuitBreaker) -> None:
+        self.name = name
+        self.timeout = timeout
+        self.breaker = breaker
+
+    async def call(self, fn: Callable[[], Any]) -> Any:
+        if not self.breaker.allow():
+            raise CircuitOpen(f"{self.name} circuit is open")
+        try:
+            result = await asyncio.wait_for(asyncio.to_thread(fn), self.timeout)
+        except Exception as exc:
+            reason = "timeout" if isinstance(exc, asyncio.TimeoutError) else "error"
+            dependency_failures.inc(dependency=self.name, reason=reason)
+            self.breaker.record_failure()
+            breaker_open.set(0 if self.breaker.opened_at is None else 1, dependency=self.name)
+            raise
+        self.breaker.record_success()
+        breaker_open.set(0, dependency=self.name)
+        return result
+
+
+# ------------------ Last good values ------------------
+
+
+class Stale:
+    __slots__ = ("saved_at", "source")
+
+    def __init__(self, saved_at: float, source: str) -> None:
+        self.saved_at = saved_at
+        self.source = source
+
+    @property
+    def age(self) -> float:
+        return max(0.0, time.time() - self.saved_at)
+
+
+def _json_default(value: Any) -> Any:
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+class LastGoodStore:
+    """Last successful value per key, in memory and mirrored to **directory**."""
+
+    def __init__(self, directory: Optional[Path]) -> None:
+        self.directory = directory
+        # key -> (value, saved_at, json, source)
+        self._values: dict[str, tuple[Any, float, Optional[str], str]] = {}
+
+    def _path(self, key: str) -> Path:
+        assert self.directory is not None
+        return self.directory / (re.sub(r"[^A-Za-z0-9_.-]", "_", key) + ".json")
+
+    async def put(self, key: str, value: Any) -> None:
+        encoded = json.dumps(value, default=_json_default, sort_keys=True)
+        previous = self._values.get(key)
+        self._values[key] = (value, time.time(), encoded, "memory")
+        if self.directory is not None and (previous is None or previous[2] != encoded):
+            try:
+                await asyncio.to_thread(self._write, key, encoded)
+            except OSError:
+                logger.exception("Failed to persist last good %s", key)
+
+    def _write(self, key: str, encoded: str) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"savedAt": time.time(), "value": json.loads(encoded)}), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def get(self, key: str) -> Optional[tuple[Any, Stale]]:
+        entry = self._values.get(key)
+        if entry is None and self.directory is not None:
+            try:
+                doc = json.loads(self._path(key).read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                return None
+            # Kept in memory (still labelled "disk") so an outage reads it once.
+            entry = self._values[key] = (doc["value"], doc["savedAt"], None, "disk")
+        if entry is None:
+            return None
+        return entry[0], Stale(entry[1], entry[3])
+
+
+# ------------------ Stale-while-error ------------------
+
+
+class StaleWhileError:
+    def __init__(self, dependency: Dependency, store: LastGoodStore) -> None:
+        self.dependency = dependency
+        self.store = store
+        self._refreshing: dict[str, asyncio.Task] = {}
+
+    async def get(self, key: str, fn: Callable[[], Any]) -> tuple[Any, Optional[Stale]]:
+        """Fresh ``(value, None)``, or ``(last_good, Stale)`` if the call fails."""
+        try:
+            value = await self.dependency.call(fn)
+        except Exception as exc:
+            fallback = self.store.get(key)
+            if fallback is None:
+                raise
+            value, stale = fallback
+            logger.warning("Serving %s from %s (%.0fs old): %r", key, stale.source, stale.age, exc)
+            stale_responses.inc(key=key, source=stale.source)
+            self._schedule_refresh(key, fn)
+            return value, stale
+        await self.store.put(key, value)
+        return value, None
+
+    def _schedule_refresh(self, key: str, fn: Callable[[], Any]) -> None:
+        if key in self._refreshing:
+            return
+        task = asyncio.get_running_loop().create_task(self._refresh(key, fn))
+        self._refreshing[key] = task
+        task.add_done_callback(lambda _t: self._refreshing.pop(key, None))
+
+    async def _refresh(self, key: str, fn: Callable[[], Any]) -> None:
+        delay = 1.0
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                value = await self.dependency.call(fn)
+            except CircuitOpen:
+                delay = min(max(delay, self.dependency.breaker.reset_after / 4), MAX_REFRESH_BACKOFF_SEC)
+                continue
+            except Exception:
+                delay = min(delay * 2, MAX_REFRESH_BACKOFF_SEC)
+                continue
+            await self.store.put(key, value)
+            logger.info("Refreshed %s after serving it stale", key)
+            return
+
+    async def close(self) -> None:
+        tasks = list(self._refreshing.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def reads_from_env() -> StaleWhileError:
+    directory = os.getenv("LAST_GOOD_DIR", str(DEFAULT_DIR))
+    dependency = Dependency(
+        "repository",
+        timeout=float(os.getenv("REPO_TIMEOUT_SEC", "2")),
+        breaker=CircuitBreaker(
+            failure_threshold=int(os.getenv("REPO_BREAKER_FAILURES", "5")),
+            reset_after=float(os.getenv("REPO_BREAKER_RESET_SEC", "30")),
+        ),
+    )
+    return StaleWhileError(dependency, LastGoodStore(Path(directory) if directory else None))
+
+
+# Public map reads (status, cities, journey, sleep flag).
+public_reads = reads_from_env()
@@ -0,0 +1,174 @@
+"""Leader election so exactly one process runs the background scheduler.
+
+Every API worker calls ``start_scheduler()`` on startup; only the elected
+leader actually schedules scrapes. The backend is chosen with
+``SCHEDULER_LEADER``:
+
+* ``file`` (default) – an exclusive ``flock`` on ``SCHEDULER_LOCK_FILE``.
+  Covers several workers on one host; the OS drops the lock when the leader
+  dies and a follower takes over on its next attempt.
+* ``firestore`` – a lease document (``leases/<name>``) holding the owner and
+  an expiry. The leader renews it every ``ttl / 3``; followers claim it once
+  it has expired, so takeover happens within ``SCHEDULER_LEASE_TTL_SEC`` plus
+  one retry period. Use this when running several hosts/replicas.
+* ``none`` – every process is leader (single worker, previous behaviour).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+try:
+    import fcntl  # type: ignore
+except ImportError:  # pragma: no cover – non-POSIX
+    fcntl = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOCK_FILE = Path(__file__).resolve().parent / ".cache" / "scheduler.lock"
+DEFAULT_LEASE_TTL_SEC = 30.0
+
+
+def _owner_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class Elector:
+    """Base elector: always leader. Subclasses implement the real backends.
+
+    ``try_acquire`` is called periodically (and doubles as the renewal for
+    lease-based backends); it may block, so it is run in a thread.
+    """
+
+    kind = "none"
+
+    def __init__(self) -> None:
+        self.owner = _owner_id()
+
+    def try_acquire(self) -> bool:
+        return True
+
+    def release(self) -> None:
+        pass
+
+    @property
+    def retry_sec(self) -> float:
+        return 10.0
+
+
+class FileLockElector(Elector):
+    kind = "file"
+
+    def __init__(self, path: Path = DEFAULT_LOCK_FILE) -> None:
+        super().__init__()
+        self.path = Path(path)
+        self._fh = None
+
+    def try_acquire(self) -> bool:
+        if self._fh is not None:
+            return True  # flock is held until the process exits or releases
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fh = open(self.path, "a+")
+        try:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            fh.close()
+            return False
+        fh.seek(0)
+        fh.truncate()
+        fh.write(self.owner)
+        fh.flush()
+        self._fh = fh
+        return True
+
+    def release(self) -> None:
+        if self._fh is not None:
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+            self._fh.close()
+            self._fh = None
+
+
+class FirestoreLeaseElector(Elector):
+    kind = "firestore"
+
+    def __init__(self, name: str = "scheduler", ttl_sec: float = DEFAULT_LEASE_TTL_SEC) -> None:
+        super().__init__()
+        self.name = name
+        self.ttl_sec = ttl_sec
+
+    def try_acquire(self) -> bool:
+        from backend import firestore_repo as repo
+
+        return repo.acquire_lease(self.name, self.owner, self.ttl_sec)
+
+    def release(self) -> None:
+        from backend import firestore_repo as repo
+
+        try:
+            repo.release_lease(self.name, self.owner)
+        except Exception:
+            logger.exception("Failed to release %s lease", self.name)
+
+    @property
+    def retry_sec(self) -> float:
+        return self.ttl_sec / 3
+
+
+def elector_from_env() -> Elector:
+    kind = os.getenv("SCHEDULER_LEADER", "file").lower()
+    if kind == "firestore":
+        return FirestoreLeaseElector(ttl_sec=float(os.getenv("SCHEDULER_LEASE_TTL_SEC", DEFAULT_LEASE_TTL_SEC)))
+    if kind == "file":
+        if fcntl is None:
+            logger.warning("File locks unavailable on this platform; every worker runs the scheduler")
+            return Elector()
+        lock_file = os.getenv("SCHEDULER_LOCK_FILE")
+        return FileLockElector(Path(lock_file) if lock_file else DEFAULT_LOCK_FILE)
+    return Elector()
+
+
+async def campaign(
+    elector: Elector,
+    on_elected: Callable[[], Awaitable[None] | None],
+    on_deposed: Callable[[], Awaitable[None] | None],
+) -> None:
+    """Run forever: keep trying to lead, invoking the callbacks on transitions.
+
+    A leader whose renewal fails (lost lease, Firestore unreachable) steps
+    down immediately, since another process may already have taken over.
+    """
+    leading = False
+    try:
+        while True:
+            try:
+                acquired = await asyncio.to_thread(elector.try_acquire)
+            except Exception:
+                logger.exception("Leader election (%s) attempt failed", elector.kind)
+                acquired = False
+
+            if acquired and not leading:
+                leading = True
+                logger.info("Elected scheduler leader (%s, %s)", elector.kind, elector.owner)
+                await _call(on_elected)
+            elif leading and not acquired:
+                leading = False
+                logger.warning("Lost scheduler leadership (%s)", elector.kind)
+                await _call(on_deposed)
+
+            await asyncio.sleep(elector.retry_sec)
+    finally:
+        if leading:
+            await _call(on_deposed)
+            await asyncio.to_thread(elector.release)
+
+
+async def _call(fn: Callable[[], Optional[Awaitable[None]]]) -> None:
+    result = fn()
+    if asyncio.iscoroutine(result):
+        await result
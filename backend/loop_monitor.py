@@ -0,0 +1,135 @@
+"""Event-loop lag monitor.
+
+Two cooperating parts:
+
+* a heartbeat task on the loop sleeps ``interval`` seconds and records how
+  late it woke up (``event_loop_lag_seconds`` histogram) – the loop lag
+  every other coroutine saw at that moment;
+* a watchdog thread checks that heartbeat. Once the loop has not come back
+  for ``threshold`` seconds, it reads the loop thread's current stack from
+  ``sys._current_frames()`` and logs it while the blocking call is still on
+  it – the ``firestore_repo``, Apify or ``firebase_auth`` frame responsible
+  for the stall is at the bottom.
+
+Stacks are logged at most once per stall and once per ``log_interval``
+seconds overall; stalls are always counted (``event_loop_stalls_total``).
+
+Configuration: ``LOOP_MONITOR_ENABLED`` (default on),
+``LOOP_LAG_INTERVAL_MS`` (100), ``LOOP_LAG_THRESHOLD_MS`` (250) and
+``LOOP_LAG_LOG_INTERVAL_SEC`` (30).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from backend import metrics
+
+logger = logging.getLogger(__name__)
+
+MAX_STACK_FRAMES = 40
+
+lag_seconds = metrics.Histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop heartbeat woke up",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+stalls_total = metrics.Counter("event_loop_stalls_total", "Event loop stalls longer than the threshold")
+max_lag_seconds = metrics.Gauge("event_loop_lag_max_seconds", "Longest event loop lag since start")
+
+
+class LoopMonitor:
+    def __init__(self, interval: float = 0.1, threshold: float = 0.25, log_interval: float = 30.0) -> None:
+        self.interval = interval
+        self.threshold = threshold
+        self.log_interval = log_interval
+        self._heartbeat = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._max_lag = 0.0
+        self._last_logged = float("-inf")
+
+    def start(self) -> None:
+        """Start monitoring the running loop (call from inside it)."""
+        if self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._beat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stop.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join, 1.0)
+            self._watchdog = None
+
+    async def _beat(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            self._record(max(0.0, now - expected))
+
+    def _record(self, lag: float) -> None:
+        lag_seconds.observe(lag)
+        if lag > self._max_lag:
+            self._max_lag = lag
+            max_lag_seconds.set(lag)
+        if lag >= self.threshold:
+            stalls_total.inc()
+            logger.info("Event loop blocked for %.0f ms", lag * 1000)
+
+    def _watch(self) -> None:
+        stalled_since: Optional[float] = None
+        poll = min(self.interval, self.threshold / 2)
+        while not self._stop.wait(poll):
+            beat = self._heartbeat
+            late = time.monotonic() - beat - self.interval
+            if late < self.threshold:
+                continue
+            if stalled_since == beat:
+                continue  # already reported this stall
+            stalled_since = beat
+            now = time.monotonic()
+            if now - self._last_logged < self.log_interval:
+                continue
+            self._last_logged = now
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            stack = "".join(traceback.format_stack(frame, limit=MAX_STACK_FRAMES))
+            logger.warning("Event loop blocked for over %.0f ms; loop thread stack:\n%s", late * 1000, stack)
+
+
+def monitor_from_env() -> Optional[LoopMonitor]:
+    if os.getenv("LOOP_MONITOR_ENABLED", "1").lower() in ("0", "false", "no"):
+        return None
+    return LoopMonitor(
+        interval=float(os.getenv("LOOP_LAG_INTERVAL_MS", "100")) / 1000,
+        threshold=float(os.getenv("LOOP_LAG_THRESHOLD_MS", "250")) / 1000,
+        log_interval=float(os.getenv("LOOP_LAG_LOG_INTERVAL_SEC", "30")),
+    )
+
+
+monitor = monitor_from_env()
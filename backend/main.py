@@ -1,14 +1,18 @@
-from fastapi import FastAPI, HTTPException, Depends, Query, APIRouter
+from fastapi import FastAPI, HTTPException, Depends, Query, APIRouter, Request
 import asyncio
+import hmac
 from fastapi.middleware.cors import CORSMiddleware
-from sqlmodel import Session, select, SQLModel
-from datetime import datetime, timedelta
+from sqlmodel import Field, Session, select, SQLModel
+from datetime import datetime, timedelta, timezone
 from typing import Optional, List
 import httpx
+import logging
 import os
 from dotenv import load_dotenv
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.exception_handlers import http_exception_handler
+from fastapi.responses import FileResponse, Response
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 # Load environment variables from .env file
 load_dotenv()
@@ -17,14 +21,36 @@ from backend.models import (
     Status, StatusCreate, StatusResponse,
     City, CityCreate, CityUpdate, CityResponse, JourneyResponse, JourneyCity
 )
-# firestore data layer
-from backend import firestore_repo as repo
+# data layer (Firestore, SQLite or in-memory – see backend.repository)
+from backend.repository import repo
 # Keep database import for other endpoints until fully migrated
 from backend.database import create_db_and_tables, get_session
-from backend.auth import get_current_admin
+from backend.auth import get_current_admin, verify_token
 
-from backend.scheduler import start_scheduler
+from backend.scheduler import start_scheduler, stop_scheduler
 from backend.scheduler import reload_settings
+from backend.scheduler import queue_state
+from backend.scrape_jobs import jobs as scrape_jobs
+from backend import (
+    initial_state,
+    last_good,
+    loop_monitor,
+    metrics,
+    post_archive,
+    post_search,
+    profiling,
+    snapshot,
+    states_topology,
+    timeline,
+    tracing,
+)
+from backend.polygons import PolygonStore
+
+logger = logging.getLogger(__name__)
+
+# City polygons live in their own content-addressed store; the status doc
+# only carries a reference (see backend.polygons).
+polygon_store = PolygonStore(repo)
 
 # -------------------- Merch Endpoints --------------------
 
@@ -53,6 +79,7 @@ class MerchUpdate(SQLModel):
 
 # -------------------- Helper: geocode city --------------------
 
+@tracing.traced("google.geocode", kind=tracing.KIND_CLIENT)
 async def geocode_city(city: str, state: str | None = None) -> tuple[float, float] | None:
     """Return (lat,lng) for a city using Google Geocoding API. Returns None on failure."""
     api_key = os.getenv("GOOGLE_PLACES_API_KEY")
@@ -62,7 +89,7 @@ async def geocode_city(city: str, state: str | None = None) -> tuple[float, floa
     url = "https://maps.googleapis.com/maps/api/geocode/json"
     params = {"address": query, "key": api_key}
     try:
-        async with httpx.AsyncClient(timeout=10) as client:
+        async with httpx.AsyncClient(timeout=10, event_hooks=metrics.httpx_hooks("google")) as client:
             resp = await client.get(url, params=params)
             resp.raise_for_status()
             data = resp.json()
@@ -105,9 +132,22 @@ async def no_cache_html(request, call_next):
     return response
 
 
+# The last middleware added is the outermost one, so these two go last.
+
+# Root span per request (no-op unless TRACING_ENABLED)
+app.add_middleware(tracing.TracingMiddleware, router_app=app)
+
+# Per-route latency / in-flight metrics (outermost, so it times everything)
+app.add_middleware(metrics.MetricsMiddleware, router_app=app)
+
+
 @app.on_event("startup")
 async def on_startup():
     """Initialize database on startup"""
+    # Watch for handlers blocking the event loop (lag metric + stack logging)
+    if loop_monitor.monitor is not None:
+        loop_monitor.monitor.start()
+
     create_db_and_tables()
     
     # Create initial status if none exists
@@ -131,6 +171,8 @@ async def on_startup():
             session.execute(text("ALTER TABLE status ADD COLUMN city_polygon TEXT"))
         if "is_sleep" not in columns:
             session.execute(text("ALTER TABLE status ADD COLUMN is_sleep BOOLEAN DEFAULT 0"))
+        if "extra" not in columns:
+            session.execute(text("ALTER TABLE status ADD COLUMN extra TEXT"))
 
         # Drop deprecated columns (SQLite ≥3.35 supports DROP COLUMN) – only radius now
         for deprecated in ["radius"]:
@@ -156,133 +198,115 @@ async def on_startup():
 
         add_city_column("last_current_at", "TIMESTAMP")
         add_city_column("keywords", "TEXT")
+        add_city_column("extra", "TEXT")
 
-        # Refresh inspector after potential alters (only needed for later debug)
-
-        existing_status = session.exec(select(Status)).first()
-        if not existing_status:
-            initial_status = Status(
-                lat=0,
-                lng=0,
-                state=None,
-                quote="Welcome to Speed Live Map! 🗺️",
-                city=None,
-                city_polygon=None,
-                is_sleep=False,
-                last_updated=datetime.now(),
-            )
-            session.add(initial_status)
-            session.commit()
-
-        # Ensure default journey cities exist (idempotent)
-        seed_cities = [
-            ("Miami", "Florida"),
-            ("Orlando", "Florida"),
-            ("Daytona", "Florida"),
-            ("Jacksonville", "Florida"),
-            ("Atlanta", "Georgia"),
-            ("Greenville", "South Carolina"),
-            ("Washington", "D.C."),
-            ("Philadelphia", "Pennsylvania"),
-            ("New York", "New York"),
-            ("Boston", "Massachusetts"),
-            ("Pittsburgh", "Pennsylvania"),
-            ("Detroit", "Michigan"),
-            ("Chicago", "Illinois"),
-            ("Cincinnati", "Ohio"),
-            ("Nashville", "Tennessee"),
-            ("Memphis", "Tennessee"),
-            ("New Orleans", "Louisiana"),
-            ("Baton Rouge", "Louisiana"),
-            ("Houston", "Texas"),
-            ("Austin", "Texas"),
-            ("Dallas", "Texas"),
-            ("Kansas City", "Missouri"),
-            ("Denver", "Colorado"),
-            ("Keystone", "South Dakota"),
-            ("Jackson Hole", "Wyoming"),
-            ("Boise", "Idaho"),
-            ("Seattle", "Washington"),
-            ("Portland", "Oregon"),
-            ("Medford", "Oregon"),
-            ("San Francisco", "California"),
-            ("Lake Tahoe", "California"),
-            ("Las Vegas", "Nevada"),
-            ("Phoenix", "Arizona"),
-            ("Los Angeles", "California"),
-        ]
-
-        existing = session.exec(select(City)).all()
-        existing_names = {(c.city, c.state) for c in existing}
-
-        # Insert missing cities and fix order numbering
-        for idx, (city_name, state_name) in enumerate(seed_cities, start=1):
-            if (city_name, state_name) not in existing_names:
-                session.add(
-                    City(
-                        city=city_name,
-                        state=state_name,
-                        lat=0.0,
-                        lng=0.0,
-                        order=idx,
-                        is_current=False,
-                    )
-                )
-            else:
-                # ensure correct order for existing record
-                rec = session.exec(
-                    select(City).where(City.city == city_name, City.state == state_name)
-                ).first()
-                if rec.order != idx:
-                    rec.order = idx
-                    session.add(rec)
-
-        # Ensure at least one current city
-        if not session.exec(select(City).where(City.is_current == True)).first():
-            first_city = session.exec(select(City).order_by(City.order)).first()
-            if first_city:
-                first_city.is_current = True
-                session.add(first_city)
+    # Repository work below is best effort: with the store down the process
+    # must still come up and serve the last good copy from disk.
 
-        session.commit()
+    # -------- Seed an empty (dev) repository from a snapshot --------
+    seed_path = snapshot.seed_path_from_env()
+    if seed_path is not None:
+        try:
+            await asyncio.to_thread(snapshot.seed_repository, repo, seed_path)
+        except Exception:
+            logger.exception("Seeding from %s failed; starting without it", seed_path)
+
+    # -------- Move a legacy inline status polygon into the polygon store --------
+    try:
+        await asyncio.to_thread(_migrate_status_polygon)
+    except Exception:
+        logger.exception("Could not migrate the legacy status polygon")
 
     # -------- Geocode any cities still at 0,0 --------
     api_key = os.getenv("GOOGLE_PLACES_API_KEY")
     if api_key:
-        missing = session.exec(select(City).where(City.lat == 0, City.lng == 0)).all()
-        async def geocode_and_update(c: City):
-            coords = await geocode_city(c.city, c.state)
+        try:
+            cities = await asyncio.to_thread(repo.list_cities)
+        except Exception:
+            logger.exception("Could not list cities to geocode; skipping")
+            cities = []
+        missing = [c for c in cities if not c.get("lat") and not c.get("lng")]
+
+        async def geocode_and_update(c: dict):
+            coords = await geocode_city(c["city"], c.get("state"))
             if coords:
-                c.lat, c.lng = coords
-                session.add(c)
-
-        await asyncio.gather(*[geocode_and_update(c) for c in missing])
-        session.commit()
-
-        # ---- Ensure city table has new columns before querying ----
-        city_columns = [c["name"] for c in inspector.get_columns("city")]
-        def add_column_if_missing(col_name: str, sql_type: str):
-            if col_name not in city_columns:
                 try:
-                    session.execute(text(f"ALTER TABLE city ADD COLUMN {col_name} {sql_type}"))
-                    session.commit()
+                    await asyncio.to_thread(repo.update_city, c["id"], {"lat": coords[0], "lng": coords[1]})
                 except Exception:
-                    pass
+                    logger.exception("Could not store coordinates for city %s", c["id"])
 
-        add_column_if_missing("last_current_at", "TIMESTAMP")
-        add_column_if_missing("keywords", "TEXT")
+        await asyncio.gather(*[geocode_and_update(c) for c in missing])
 
-        # refresh column list after potential migration
-        existing = session.exec(select(City)).all()
+    # -------- Build the states boundary layer once (served from memory) --------
+    await asyncio.to_thread(states_topology.load_layer, states_topology.source_path())
 
-    # Start background scheduler (social media scraping)
+    # Start background scheduler (social media scraping) – only the elected
+    # leader among workers actually schedules scrapes.
     start_scheduler()
 
 
-@api.get("/status", response_model=dict)
-async def get_status():
-    """Fetch current status from Firestore."""
+@app.on_event("shutdown")
+async def on_shutdown():
+    """Hand scheduler leadership to another worker right away."""
+    await stop_scheduler()
+    await last_good.public_reads.close()
+    if loop_monitor.monitor is not None:
+        await loop_monitor.monitor.stop()
+    if post_archive.archive is not None:
+        await asyncio.to_thread(post_archive.archive.close)
+    await asyncio.to_thread(tracing.shutdown)
+
+
+def _move_polygon_to_store(payload: dict) -> None:
+    """Replace an inline ``city_polygon`` GeoJSON string with a store reference.
+
+    A non-empty string is stored (content-addressed, multi-resolution) and
+    becomes ``cityPolygonRef``; ``None`` clears the polygon; an empty string
+    leaves it unchanged (the admin form round-trips it empty). Simplifies
+    every zoom level – blocking, run it off the loop.
+    """
+    if "city_polygon" not in payload:
+        return
+    raw = payload.pop("city_polygon")
+    if raw is None:
+        payload["cityPolygonRef"] = None
+    elif raw.strip():
+        try:
+            payload["cityPolygonRef"] = polygon_store.put(raw)
+        except (ValueError, KeyError, TypeError) as exc:
+            raise HTTPException(status_code=422, detail=f"Invalid city polygon GeoJSON: {exc}")
+    # Drop any legacy full-detail copy from the status doc.
+    payload["city_polygon"] = None
+
+
+def _migrate_status_polygon() -> None:
+    """Status written before the polygon store keeps ``city_polygon`` inline: move it once."""
     status = repo.get_status()
+    if not status or not status.get("city_polygon"):
+        return
+    fix = {"city_polygon": status["city_polygon"]}
+    try:
+        _move_polygon_to_store(fix)
+    except HTTPException:
+        logger.warning("Leaving unparseable legacy city polygon on status")
+        return
+    repo.update_status(fix)
+    logger.info("Moved the legacy status polygon to %s", fix["cityPolygonRef"]["id"])
+
+
+async def _public_read(key: str, fn, response: Response):
+    """Read through the stale-while-error layer, flagging stale responses."""
+    value, stale = await last_good.public_reads.get(key, fn)
+    if stale is not None:
+        response.headers["X-Stale-Age"] = str(int(stale.age))
+        response.headers["X-Stale-Source"] = stale.source
+    return value, stale
+
+
+@api.get("/status", response_model=dict)
+async def get_status(response: Response):
+    """Fetch current status from the repository (last good copy if it is down)."""
+    status, _ = await _public_read("status", repo.get_status, response)
     if not status:
         raise HTTPException(status_code=404, detail="Status not found")
     return status
@@ -291,14 +315,112 @@ async def get_status():
 @api.post("/status")
 async def update_status(status_data: StatusCreate, current_admin=Depends(get_current_admin)):
     data_dict = status_data.dict(exclude_unset=True)
+    await asyncio.to_thread(_move_polygon_to_store, data_dict)
     updated = repo.update_status(data_dict)
+    _record_timeline(updated)
+    _invalidate_index_page()
     return updated
 
 
+def _invalidate_index_page() -> None:
+    if index_page is not None:
+        index_page.invalidate()
+
+
+def _record_timeline(status: dict) -> None:
+    if timeline.store is None:
+        return
+    try:
+        timeline.store.record(status)
+    except OSError:
+        logger.exception("Failed to record status in the timeline")
+
+
+@api.get("/timeline")
+async def get_timeline(
+    from_: Optional[datetime] = Query(None, alias="from"),
+    to: Optional[datetime] = None,
+    resolution: int = Query(1000, ge=2, le=10000),
+    method: str = Query("lttb", pattern="^(lttb|bucket)$"),
+):
+    """Location track and status changes between ``from`` and ``to`` (public).
+
+    Defaults to the last 24 hours. The track is downsampled to at most
+    ``resolution`` ``[epochSec, lat, lng]`` points; ``total`` is the number
+    of recorded points in the range.
+    """
+    if timeline.store is None:
+        raise HTTPException(status_code=503, detail="Timeline is disabled")
+    # Naive bounds are UTC; mixing them with offset-aware ones must not fail.
+    end = timeline.to_utc(to) if to else datetime.now(timezone.utc)
+    start = timeline.to_utc(from_) if from_ else end - timedelta(days=1)
+    if start > end:
+        raise HTTPException(status_code=400, detail="'from' must be before 'to'")
+    if end - start > timedelta(days=366):
+        raise HTTPException(status_code=400, detail="Range is limited to one year")
+
+    def build() -> dict:
+        track = timeline.store.track(start, end)
+        return {
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "total": len(track[0]),
+            "points": timeline.downsample(track, resolution, method),
+            "events": timeline.store.events(start, end),
+        }
+
+    return await asyncio.to_thread(build)
+
+
+@api.get("/polygons/{polygon_id}/{level}")
+async def get_polygon(polygon_id: str, level: str):
+    """One level of detail of a stored polygon as GeoJSON geometry.
+
+    Content-addressed, so the response never changes and is cached for a year.
+    """
+    geometry = await asyncio.to_thread(polygon_store.level, polygon_id, level)
+    if geometry is None:
+        raise HTTPException(status_code=404, detail="Polygon not found")
+    return Response(
+        content=geometry,
+        media_type="application/geo+json",
+        headers={"Cache-Control": "public, max-age=31536000, immutable", "ETag": f'"{polygon_id}-{level}"'},
+    )
+
+
+def _states_response(request: Request, cache_control: str) -> Response:
+    layer = states_topology.load_layer(states_topology.source_path())
+    if layer is None:
+        raise HTTPException(status_code=404, detail="States layer not available")
+    headers = {"Cache-Control": cache_control, "ETag": layer.etag, "Vary": "Accept-Encoding"}
+    if request.headers.get("if-none-match") == layer.etag:
+        return Response(status_code=304, headers=headers)
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(layer.gzip_body, media_type="application/json", headers=headers)
+    return Response(layer.body, media_type="application/json", headers=headers)
+
+
+@api.get("/geo/states")
+async def get_states_topology(request: Request):
+    """US states boundaries as simplified, quantized TopoJSON (``objects.states``)."""
+    return _states_response(request, "public, max-age=86400")
+
+
+@api.get("/geo/states/{version}")
+async def get_states_topology_version(version: str, request: Request):
+    """Same layer under its content version; cached for a year."""
+    layer = states_topology.load_layer(states_topology.source_path())
+    if layer is None or version != layer.version:
+        raise HTTPException(status_code=404, detail="States layer version not found")
+    return _states_response(request, "public, max-age=31536000, immutable")
+
+
 # Deprecated custom login/logout endpoints (handled by Firebase Auth on the client)
 
 
 @api.get("/places/search")
+@tracing.traced("google.places_search", kind=tracing.KIND_CLIENT)
 async def search_places(query: str = Query(..., min_length=1)):
     """Search places using Google Places API (proxy endpoint)"""
     try:
@@ -310,7 +432,7 @@ async def search_places(query: str = Query(..., min_length=1)):
         if not google_api_key:
             raise HTTPException(status_code=500, detail="Google Places API key not configured")
         
-        async with httpx.AsyncClient() as client:
+        async with httpx.AsyncClient(event_hooks=metrics.httpx_hooks("google")) as client:
             # Step 1: Get autocomplete suggestions
             autocomplete_url = "https://maps.googleapis.com/maps/api/place/autocomplete/json"
             autocomplete_params = {
@@ -370,6 +492,73 @@ async def search_places(query: str = Query(..., min_length=1)):
         raise HTTPException(status_code=500, detail=f"Failed to search places: {str(e)}")
 
 
+async def require_metrics_access(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False)),
+) -> None:
+    """Bearer ``METRICS_TOKEN`` (for scrapers) or an admin ID token."""
+    if credentials is None:
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    token = os.getenv("METRICS_TOKEN")
+    if token and hmac.compare_digest(credentials.credentials.encode(), token.encode()):
+        return
+    get_current_admin(await verify_token(credentials))
+
+
+@api.get("/metrics")
+async def get_metrics(_access=Depends(require_metrics_access)):
+    """Prometheus text exposition of the process's metrics.
+
+    Never public: scrapers send ``METRICS_TOKEN`` as a bearer token, admins
+    their ID token.
+    """
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+# -------------------- Admin diagnostics --------------------
+
+
+@api.post("/admin/profile")
+async def profile_stacks(
+    seconds: float = Query(10.0, gt=0, le=profiling.MAX_SECONDS),
+    interval_ms: float = Query(5.0, ge=1, le=1000),
+    include_idle: bool = False,
+    current_admin=Depends(get_current_admin),
+):
+    """Sample every thread's stack for ``seconds`` (admin only).
+
+    Returns collapsed stacks (``thread;frame;...;frame count`` per line),
+    ready for flamegraph.pl or speedscope.
+    """
+    try:
+        result = await asyncio.to_thread(profiling.sample_stacks, seconds, interval_ms / 1000, include_idle)
+    except profiling.ProfilerBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    return Response(
+        result["collapsed"] + "\n",
+        media_type="text/plain",
+        headers={"X-Profile-Samples": str(result["samples"])},
+    )
+
+
+@api.post("/admin/tracemalloc")
+async def trace_allocations(
+    seconds: float = Query(30.0, gt=0, le=profiling.MAX_SECONDS),
+    limit: int = Query(25, ge=1, le=500),
+    frames: int = Query(1, ge=1, le=50),
+    group_by: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+    current_admin=Depends(get_current_admin),
+):
+    """Top allocation sites by growth over a ``seconds`` window (admin only).
+
+    tracemalloc runs only for the window; ``frames`` > 1 with
+    ``group_by=traceback`` attributes growth to call paths.
+    """
+    try:
+        return await asyncio.to_thread(profiling.allocation_diff, seconds, limit, frames, group_by)
+    except profiling.ProfilerBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+
 # Health check under API prefix so root can serve frontend
 @api.get("/health")
 async def health_check():
@@ -383,8 +572,8 @@ async def health_check():
 
 
 @api.get("/cities")
-async def list_cities():
-    docs = repo.list_cities()
+async def list_cities(response: Response):
+    docs, _ = await _public_read("cities", repo.list_cities, response)
     result = []
     for d in docs:
         if not d.get("city"):
@@ -409,7 +598,7 @@ async def update_city(
 ):
     data = city_update.dict(exclude_unset=True)
 
-    # If is_current set true, ensure we unset others in Firestore
+    # If is_current set true, ensure we unset the others
     now_iso = datetime.utcnow().isoformat()
     if data.get("is_current") is True:
         cities = repo.list_cities()
@@ -433,6 +622,7 @@ async def update_city(
     payload = {k: v for k, v in payload.items() if v is not None}
 
     updated_doc = repo.update_city(city_id, payload)
+    _invalidate_index_page()
 
     return {
         "id": city_id,
@@ -459,15 +649,17 @@ async def update_city(
 
 
 @api.get("/journey")
-async def get_journey():
-    return repo.compute_journey()
+async def get_journey(response: Response):
+    journey, _ = await _public_read("journey", repo.compute_journey, response)
+    return journey
 
 # -------------------- Sleep mode endpoints --------------------
 
 
 @api.get("/sleep")
-async def get_sleep():
-    return {"isSleep": repo.get_sleep_flag()}
+async def get_sleep(response: Response):
+    flag, _ = await _public_read("sleep", repo.get_sleep_flag, response)
+    return {"isSleep": flag}
 
 
 class SleepToggle(SQLModel):
@@ -477,6 +669,8 @@ class SleepToggle(SQLModel):
 @api.put("/sleep")
 async def toggle_sleep(payload: SleepToggle, current_admin=Depends(get_current_admin)):
     flag = repo.set_sleep_flag(payload.isSleep)
+    _record_timeline({"isSleep": flag})
+    _invalidate_index_page()
     return {"isSleep": flag}
 
 
@@ -526,27 +720,75 @@ async def modify_merch(item_id: str, payload: MerchUpdate, current_admin=Depends
 
 @api.get("/cities/{city_id}/posts")
 async def get_city_posts(city_id: int):
-    """Return saved social posts for the specified city (public)."""
-    posts = repo.list_city_posts(city_id)
-    # Sort by likeCount/likes desc then timestamp desc
-    def score(p: dict[str, any]):
-        return p.get("likeCount", p.get("likes", 0))
+    """Return saved social posts for the specified city (public), best first.
+
+    Posts are ranked once at scrape time; the repository returns them ordered
+    by the stored score.
+    """
+    return repo.list_city_posts(city_id)
+
+
+@api.get("/posts/search")
+async def search_posts(
+    q: str = Query(..., min_length=1, max_length=200),
+    city_id: Optional[int] = None,
+    platform: Optional[str] = None,
+    sort: str = Query("relevance", pattern="^(relevance|recent|score)$"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+):
+    """Full-text search over saved post captions and usernames (public).
 
-    posts.sort(key=score, reverse=True)
-    return posts
+    All words must match; the last one also matches as a prefix. Use
+    ``nextOffset`` from the response to fetch the next page.
+    """
+    if post_search.index is None:
+        raise HTTPException(status_code=503, detail="Post search is disabled")
+    return await asyncio.to_thread(
+        post_search.index.search, q, city_id=city_id, platform=platform, sort=sort, limit=limit, offset=offset
+    )
 
 
-@api.post("/cities/{city_id}/scrape")
-async def manual_scrape(city_id: int, current_admin=Depends(get_current_admin)):
-    """Trigger social scrape for a specific city and return number of posts saved."""
-    from backend.social_scraper import scrape_city_posts
+@api.post("/cities/{city_id}/scrape", status_code=202)
+async def manual_scrape(
+    city_id: int,
+    refresh: bool = Query(False, description="Bypass cached actor results"),
+    current_admin=Depends(get_current_admin),
+):
+    """Queue a social scrape for a specific city and return its job id.
+
+    The scrape runs in the background on the same job queue the scheduler
+    uses; poll ``GET /api/scrape-jobs/{jobId}`` for progress. If the city
+    already has a queued or running job (on any worker), that job is
+    returned (``attached: true``) instead of starting another. Actor results
+    from a recent identical run are reused unless ``refresh=true``; when the
+    attached job does use them, ``refreshIgnored`` is true.
+    """
     city_doc = repo.get_city(city_id)
     if not city_doc:
         raise HTTPException(status_code=404, detail="City not found")
-    posts = scrape_city_posts(city_doc)
-    if posts:
-        repo.save_city_posts(city_id, posts)
-    return {"saved": len(posts)}
+    job, attached = await scrape_jobs.submit(city_doc, source="manual", use_cache=not refresh)
+    return {
+        "jobId": job.id,
+        "status": job.status,
+        "attached": attached,
+        "refreshIgnored": refresh and job.use_cache,
+    }
+
+
+@api.get("/scrape-jobs/{job_id}")
+async def get_scrape_job(job_id: str, current_admin=Depends(get_current_admin)):
+    """Status and per-platform progress of a scrape job."""
+    job = await scrape_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Scrape job not found")
+    return job.to_dict()
+
+
+@api.get("/scheduler/queue")
+async def get_scrape_queue(current_admin=Depends(get_current_admin)):
+    """Show which cities the next scrape cycle will refresh, and why."""
+    return queue_state()
 
 
 # -------------------- Settings endpoints --------------------
@@ -559,6 +801,15 @@ async def get_settings():
 
 class SettingsUpdate(SQLModel):
     socialScrapeIntervalMin: int | None = None
+    # <= 0 would merge every LSH candidate pair
+    nearDuplicateThreshold: float | None = Field(default=None, gt=0.0, le=1.0)
+    scrapeActorBudget: int | None = Field(default=None, ge=1)
+    scrapeRecentDays: float | None = Field(default=None, gt=0.0)
+    adaptiveScrapeInterval: bool | None = None
+    scrapeIntervalFloorMin: int | None = Field(default=None, ge=1)
+    scrapeIntervalCeilingMin: int | None = Field(default=None, ge=1)
+    # <= 0 would count every cycle as a burst
+    scrapeBurstYield: int | None = Field(default=None, ge=1)
     instagramUsername: str | None = None
     twitterUsername: str | None = None
     tiktokUsername: str | None = None
@@ -580,18 +831,38 @@ app.include_router(api)
 
 frontend_dist = os.path.join(os.path.dirname(__file__), "..", "frontend", "dist")
 
+
+def _static_initial_state() -> dict:
+    # Versioned (immutable) URL of the states layer, once it has been built.
+    layer = states_topology.load_layer(states_topology.source_path())
+    return {"statesUrl": f"/api/geo/states/{layer.version}"} if layer is not None else {}
+
+
+# index.html with status/journey/sleep inlined (None when disabled or unbuilt)
+index_page = initial_state.page_from_env(frontend_dist, repo, extra=_static_initial_state)
+
 if os.path.isdir(frontend_dist):
+    index_path = os.path.join(frontend_dist, "index.html")
+
+    async def _index_response() -> Response:
+        if index_page is None:
+            return FileResponse(index_path, headers={"Cache-Control": "no-store"})
+        return Response(await index_page.html(), media_type="text/html", headers={"Cache-Control": "no-store"})
+
+    @app.get("/", include_in_schema=False)
+    @app.get("/index.html", include_in_schema=False)
+    async def serve_index():
+        return await _index_response()
+
     # Mount at root so non-API paths serve the built frontend
     app.mount("/", StaticFiles(directory=frontend_dist, html=True), name="static")
 
     # Fallback: serve index.html for unknown non-API routes (client-side routing)
-    index_path = os.path.join(frontend_dist, "index.html")
-
     @app.exception_handler(404)
     async def spa_404_handler(request, exc):
         if request.url.path.startswith("/api"):
-            return exc  # Propagate JSON 404 for API routes
-        return FileResponse(index_path, headers={"Cache-Control": "no-store"})
+            return await http_exception_handler(request, exc)  # JSON 404 for API routes
+        return await _index_response()
 
 # --------------------------------------------------------------------
 
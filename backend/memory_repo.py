@@ -0,0 +1,138 @@
+"""In-memory repository backend (``REPO_BACKEND=memory``).
+
+Mirrors ``backend.firestore_repo`` semantics – merge-on-write documents,
+posts replaced per city and ordered by score, settings merged with defaults –
+without credentials or network. Nothing is persisted; state lives as long as
+the process. Thread-safe, since blocking repo calls run in worker threads.
+"""
+
+from __future__ import annotations
+
+import copy
+import threading
+import uuid
+from datetime import datetime
+from typing import Any, List, Optional
+
+from backend.posts import Post
+from backend.repo_base import DEFAULT_SETTINGS, MAX_CITY_POSTS, BaseRepository, scrape_job_is_live
+
+
+class MemoryRepository(BaseRepository):
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._status: Optional[dict[str, Any]] = None
+        self._cities: dict[int, dict[str, Any]] = {}
+        self._posts: dict[int, dict[str, dict[str, Any]]] = {}
+        self._settings: dict[str, Any] = {}
+        self._merch: dict[str, dict[str, Any]] = {}
+        self._polygons: dict[str, dict[str, Any]] = {}
+        self._scrape_jobs: dict[str, dict[str, Any]] = {}
+        self._scrape_claims: dict[int, str] = {}
+        self.interval_decisions: list[dict[str, Any]] = []
+
+    # ------------------ Status ------------------
+
+    def get_status(self) -> Optional[dict[str, Any]]:
+        with self._lock:
+            return copy.deepcopy(self._status)
+
+    def update_status(self, payload: dict[str, Any]) -> dict[str, Any]:
+        payload["lastUpdated"] = datetime.utcnow().isoformat()
+        with self._lock:
+            self._status = {**(self._status or {}), **copy.deepcopy(payload)}
+        return self.get_status()  # type: ignore[return-value]
+
+    # ------------------ Cities ------------------
+
+    def list_cities(self) -> List[dict[str, Any]]:
+        with self._lock:
+            docs = [copy.deepcopy(d) | {"id": cid} for cid, d in self._cities.items()]
+        docs.sort(key=lambda d: (d.get("order") or 0))
+        return docs
+
+    def get_city(self, city_id: int) -> Optional[dict[str, Any]]:
+        with self._lock:
+            doc = self._cities.get(city_id)
+            return copy.deepcopy(doc) | {"id": city_id} if doc is not None else None
+
+    def update_city(self, city_id: int, data: dict[str, Any]) -> dict[str, Any]:
+        with self._lock:
+            self._cities[city_id] = {**self._cities.get(city_id, {}), **copy.deepcopy(data)}
+        return self.get_city(city_id)  # type: ignore[return-value]
+
+    # ------------------ Posts ------------------
+
+    def save_city_posts(self, city_id: int, posts: list[Post]) -> int:
+        keep = posts[:MAX_CITY_POSTS]
+        with self._lock:
+            existing = set(self._posts.get(city_id, {}))
+            self._posts[city_id] = {p.doc_id: p.to_dict() for p in keep}
+            return len(set(self._posts[city_id]) - existing)
+
+    def list_city_posts(self, city_id: int) -> list[dict[str, Any]]:
+        with self._lock:
+            docs = [copy.deepcopy(d) | {"id": doc_id} for doc_id, d in self._posts.get(city_id, {}).items()]
+        docs.sort(key=lambda d: d.get("score") or 0.0, reverse=True)
+        return docs
+
+    # ------------------ Settings ------------------
+
+    def get_settings(self) -> dict[str, Any]:
+        with self._lock:
+            return {**DEFAULT_SETTINGS, **copy.deepcopy(self._settings)}
+
+    def update_settings(self, data: dict[str, Any]) -> dict[str, Any]:
+        with self._lock:
+            self._settings.update(copy.deepcopy(data))
+        return self.get_settings()
+
+    def add_interval_decision(self, data: dict[str, Any]) -> None:
+        with self._lock:
+            self.interval_decisions.append(dict(data))
+
+    # ------------------ Merch ------------------
+
+    def list_merch(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return [copy.deepcopy(d) | {"id": item_id} for item_id, d in self._merch.items()]
+
+    def create_merch(self, data: dict[str, Any]) -> dict[str, Any]:
+        item_id = uuid.uuid4().hex[:20]
+        with self._lock:
+            self._merch[item_id] = copy.deepcopy(data)
+        return data | {"id": item_id}
+
+    def update_merch(self, item_id: str, data: dict[str, Any]) -> dict[str, Any]:
+        with self._lock:
+            self._merch[item_id] = {**self._merch.get(item_id, {}), **copy.deepcopy(data)}
+            return copy.deepcopy(self._merch[item_id]) | {"id": item_id}
+
+    # ------------------ Polygons ------------------
+
+    def get_polygon(self, polygon_id: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            return copy.deepcopy(self._polygons.get(polygon_id))
+
+    def save_polygon(self, polygon_id: str, data: dict[str, Any]) -> None:
+        with self._lock:
+            self._polygons[polygon_id] = copy.deepcopy(data)
+
+    # ------------------ Scrape jobs ------------------
+
+    def claim_scrape_job(self, job: dict[str, Any], stale_before: str) -> dict[str, Any]:
+        with self._lock:
+            current = self._scrape_jobs.get(self._scrape_claims.get(job["city_id"], ""))
+            if scrape_job_is_live(current, stale_before):
+                return copy.deepcopy(current)  # type: ignore[arg-type]
+            self._scrape_jobs[job["id"]] = copy.deepcopy(job)
+            self._scrape_claims[job["city_id"]] = job["id"]
+            return copy.deepcopy(job)
+
+    def get_scrape_job(self, job_id: str) -> Optional[dict[str, Any]]:
+        with self._lock:
+            return copy.deepcopy(self._scrape_jobs.get(job_id))
+
+    def update_scrape_job(self, job_id: str, data: dict[str, Any]) -> None:
+        with self._lock:
+            self._scrape_jobs[job_id] = {**self._scrape_jobs.get(job_id, {}), **copy.deepcopy(data)}
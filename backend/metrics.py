@@ -0,0 +1,321 @@
+"""In-process Prometheus metrics.
+
+A small registry of counters, gauges and histograms rendered in the
+Prometheus text exposition format at ``/api/metrics`` – no client library,
+no background threads; recording is a dict update under a lock.
+
+What is measured:
+
+* **HTTP** – ``http_request_duration_seconds`` (histogram) and
+  ``http_requests_in_flight`` (gauge) per route template and method, via
+  ``MetricsMiddleware``.
+* **Repository** – every call through ``backend.repository.repo`` (each
+  ``firestore_repo`` function in production): calls, duration, documents
+  read/written and approximate JSON bytes (lists estimated from a sample),
+  by backend, operation and kind.
+  Each call also runs inside a ``repo.<op>`` span (``backend.tracing``).
+* **Outbound** – Google Maps/Places and Firebase cert requests, Apify actor
+  runs.
+* **Scheduler** – scrape cycle and scrape job runs by outcome.
+
+With ``METRICS_DEBUG=1`` every response carries ``X-Repo-Calls`` and
+``X-Repo-Docs`` for the repository work done on its behalf, so tests can
+assert an endpoint stays within its Firestore read budget.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+import time
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Iterable, Optional
+
+from starlette.routing import Match
+
+from backend import tracing
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+DEBUG_HEADERS = os.getenv("METRICS_DEBUG", "0").lower() in ("1", "true", "yes")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+# ------------------ Metric types ------------------
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: dict[tuple[str, ...], Any] = {}
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict[str, Any]) -> tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key: tuple[str, ...], extra: str = "") -> str:
+        parts = [f'{n}="{_escape(v)}"' for n, v in zip(self.labelnames, key)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key: tuple[str, ...], value: Any) -> list[str]:
+        return [f"{self.name}{self._labels(key)} {_fmt(value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=DEFAULT_BUCKETS) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def _render_value(self, key: tuple[str, ...], value: Any) -> list[str]:
+        counts, total, count = value
+        lines, cumulative = [], 0
+        for bound, n in zip(self.buckets, counts):
+            cumulative += n
+            le = 'le="%s"' % _fmt(bound)
+            lines.append(f"{self.name}_bucket{self._labels(key, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{self._labels(key)} {_fmt(total)}")
+        lines.append(f"{self.name}_count{self._labels(key)} {count}")
+        return lines
+
+
+REGISTRY: list[_Metric] = []
+
+
+def render() -> str:
+    lines: list[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ------------------ Metrics ------------------
+
+http_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route", "status")
+)
+http_in_flight = Gauge("http_requests_in_flight", "HTTP requests being served", ("method", "route"))
+
+repo_calls = Counter("repo_calls_total", "Repository calls", ("backend", "op", "kind", "outcome"))
+repo_duration = Histogram("repo_call_duration_seconds", "Repository call latency", ("backend", "op"))
+repo_docs = Counter("repo_documents_total", "Documents read or written through the repository", ("backend", "op", "kind"))
+repo_bytes = Counter("repo_bytes_total", "Approximate JSON bytes read or written", ("backend", "op", "kind"))
+
+outbound_requests = Counter("outbound_requests_total", "Outbound API requests", ("service", "endpoint", "outcome"))
+apify_runs = Counter("apify_actor_runs_total", "Apify actor runs (cache misses)", ("actor", "outcome"))
+apify_duration = Histogram(
+    "apify_actor_run_seconds", "Apify actor run latency", ("actor",), buckets=(1, 5, 15, 30, 60, 120, 300, 600)
+)
+scheduler_runs = Counter("scheduler_job_runs_total", "Scheduler job runs", ("job", "outcome"))
+scrape_job_runs = Counter("scrape_jobs_total", "Finished scrape jobs", ("source", "status"))
+
+
+# ------------------ Per-request accounting ------------------
+
+# {"calls": n, "docs": n} for the request being served (None outside requests).
+request_stats: ContextVar[Optional[dict[str, int]]] = ContextVar("request_stats", default=None)
+
+
+# Lists are sized from their first few items, so a hot read such as
+# list_city_posts is not serialized a second time just to be counted.
+BYTES_SAMPLE = 4
+
+
+def _approx_bytes(value: Any) -> int:
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return 2
+        sample = value[:BYTES_SAMPLE]
+        sampled = sum(_approx_bytes(v) for v in sample)
+        return 2 + sampled * len(value) // len(sample) + 2 * (len(value) - 1)
+    try:
+        return len(json.dumps(value, default=lambda o: o.to_dict() if hasattr(o, "to_dict") else str(o)))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _doc_count(value: Any) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, (list, tuple)):
+        return len(value)
+    return 1
+
+
+READ_PREFIXES = ("get_", "list_", "compute_")
+
+
+class InstrumentedRepository:
+    """Proxy timing and counting every public call on a repository backend."""
+
+    def __init__(self, inner: Any, backend: str) -> None:
+        self._inner = inner
+        self._backend = backend
+        self._wrapped: dict[str, Callable] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._inner, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+        wrapped = self._wrapped.get(name)
+        if wrapped is None:
+            wrapped = self._wrapped[name] = self._wrap(name, attr)
+        return wrapped
+
+    def _wrap(self, op: str, fn: Callable) -> Callable:
+        backend = self._backend
+        kind = "read" if op.startswith(READ_PREFIXES) else "write"
+
+        span_name = f"repo.{op}"
+
+        @wraps(fn)
+        def call(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            outcome = "error"
+            try:
+                with tracing.span(span_name, backend=backend, access=kind):
+                    result = fn(*args, **kwargs)
+                outcome = "ok"
+            finally:
+                repo_duration.observe(time.perf_counter() - start, backend=backend, op=op)
+                repo_calls.inc(backend=backend, op=op, kind=kind, outcome=outcome)
+            payload = result if kind == "read" else [a for a in args if isinstance(a, (dict, list))]
+            docs = _doc_count(result) if kind == "read" else sum(_doc_count(a) for a in payload) or 1
+            repo_docs.inc(docs, backend=backend, op=op, kind=kind)
+            repo_bytes.inc(_approx_bytes(payload), backend=backend, op=op, kind=kind)
+            stats = request_stats.get()
+            if stats is not None:
+                stats["calls"] += 1
+                stats["docs"] += docs
+            return result
+
+        return call
+
+
+# ------------------ HTTP ------------------
+
+
+def route_template(app: Any, scope: dict[str, Any]) -> str:
+    """Path template of the route **scope** will hit (bounded label values)."""
+    for route in app.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", "") or "/"
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and in-flight requests per route."""
+
+    def __init__(self, app: Any, router_app: Any = None) -> None:
+        self.app = app
+        self.router_app = router_app
+
+    async def __call__(self, scope: dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        route = route_template(self.router_app, scope) if self.router_app is not None else scope["path"]
+        stats = {"calls": 0, "docs": 0}
+        token = request_stats.set(stats)
+        status = {"code": 500}
+
+        async def send_wrapper(message: dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                if DEBUG_HEADERS:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-repo-calls", str(stats["calls"]).encode()))
+                    headers.append((b"x-repo-docs", str(stats["docs"]).encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        http_in_flight.inc(method=method, route=route)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_in_flight.dec(method=method, route=route)
+            http_duration.observe(time.perf_counter() - start, method=method, route=route, status=status["code"])
+            request_stats.reset(token)
+
+
+# ------------------ Outbound ------------------
+
+
+def httpx_hooks(service: str) -> dict[str, list]:
+    """``event_hooks`` for an ``httpx.AsyncClient`` counting each response."""
+
+    async def on_response(response: Any) -> None:
+        path = response.request.url.path.rstrip("/")
+        endpoint = "/".join(path.split("/")[-2:])
+        outcome = "ok" if response.status_code < 400 else str(response.status_code)
+        outbound_requests.inc(service=service, endpoint=endpoint, outcome=outcome)
+
+    return {"response": [on_response]}
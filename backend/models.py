@@ -19,6 +19,7 @@ class StatusBase(SQLModel):
 class Status(StatusBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     last_updated: datetime = Field(default_factory=datetime.now)
+    extra: Optional[str] = Field(default=None, description="JSON of status fields without a column")
 
 
 class StatusCreate(StatusBase):
@@ -61,6 +62,7 @@ class CityBase(SQLModel):
 
 class City(CityBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
+    extra: Optional[str] = Field(default=None, description="JSON of city fields without a column")
 
 
 class CityCreate(CityBase):
@@ -106,4 +108,20 @@ class JourneyCity(SQLModel):
 
 class JourneyResponse(SQLModel):
     currentCity: Optional[JourneyCity]
-    path: List[JourneyCity] = []
\ No newline at end of file
+    path: List[JourneyCity] = []
+
+
+# -------------------- Generic documents (SQLite repository) --------------------
+
+
+class Document(SQLModel, table=True):
+    """Schemaless JSON document, e.g. settings, merch or a city's posts.
+
+    ``collection`` follows the Firestore path (``settings``, ``merch``,
+    ``cities/<id>/posts``); ``score`` mirrors the post score for ordering.
+    """
+
+    collection: str = Field(primary_key=True, max_length=200)
+    id: str = Field(primary_key=True, max_length=200)
+    data: str = Field(description="JSON document body")
+    score: Optional[float] = Field(default=None, index=True)
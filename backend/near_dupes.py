@@ -0,0 +1,174 @@
+"""Collapse near-duplicate posts (the same clip cross-posted to several platforms).
+
+Captions are reduced to word shingles and summarised with a MinHash
+signature. Locality-sensitive hashing (LSH) splits every signature into bands;
+posts sharing any band bucket become *candidates*, so only likely pairs are
+compared instead of all n² pairs. Candidates are confirmed when the fraction
+of agreeing signature slots (an estimate of caption Jaccard similarity) meets
+the configured threshold. Posts whose media URL is identical (same CDN object)
+are treated as duplicates regardless of caption.
+
+Each cluster keeps its highest-engagement post; the others are recorded on it
+as ``siblings``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import random
+import re
+from collections import defaultdict
+from typing import Iterable, List, Optional
+from urllib.parse import urlsplit
+
+from backend.posts import Post
+
+DEFAULT_THRESHOLD = 0.7
+NUM_PERM = 64
+MIN_TOKENS = 4  # shorter captions are too generic to compare safely
+
+_MASK32 = (1 << 32) - 1
+
+# Multiply-add hash family over 32-bit shingle hashes (odd multipliers); a
+# fixed seed keeps signatures comparable across processes.
+_rng = random.Random(0x5EED)
+_PERMUTATIONS = [(_rng.getrandbits(32) | 1, _rng.getrandbits(32)) for _ in range(NUM_PERM)]
+
+_URL_RE = re.compile(r"https?://\S+")
+_WORD_RE = re.compile(r"\w+")
+
+
+# ------------------ Features ------------------
+
+
+def _hash32(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=4).digest(), "little")
+
+
+def caption_shingles(text: str, size: int = 2) -> set[str]:
+    """Word n-gram shingles of a caption (links and case ignored)."""
+    tokens = _WORD_RE.findall(_URL_RE.sub(" ", text.casefold()))
+    if len(tokens) < MIN_TOKENS:
+        return set()
+    return {" ".join(tokens[i : i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def minhash(shingles: Iterable[str]) -> tuple[int, ...]:
+    """MinHash signature (NUM_PERM slots) of a shingle set."""
+    hashes = [_hash32(s) for s in shingles]
+    if not hashes:
+        return ()
+    return tuple(
+        min((a * h + b) & _MASK32 for h in hashes) for a, b in _PERMUTATIONS
+    )
+
+
+def media_key(post: Post) -> Optional[str]:
+    """Identity of the attached media (CDN URL without signing query params)."""
+    if not post.media_url:
+        return None
+    parts = urlsplit(post.media_url)
+    return f"{parts.netloc}{parts.path}" if parts.path else None
+
+
+def _band_layout(threshold: float) -> tuple[int, int]:
+    """Pick (bands, rows) whose LSH S-curve midpoint sits just below **threshold**.
+
+    Erring low favours recall; false candidates are removed by verification.
+    """
+    best: tuple[float, int, int] | None = None
+    for rows in range(1, NUM_PERM + 1):
+        if NUM_PERM % rows:
+            continue
+        bands = NUM_PERM // rows
+        midpoint = (1 / bands) ** (1 / rows)
+        if midpoint > threshold:
+            continue
+        score = threshold - midpoint
+        if best is None or score < best[0]:
+            best = (score, bands, rows)
+    if best is None:
+        return NUM_PERM, 1
+    return best[1], best[2]
+
+
+def _engagement(post: Post) -> tuple[int, int]:
+    return (post.likes + post.comments + post.shares, post.views)
+
+
+# ------------------ Collapsing ------------------
+
+
+def collapse_near_duplicates(posts: List[Post], threshold: float = DEFAULT_THRESHOLD) -> List[Post]:
+    """Return **posts** with near-duplicates merged into their best copy.
+
+    Order of the surviving posts follows their first appearance in **posts**.
+    Merged copies are appended to the survivor's ``siblings``.
+    """
+    if len(posts) < 2 or threshold > 1:
+        return list(posts)
+
+    n = len(posts)
+    parent = list(range(n))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i: int, j: int) -> None:
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+
+    # Exact media matches
+    by_media: dict[str, int] = {}
+    for i, post in enumerate(posts):
+        key = media_key(post)
+        if key is None:
+            continue
+        if key in by_media:
+            union(by_media[key], i)
+        else:
+            by_media[key] = i
+
+    # Caption LSH
+    bands, rows = _band_layout(threshold)
+    signatures = [minhash(caption_shingles(p.text)) for p in posts]
+    buckets: dict[tuple[int, tuple[int, ...]], list[int]] = defaultdict(list)
+    for i, sig in enumerate(signatures):
+        if not sig:
+            continue
+        for b in range(bands):
+            buckets[(b, sig[b * rows : (b + 1) * rows])].append(i)
+
+    checked: set[tuple[int, int]] = set()
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        for pos, i in enumerate(members):
+            for j in members[pos + 1 :]:
+                if (i, j) in checked or find(i) == find(j):
+                    continue
+                checked.add((i, j))
+                agree = sum(1 for x, y in zip(signatures[i], signatures[j]) if x == y)
+                if agree / NUM_PERM >= threshold:
+                    union(i, j)
+
+    clusters: dict[int, list[int]] = defaultdict(list)
+    for i in range(n):
+        clusters[find(i)].append(i)
+
+    survivors: list[tuple[int, Post]] = []
+    for members in clusters.values():
+        best = max(members, key=lambda i: _engagement(posts[i]))
+        keeper = posts[best]
+        for i in members:
+            if i != best:
+                keeper.siblings.append(posts[i].doc_id)
+                keeper.siblings.extend(posts[i].siblings)
+        survivors.append((min(members), keeper))
+
+    survivors.sort(key=lambda item: item[0])
+    return [post for _, post in survivors]
@@ -0,0 +1,229 @@
+"""Content-addressed, multi-resolution city polygon store.
+
+City boundaries used to ride along on the status document as a raw GeoJSON
+string, so every ``/api/status`` poll shipped the full-detail outline. Now a
+polygon is stored once under the SHA-256 of its canonical geometry, with
+precomputed levels of detail:
+
+* one level per zoom in ``ZOOM_LEVELS`` – Douglas-Peucker simplified to
+  about one screen pixel at that zoom, coordinates rounded to the matching
+  precision;
+* ``full`` – unsimplified, rounded to 6 decimals (~10 cm).
+
+The status document only carries a small ``cityPolygonRef``
+(``{"id", "levels", "bbox"}``); clients fetch
+``/api/polygons/{id}/{level}``, which never changes and can be cached
+forever.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import math
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+ZOOM_LEVELS = (4, 8, 12)
+FULL = "full"
+FULL_DECIMALS = 6
+# Firestore documents are capped at 1 MiB; leave room for the other levels.
+MAX_FULL_BYTES = 600_000
+
+Point = List[float]
+Ring = List[Point]
+
+
+# ------------------ Simplification ------------------
+
+
+def tolerance_for_zoom(zoom: int) -> float:
+    """Degrees spanned by one pixel of a 256px Web Mercator tile at **zoom**."""
+    return 360.0 / (256 * 2**zoom)
+
+
+def decimals_for_tolerance(tol: float) -> int:
+    return max(0, math.ceil(-math.log10(tol / 4)))
+
+
+def douglas_peucker(points: Sequence[Point], tol: float, lng_scale: float = 1.0) -> Ring:
+    """Iterative Douglas-Peucker; **lng_scale** (cos latitude) keeps tolerance isotropic."""
+    n = len(points)
+    if n < 3:
+        return [list(p) for p in points]
+    keep = [False] * n
+    keep[0] = keep[-1] = True
+    tol2 = tol * tol
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        ax, ay = points[first][0] * lng_scale, points[first][1]
+        bx, by = points[last][0] * lng_scale, points[last][1]
+        dx, dy = bx - ax, by - ay
+        seg2 = dx * dx + dy * dy
+        max_d2, index = -1.0, first
+        for i in range(first + 1, last):
+            px, py = points[i][0] * lng_scale, points[i][1]
+            if seg2 == 0:
+                d2 = (px - ax) ** 2 + (py - ay) ** 2
+            else:
+                t = ((px - ax) * dx + (py - ay) * dy) / seg2
+                t = min(max(t, 0.0), 1.0)
+                d2 = (px - ax - t * dx) ** 2 + (py - ay - t * dy) ** 2
+            if d2 > max_d2:
+                max_d2, index = d2, i
+        if max_d2 > tol2:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [list(points[i]) for i in range(n) if keep[i]]
+
+
+def _quantize_ring(ring: Ring, decimals: int) -> Ring:
+    out: Ring = []
+    for lng, lat, *_ in ring:
+        p = [round(lng, decimals), round(lat, decimals)]
+        if not out or out[-1] != p:
+            out.append(p)
+    return out
+
+
+def _simplify_polygon(rings: List[Ring], tol: Optional[float], decimals: int, lng_scale: float) -> List[Ring]:
+    result = []
+    for idx, ring in enumerate(rings):
+        simplified = douglas_peucker(ring, tol, lng_scale) if tol else ring
+        simplified = _quantize_ring(simplified, decimals)
+        if len(simplified) < 4:
+            if idx == 0:
+                # Outer ring collapsed: keep the coarsest valid shape instead.
+                simplified = _quantize_ring(ring, decimals)
+                if len(simplified) < 4:
+                    return []
+            else:
+                continue  # drop holes smaller than a pixel
+        if simplified[0] != simplified[-1]:
+            simplified.append(simplified[0])
+        result.append(simplified)
+    return result
+
+
+def simplify_geometry(geom: dict[str, Any], tol: Optional[float], decimals: int) -> dict[str, Any]:
+    bbox = geometry_bbox(geom)
+    lng_scale = math.cos(math.radians((bbox[1] + bbox[3]) / 2)) if bbox else 1.0
+    if geom["type"] == "Polygon":
+        return {"type": "Polygon", "coordinates": _simplify_polygon(geom["coordinates"], tol, decimals, lng_scale)}
+    polys = [_simplify_polygon(p, tol, decimals, lng_scale) for p in geom["coordinates"]]
+    return {"type": "MultiPolygon", "coordinates": [p for p in polys if p]}
+
+
+# ------------------ Parsing ------------------
+
+
+def extract_geometry(raw: Any) -> dict[str, Any]:
+    """Polygon/MultiPolygon geometry from a GeoJSON string, Feature or FeatureCollection."""
+    doc = json.loads(raw) if isinstance(raw, str) else raw
+    if not isinstance(doc, dict):
+        raise ValueError(f"Expected a GeoJSON object, got {type(doc).__name__}")
+    if doc.get("type") == "FeatureCollection":
+        polys: list = []
+        for feature in doc.get("features", []):
+            geom = extract_geometry(feature)
+            polys.extend([geom["coordinates"]] if geom["type"] == "Polygon" else geom["coordinates"])
+        if not polys:
+            raise ValueError("FeatureCollection has no polygons")
+        return {"type": "MultiPolygon", "coordinates": polys} if len(polys) > 1 else {"type": "Polygon", "coordinates": polys[0]}
+    if doc.get("type") == "Feature":
+        return extract_geometry(doc.get("geometry") or {})
+    if doc.get("type") in ("Polygon", "MultiPolygon"):
+        return {"type": doc["type"], "coordinates": doc["coordinates"]}
+    raise ValueError(f"Unsupported GeoJSON type {doc.get('type')!r}")
+
+
+def geometry_bbox(geom: dict[str, Any]) -> List[float]:
+    rings = geom["coordinates"] if geom["type"] == "Polygon" else [r for p in geom["coordinates"] for r in p]
+    lngs = [pt[0] for ring in rings for pt in ring]
+    lats = [pt[1] for ring in rings for pt in ring]
+    if not lngs:
+        return []
+    return [min(lngs), min(lats), max(lngs), max(lats)]
+
+
+def _dumps(obj: Any) -> str:
+    return json.dumps(obj, separators=(",", ":"))
+
+
+# ------------------ Store ------------------
+
+
+def build_polygon_doc(raw: Any) -> tuple[str, dict[str, Any]]:
+    """Return ``(polygon_id, document)`` with every level precomputed."""
+    geom = extract_geometry(raw)
+    full = simplify_geometry(geom, None, FULL_DECIMALS)
+    full_json = _dumps(full)
+    polygon_id = hashlib.sha256(full_json.encode()).hexdigest()[:24]
+
+    levels: dict[str, str] = {}
+    for zoom in ZOOM_LEVELS:
+        tol = tolerance_for_zoom(zoom)
+        levels[str(zoom)] = _dumps(simplify_geometry(geom, tol, decimals_for_tolerance(tol)))
+    if len(full_json) <= MAX_FULL_BYTES:
+        levels[FULL] = full_json
+    else:
+        logger.warning("Polygon %s full level is %d bytes; serving zoom levels only", polygon_id, len(full_json))
+
+    # Levels are JSON strings: Firestore cannot store nested arrays.
+    doc = {
+        "levels": levels,
+        "bbox": [round(v, FULL_DECIMALS) for v in geometry_bbox(full)],
+        "createdAt": datetime.now(timezone.utc).isoformat(),
+    }
+    return polygon_id, doc
+
+
+def reference(polygon_id: str, doc: dict[str, Any]) -> dict[str, Any]:
+    """The compact pointer stored on the status document."""
+    return {"id": polygon_id, "levels": list(doc["levels"]), "bbox": doc["bbox"]}
+
+
+class PolygonStore:
+    """Writes polygons through the repository and caches them in memory.
+
+    Entries are immutable (content-addressed), so the cache never needs
+    invalidation – only an LRU bound.
+    """
+
+    def __init__(self, repo: Any, max_entries: int = 64) -> None:
+        self.repo = repo
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[str, dict[str, Any]]" = OrderedDict()
+
+    def put(self, raw: Any) -> dict[str, Any]:
+        polygon_id, doc = build_polygon_doc(raw)
+        if self.get(polygon_id) is None:
+            self.repo.save_polygon(polygon_id, doc)
+            self._remember(polygon_id, doc)
+        return reference(polygon_id, self._cache.get(polygon_id, doc))
+
+    def get(self, polygon_id: str) -> Optional[dict[str, Any]]:
+        doc = self._cache.get(polygon_id)
+        if doc is not None:
+            self._cache.move_to_end(polygon_id)
+            return doc
+        doc = self.repo.get_polygon(polygon_id)
+        if doc is not None:
+            self._remember(polygon_id, doc)
+        return doc
+
+    def level(self, polygon_id: str, level: str) -> Optional[str]:
+        doc = self.get(polygon_id)
+        return doc["levels"].get(level) if doc else None
+
+    def _remember(self, polygon_id: str, doc: dict[str, Any]) -> None:
+        self._cache[polygon_id] = doc
+        self._cache.move_to_end(polygon_id)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
@@ -0,0 +1,233 @@
+"""Append-only archive of every normalised post a scrape fetches.
+
+``save_city_posts`` keeps only the current top 100 per city; everything else
+the actors returned used to be discarded. The archive keeps it all:
+
+* **Layout** – ``<POST_ARCHIVE_DIR>/<city_id>/<YYYY-MM-DD>.jsonl.gz``, one
+  file per city per (UTC) day of the post's timestamp. Reading one city's
+  history touches only that city's directory.
+* **Format** – gzip-compressed JSON lines (``Post.to_dict()`` plus
+  ``cityId``/``archivedAt``). Each flush appends a new gzip member, which
+  standard readers treat as one continuous stream.
+* **Append-only** – records are never rewritten. A post is re-archived only
+  when its engagement changed since it was last written, so the archive
+  also holds engagement snapshots over time.
+* **Off the request path** – ``submit`` only enqueues; a background thread
+  batches records (``POST_ARCHIVE_FLUSH_SEC`` / ``POST_ARCHIVE_BATCH``) and
+  writes them.
+
+``iter_city_records`` / ``iter_records`` stream records back one line at a
+time for export and analytics.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+import queue
+import threading
+from collections import OrderedDict, defaultdict
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+
+from backend.posts import Post
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARCHIVE_DIR = Path(__file__).resolve().parent / "archive"
+SUFFIX = ".jsonl.gz"
+MAX_TRACKED_POSTS = 200_000
+
+Record = dict[str, Any]
+
+
+def _day(record: Record) -> str:
+    return str(record.get("timestamp", ""))[:10] or "unknown"
+
+
+def _signature(post: Post) -> tuple[int, int, int, int]:
+    return (post.likes, post.comments, post.shares, post.views)
+
+
+class PostArchive:
+    """Background, batched writer for the per-city/day archive."""
+
+    def __init__(
+        self,
+        directory: Path = DEFAULT_ARCHIVE_DIR,
+        flush_interval: float = 5.0,
+        max_batch: int = 1000,
+    ) -> None:
+        self.directory = Path(directory)
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        # (city_id, doc_id) -> engagement last archived; only touched by the writer thread
+        self._last: "OrderedDict[tuple[int, str], tuple[int, int, int, int]]" = OrderedDict()
+
+    # ------------------ Writing ------------------
+
+    def submit(self, city_id: int, posts: Iterable[Post]) -> None:
+        """Queue **posts** for archiving; returns immediately."""
+        posts = list(posts)
+        if not posts:
+            return
+        self._ensure_thread()
+        self._queue.put((city_id, posts, datetime.now(timezone.utc).isoformat()))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything submitted so far is on disk."""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _ensure_thread(self) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="post-archive", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch: list[tuple[int, list[Post], str]] = []
+            waiters: list[threading.Event] = []
+            stop = False
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            # Drain whatever else is already queued, up to the batch size.
+            while True:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if stop or sum(len(posts) for _, posts, _ in batch) >= self.max_batch:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            try:
+                self._write(batch)
+            except Exception:
+                logger.exception("Failed to write post archive batch")
+            for event in waiters:
+                event.set()
+            if stop:
+                return
+
+    def _write(self, batch: list[tuple[int, list[Post], str]]) -> None:
+        files: dict[Path, list[str]] = defaultdict(list)
+        for city_id, posts, archived_at in batch:
+            for post in posts:
+                key = (city_id, post.doc_id)
+                sig = _signature(post)
+                if self._last.get(key) == sig:
+                    continue
+                self._last[key] = sig
+                self._last.move_to_end(key)
+                record = post.to_dict() | {"cityId": city_id, "archivedAt": archived_at}
+                path = self.directory / str(city_id) / f"{_day(record)}{SUFFIX}"
+                files[path].append(json.dumps(record, separators=(",", ":"), default=str) + "\n")
+
+        while len(self._last) > MAX_TRACKED_POSTS:
+            self._last.popitem(last=False)
+
+        for path, lines in files.items():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Mode "a" appends a new gzip member; readers see one stream.
+            with gzip.open(path, "at", encoding="utf-8") as fh:
+                fh.writelines(lines)
+        if files:
+            logger.debug("Archived %d records into %d files", sum(map(len, files.values())), len(files))
+
+    # ------------------ Reading ------------------
+
+    def cities(self) -> list[int]:
+        if not self.directory.exists():
+            return []
+        return sorted(int(p.name) for p in self.directory.iterdir() if p.is_dir() and p.name.isdigit())
+
+    def iter_city_records(
+        self,
+        city_id: int,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        latest: bool = False,
+    ) -> Iterator[Record]:
+        """Stream one city's records, oldest day first, within ``[start, end]``.
+
+        With **latest** only the newest snapshot of each post is yielded; this
+        buffers a single day file at a time.
+        """
+        city_dir = self.directory / str(city_id)
+        if not city_dir.exists():
+            return
+        for path in sorted(city_dir.glob(f"*{SUFFIX}")):
+            day = path.name[: -len(SUFFIX)]
+            if start is not None and day < start.isoformat():
+                continue
+            if end is not None and day > end.isoformat():
+                continue
+            records = _read_file(path)
+            if latest:
+                newest: dict[str, Record] = {}
+                for rec in records:
+                    newest[f"{rec.get('platform')}_{rec.get('postId')}"] = rec
+                yield from newest.values()
+            else:
+                yield from records
+
+    def iter_records(
+        self,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        latest: bool = False,
+    ) -> Iterator[Record]:
+        """Stream every city's records, city by city."""
+        for city_id in self.cities():
+            yield from self.iter_city_records(city_id, start, end, latest)
+
+
+def _read_file(path: Path) -> Iterator[Record]:
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+    except EOFError:
+        # A member still being appended by the writer; the rest arrives next read.
+        logger.debug("Truncated archive member in %s", path)
+
+
+def archive_from_env() -> Optional[PostArchive]:
+    """Process-wide archive, or None when ``POST_ARCHIVE_ENABLED`` is off."""
+    if os.getenv("POST_ARCHIVE_ENABLED", "1").lower() in ("0", "false", "no"):
+        return None
+    directory = os.getenv("POST_ARCHIVE_DIR")
+    return PostArchive(
+        directory=Path(directory) if directory else DEFAULT_ARCHIVE_DIR,
+        flush_interval=float(os.getenv("POST_ARCHIVE_FLUSH_SEC", 5)),
+        max_batch=int(os.getenv("POST_ARCHIVE_BATCH", 1000)),
+    )
+
+
+archive = archive_from_env()
@@ -0,0 +1,196 @@
+"""Full-text search over scraped posts (SQLite FTS5).
+
+Every post saved by a scrape is upserted into a local SQLite database
+(``POST_SEARCH_DB``, default ``backend/search.db``):
+
+* ``posts`` – one row per ``(cityId, platform_postId)`` with filter columns
+  and the stored post document as JSON;
+* ``posts_fts`` – an external-content FTS5 table over caption and username,
+  kept in sync by triggers, so an upsert re-indexes only that post.
+
+The index is cumulative: posts that later drop out of a city's top 100 stay
+searchable. Queries are ranked by BM25 (or by recency / engagement score),
+filtered by city and platform and paginated with ``limit``/``offset``.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from backend.posts import Post
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = Path(__file__).resolve().parent / "search.db"
+MAX_LIMIT = 100
+
+SORTS = {
+    "relevance": "bm25(posts_fts, 1.0, 0.3)",
+    "recent": "p.timestamp DESC",
+    "score": "p.score DESC",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    id INTEGER PRIMARY KEY,
+    doc_key TEXT NOT NULL UNIQUE,
+    city_id INTEGER NOT NULL,
+    platform TEXT NOT NULL,
+    timestamp TEXT,
+    score REAL,
+    caption TEXT,
+    username TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS posts_city ON posts(city_id, platform);
+CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+    caption, username,
+    content='posts', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS posts_ai AFTER INSERT ON posts BEGIN
+    INSERT INTO posts_fts(rowid, caption, username) VALUES (new.id, new.caption, new.username);
+END;
+CREATE TRIGGER IF NOT EXISTS posts_ad AFTER DELETE ON posts BEGIN
+    INSERT INTO posts_fts(posts_fts, rowid, caption, username) VALUES ('delete', old.id, old.caption, old.username);
+END;
+CREATE TRIGGER IF NOT EXISTS posts_au AFTER UPDATE ON posts BEGIN
+    INSERT INTO posts_fts(posts_fts, rowid, caption, username) VALUES ('delete', old.id, old.caption, old.username);
+    INSERT INTO posts_fts(rowid, caption, username) VALUES (new.id, new.caption, new.username);
+END;
+"""
+
+_UPSERT = """
+INSERT INTO posts (doc_key, city_id, platform, timestamp, score, caption, username, data)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(doc_key) DO UPDATE SET
+    timestamp = excluded.timestamp,
+    score = excluded.score,
+    caption = excluded.caption,
+    username = excluded.username,
+    data = excluded.data
+"""
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_query(text: str) -> Optional[str]:
+    """Turn free text into a safe FTS5 query: all words required, last one as a prefix."""
+    tokens = _TOKEN_RE.findall(text.lower())
+    if not tokens:
+        return None
+    quoted = [f'"{t}"' for t in tokens]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+class PostSearchIndex:
+    def __init__(self, path: Path = DEFAULT_DB_PATH) -> None:
+        self.path = Path(path)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        with self._write_lock:
+            self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ------------------ Indexing ------------------
+
+    def add(self, city_id: int, posts: Iterable[Post]) -> int:
+        """Upsert **posts** for **city_id**; returns the number of rows written."""
+        rows = [
+            (
+                f"{city_id}:{p.doc_id}",
+                city_id,
+                p.platform,
+                p.timestamp.isoformat() if p.timestamp else None,
+                p.score,
+                p.text,
+                p.username or "",
+                json.dumps(p.to_dict(), separators=(",", ":"), default=str),
+            )
+            for p in posts
+        ]
+        return self.add_rows(rows)
+
+    def add_rows(self, rows: list[tuple]) -> int:
+        if not rows:
+            return 0
+        with self._write_lock:
+            conn = self._conn()
+            with conn:
+                conn.executemany(_UPSERT, rows)
+        return len(rows)
+
+    # ------------------ Querying ------------------
+
+    def search(
+        self,
+        q: str,
+        city_id: Optional[int] = None,
+        platform: Optional[str] = None,
+        sort: str = "relevance",
+        limit: int = 20,
+        offset: int = 0,
+    ) -> dict[str, Any]:
+        """Ranked page of matches plus ``nextOffset`` (None on the last page)."""
+        match = fts_query(q)
+        limit = min(max(limit, 1), MAX_LIMIT)
+        if match is None:
+            return {"results": [], "nextOffset": None}
+
+        where = ["posts_fts MATCH ?"]
+        params: list[Any] = [match]
+        if city_id is not None:
+            where.append("p.city_id = ?")
+            params.append(city_id)
+        if platform:
+            where.append("p.platform = ?")
+            params.append(platform)
+
+        sql = (
+            "SELECT p.city_id, p.data, p.doc_key FROM posts_fts "
+            "JOIN posts p ON p.id = posts_fts.rowid "
+            f"WHERE {' AND '.join(where)} "
+            f"ORDER BY {SORTS.get(sort, SORTS['relevance'])} "
+            "LIMIT ? OFFSET ?"
+        )
+        # Fetch one extra row to know whether another page exists.
+        rows = self._conn().execute(sql, [*params, limit + 1, offset]).fetchall()
+        results = [
+            json.loads(data) | {"id": doc_key.split(":", 1)[1], "cityId": cid}
+            for cid, data, doc_key in rows[:limit]
+        ]
+        return {"results": results, "nextOffset": offset + limit if len(rows) > limit else None}
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT count(*) FROM posts").fetchone()[0]
+
+
+def index_from_env() -> Optional[PostSearchIndex]:
+    if os.getenv("POST_SEARCH_ENABLED", "1").lower() in ("0", "false", "no"):
+        return None
+    path = os.getenv("POST_SEARCH_DB")
+    try:
+        return PostSearchIndex(Path(path) if path else DEFAULT_DB_PATH)
+    except sqlite3.Error as exc:  # e.g. SQLite built without FTS5
+        logger.warning("Post search disabled: %s", exc)
+        return None
+
+
+index = index_from_env()
@@ -0,0 +1,235 @@
+"""Compact, platform-independent representation of a scraped social post.
+
+The Apify actors for Instagram, TikTok and X/Twitter each emit large payloads
+with their own field names (``timestamp`` vs ``createTimeISO`` vs
+``createdAt``, ``likesCount`` vs ``diggCount`` vs ``likeCount`` …). Every raw
+item is normalised **once**, right after the actor returns, into a slotted
+:class:`Post`. Everything downstream – date filtering, keyword matching,
+deduplication, persistence – works on these records only, and only
+:meth:`Post.to_dict` is written to Firestore.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+INSTAGRAM = "instagram"
+TIKTOK = "tiktok"
+TWITTER = "twitter"
+
+# Classic Twitter API date format, e.g. "Fri Nov 24 17:49:36 +0000 2023".
+_TWITTER_TIME_FMT = "%a %b %d %H:%M:%S %z %Y"
+
+
+@dataclass(slots=True)
+class Post:
+    """One normalised social post."""
+
+    platform: str
+    post_id: str
+    timestamp: datetime  # timezone-aware UTC
+    text: str = ""
+    url: Optional[str] = None
+    username: Optional[str] = None
+    media_url: Optional[str] = None
+    likes: int = 0
+    comments: int = 0
+    shares: int = 0
+    views: int = 0
+    # ranking score (see backend.ranking); persisted so reads needn't re-rank
+    score: float = 0.0
+    # doc ids of near-duplicate copies collapsed into this post
+    siblings: List[str] = field(default_factory=list)
+
+    @property
+    def key(self) -> tuple[str, str]:
+        """Identity across platforms – used for deduplication."""
+        return (self.platform, self.post_id)
+
+    @property
+    def doc_id(self) -> str:
+        """Stable Firestore document id, so re-saving a post overwrites it."""
+        return f"{self.platform}_{self.post_id}"
+
+    def to_dict(self) -> dict[str, Any]:
+        """Compact document persisted to Firestore (camelCase, like other docs)."""
+        doc: dict[str, Any] = {
+            "platform": self.platform,
+            "postId": self.post_id,
+            "timestamp": self.timestamp.isoformat(),
+            "caption": self.text,
+            "likeCount": self.likes,
+            "commentCount": self.comments,
+            "shareCount": self.shares,
+            "viewCount": self.views,
+            "score": round(self.score, 6),
+        }
+        if self.url:
+            doc["url"] = self.url
+        if self.username:
+            doc["username"] = self.username
+        if self.media_url:
+            doc["mediaUrl"] = self.media_url
+        if self.siblings:
+            doc["siblings"] = list(self.siblings)
+        return doc
+
+    @classmethod
+    def from_dict(cls, doc: dict[str, Any]) -> "Post":
+        """Inverse of :meth:`to_dict`."""
+        return cls(
+            platform=doc["platform"],
+            post_id=str(doc["postId"]),
+            timestamp=parse_timestamp(doc["timestamp"]) or datetime.fromtimestamp(0, timezone.utc),
+            text=doc.get("caption") or "",
+            url=doc.get("url"),
+            username=doc.get("username"),
+            media_url=doc.get("mediaUrl"),
+            likes=_int(doc.get("likeCount")),
+            comments=_int(doc.get("commentCount")),
+            shares=_int(doc.get("shareCount")),
+            views=_int(doc.get("viewCount")),
+            score=float(doc.get("score") or 0.0),
+            siblings=list(doc.get("siblings") or []),
+        )
+
+
+# ------------------ Parsing helpers ------------------
+
+
+def parse_timestamp(raw: Any) -> Optional[datetime]:
+    """Parse ISO-8601, Twitter-style or epoch timestamps into aware UTC."""
+    if raw is None or raw == "":
+        return None
+    try:
+        if isinstance(raw, datetime):
+            ts = raw
+        elif isinstance(raw, (int, float)):
+            # Epoch seconds; some actors emit milliseconds.
+            ts = datetime.fromtimestamp(raw / 1000 if raw > 1e11 else raw, timezone.utc)
+        elif isinstance(raw, str):
+            try:
+                ts = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+            except ValueError:
+                ts = datetime.strptime(raw, _TWITTER_TIME_FMT)
+        else:
+            return None
+    except (ValueError, OverflowError, OSError):
+        return None
+
+    if ts.tzinfo is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc)
+
+
+def _int(value: Any) -> int:
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _first(item: dict[str, Any], *keys: str) -> Any:
+    for key in keys:
+        value = item.get(key)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+# ------------------ Platform normalisers ------------------
+
+
+def _from_instagram(item: dict[str, Any]) -> Optional[Post]:
+    post_id = _first(item, "id", "shortCode")
+    ts = parse_timestamp(item.get("timestamp"))
+    if not post_id or not ts:
+        return None
+    return Post(
+        platform=INSTAGRAM,
+        post_id=str(post_id),
+        timestamp=ts,
+        text=_first(item, "caption", "alt") or "",
+        url=item.get("url"),
+        username=item.get("ownerUsername"),
+        media_url=_first(item, "displayUrl", "thumbnailUrl"),
+        likes=_int(item.get("likesCount")),
+        comments=_int(item.get("commentsCount")),
+        views=_int(_first(item, "videoPlayCount", "videoViewCount")),
+    )
+
+
+def _from_tiktok(item: dict[str, Any]) -> Optional[Post]:
+    post_id = item.get("id")
+    ts = parse_timestamp(_first(item, "createTimeISO", "createTime"))
+    if not post_id or not ts:
+        return None
+    author = item.get("authorMeta") or {}
+    video = item.get("videoMeta") or {}
+    return Post(
+        platform=TIKTOK,
+        post_id=str(post_id),
+        timestamp=ts,
+        text=item.get("text") or "",
+        url=item.get("webVideoUrl"),
+        username=author.get("name"),
+        media_url=_first(video, "coverUrl", "originalCoverUrl"),
+        likes=_int(item.get("diggCount")),
+        comments=_int(item.get("commentCount")),
+        shares=_int(item.get("shareCount")),
+        views=_int(item.get("playCount")),
+    )
+
+
+def _from_twitter(item: dict[str, Any]) -> Optional[Post]:
+    post_id = _first(item, "id", "id_str")
+    ts = parse_timestamp(_first(item, "createdAt", "created_at"))
+    if not post_id or not ts:
+        return None
+    author = item.get("author") or {}
+    media = (item.get("extendedEntities") or {}).get("media") or []
+    media_url = media[0].get("media_url_https") if media else None
+    return Post(
+        platform=TWITTER,
+        post_id=str(post_id),
+        timestamp=ts,
+        text=_first(item, "fullText", "text") or "",
+        url=_first(item, "url", "twitterUrl"),
+        username=author.get("userName"),
+        media_url=media_url,
+        likes=_int(item.get("likeCount")),
+        comments=_int(item.get("replyCount")),
+        shares=_int(item.get("retweetCount")) + _int(item.get("quoteCount")),
+        views=_int(item.get("viewCount")),
+    )
+
+
+_NORMALISERS: dict[str, Callable[[dict[str, Any]], Optional[Post]]] = {
+    INSTAGRAM: _from_instagram,
+    TIKTOK: _from_tiktok,
+    TWITTER: _from_twitter,
+}
+
+
+def normalize_items(platform: str, items: Iterable[dict[str, Any]]) -> List[Post]:
+    """Convert raw actor items for **platform** into :class:`Post` records.
+
+    Items without an id or a parseable timestamp are dropped (logged at debug).
+    """
+    normalise = _NORMALISERS[platform]
+    posts: List[Post] = []
+    skipped = 0
+    for item in items:
+        post = normalise(item) if isinstance(item, dict) else None
+        if post is None:
+            skipped += 1
+            continue
+        posts.append(post)
+    if skipped:
+        logger.debug("Dropped %d unparseable %s items", skipped, platform)
+    return posts
@@ -0,0 +1,151 @@
+"""On-demand profiling for a running server (admin endpoints).
+
+* ``sample_stacks`` – a sampling profiler: a temporary thread wakes every
+  ``interval`` seconds, reads every other thread's Python stack from
+  ``sys._current_frames()`` and counts identical stacks. The result is in
+  the collapsed format (``thread;outer;...;inner count`` per line) read by
+  flamegraph.pl, speedscope and inferno.
+* ``allocation_diff`` – starts ``tracemalloc`` for a window, snapshots at
+  both ends and returns the top allocation sites by growth.
+
+Nothing runs between requests: no thread, no trace hook, no tracemalloc.
+One session of each kind at a time; callers get ``ProfilerBusy`` otherwise.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Optional
+
+MAX_SECONDS = 120.0
+MIN_INTERVAL = 0.001
+MAX_STACK_DEPTH = 128
+
+_profile_lock = threading.Lock()
+_tracemalloc_lock = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    """A session of the same kind is already running."""
+
+
+def _frame_label(frame: Any) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def _collapse(frame: Any) -> list[str]:
+    labels: list[str] = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+def sample_stacks(seconds: float, interval: float = 0.005, include_idle: bool = False) -> dict[str, Any]:
+    """Sample all threads for **seconds**; returns collapsed stacks and counts.
+
+    Blocking – run it in a worker thread. Stacks parked in a thread-pool,
+    queue or selector wait are dropped unless **include_idle**; they would
+    otherwise dominate the output.
+    """
+    seconds = min(max(seconds, 0.01), MAX_SECONDS)
+    interval = max(interval, MIN_INTERVAL)
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running")
+    try:
+        me = threading.get_ident()
+        counts: Counter[str] = Counter()
+        samples = 0
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = _collapse(frame)
+                if not include_idle and _is_idle(stack):
+                    continue
+                counts[";".join([names.get(ident, str(ident)), *stack])] += 1
+            samples += 1
+            time.sleep(interval)
+    finally:
+        _profile_lock.release()
+
+    collapsed = "\n".join(f"{stack} {n}" for stack, n in counts.most_common())
+    return {"samples": samples, "seconds": seconds, "intervalSec": interval, "collapsed": collapsed}
+
+
+# Innermost frames of threads parked waiting for work.
+_IDLE_LEAVES = (
+    "wait (threading.py",
+    "select (selectors.py",
+    "_worker (thread.py",
+    "get (queue.py",
+    "_wait_for_tstate_lock (threading.py",
+)
+
+
+def _is_idle(stack: list[str]) -> bool:
+    return bool(stack) and stack[-1].startswith(_IDLE_LEAVES)
+
+
+def allocation_diff(seconds: float, limit: int = 25, frames: int = 1, group_by: str = "lineno") -> dict[str, Any]:
+    """Trace allocations for **seconds** and return the top sites by growth.
+
+    Blocking – run it in a worker thread. If tracemalloc was already
+    tracing (e.g. ``PYTHONTRACEMALLOC``), it is left running afterwards.
+    """
+    seconds = min(max(seconds, 0.1), MAX_SECONDS)
+    if not _tracemalloc_lock.acquire(blocking=False):
+        raise ProfilerBusy("An allocation trace is already running")
+    started_here = False
+    try:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(max(1, frames))
+            started_here = True
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ]
+        before = tracemalloc.take_snapshot().filter_traces(filters)
+        time.sleep(seconds)
+        after = tracemalloc.take_snapshot().filter_traces(filters)
+        traced, peak = tracemalloc.get_traced_memory()
+    finally:
+        if started_here:
+            tracemalloc.stop()
+        _tracemalloc_lock.release()
+
+    stats = after.compare_to(before, group_by)
+    top = [
+        {
+            "location": _stat_location(stat.traceback),
+            "sizeDiffKiB": round(stat.size_diff / 1024, 1),
+            "countDiff": stat.count_diff,
+            "sizeKiB": round(stat.size / 1024, 1),
+            "count": stat.count,
+        }
+        for stat in stats[:limit]
+    ]
+    return {
+        "seconds": seconds,
+        "groupBy": group_by,
+        "totalDiffKiB": round(sum(s.size_diff for s in stats) / 1024, 1),
+        "tracedKiB": round(traced / 1024, 1),
+        "peakKiB": round(peak / 1024, 1),
+        "top": top,
+    }
+
+
+def _stat_location(traceback: Optional[tracemalloc.Traceback]) -> str:
+    if not traceback:
+        return "?"
+    return " <- ".join(f"{frame.filename}:{frame.lineno}" for frame in reversed(list(traceback)))
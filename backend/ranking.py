@@ -0,0 +1,104 @@
+"""Engagement ranking for scraped posts.
+
+A *scorer* is any callable ``(post, now) -> float``. The default
+:class:`EngagementScorer` combines likes, comments, shares and views with
+per-platform weights (a TikTok "play" is far cheaper than an Instagram like),
+compresses the result logarithmically so one viral post doesn't dwarf the
+rest, and applies exponential time decay with a configurable half-life.
+
+:func:`top_k` consumes posts as a stream and keeps only the best *k* in a
+bounded min-heap (O(n log k) time, O(k) memory) instead of sorting every
+candidate. The computed score is stored on each post (``Post.score``) and
+persisted, so readers can order by it without re-ranking.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Iterable, List, Optional
+
+from backend.posts import INSTAGRAM, TIKTOK, TWITTER, Post
+
+Scorer = Callable[[Post, datetime], float]
+
+DEFAULT_HALF_LIFE_HOURS = 24.0
+
+
+@dataclass(frozen=True, slots=True)
+class PlatformWeights:
+    """Value of one interaction of each kind, relative to one like."""
+
+    likes: float = 1.0
+    comments: float = 3.0
+    shares: float = 5.0
+    views: float = 0.0
+    # Multiplier applied after weighting so platforms with inflated
+    # counts (TikTok) compete fairly with smaller ones (X).
+    scale: float = 1.0
+
+
+DEFAULT_PLATFORM_WEIGHTS: dict[str, PlatformWeights] = {
+    INSTAGRAM: PlatformWeights(likes=1.0, comments=3.0, shares=5.0, views=0.01, scale=1.0),
+    TIKTOK: PlatformWeights(likes=1.0, comments=3.0, shares=4.0, views=0.005, scale=0.5),
+    TWITTER: PlatformWeights(likes=1.0, comments=2.0, shares=4.0, views=0.001, scale=2.0),
+}
+
+
+@dataclass(slots=True)
+class EngagementScorer:
+    """Per-platform weighted engagement with exponential time decay."""
+
+    half_life_hours: float = DEFAULT_HALF_LIFE_HOURS
+    weights: dict[str, PlatformWeights] = field(default_factory=lambda: dict(DEFAULT_PLATFORM_WEIGHTS))
+
+    def __call__(self, post: Post, now: datetime) -> float:
+        w = self.weights.get(post.platform) or PlatformWeights()
+        engagement = (
+            post.likes * w.likes + post.comments * w.comments + post.shares * w.shares + post.views * w.views
+        ) * w.scale
+        base = math.log1p(max(engagement, 0.0))
+        if self.half_life_hours <= 0:
+            return base
+        age_hours = max((now - post.timestamp).total_seconds(), 0.0) / 3600
+        return base * 0.5 ** (age_hours / self.half_life_hours)
+
+
+def default_scorer() -> EngagementScorer:
+    """Scorer configured from ``SOCIAL_SCORE_HALF_LIFE_HOURS`` (env)."""
+    half_life = float(os.getenv("SOCIAL_SCORE_HALF_LIFE_HOURS", DEFAULT_HALF_LIFE_HOURS))
+    return EngagementScorer(half_life_hours=half_life)
+
+
+def top_k(
+    posts: Iterable[Post],
+    k: int,
+    scorer: Optional[Scorer] = None,
+    now: Optional[datetime] = None,
+) -> List[Post]:
+    """Return the **k** highest-scoring posts, best first.
+
+    Every post that passes through gets its ``score`` set. Ties keep the
+    earlier post.
+    """
+    if k <= 0:
+        return []
+    scorer = scorer or default_scorer()
+    now = now or datetime.now(timezone.utc)
+
+    # Min-heap of (score, -seq, post): the root is the weakest kept post. seq is
+    # unique, so tuple comparison never falls through to the Post itself.
+    heap: list[tuple[float, int, Post]] = []
+    for seq, post in enumerate(posts):
+        post.score = scorer(post, now)
+        entry = (post.score, -seq, post)
+        if len(heap) < k:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    heap.sort(reverse=True)
+    return [post for _, _, post in heap]
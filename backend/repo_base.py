@@ -0,0 +1,123 @@
+"""Repository interface and helpers shared by every backend.
+
+All backends return the same dict shapes (fields as stored in Firestore,
+``id`` merged in), so callers cannot tell them apart. Kept free of any
+store-specific imports so each backend can depend on it.
+"""
+
+from __future__ import annotations
+
+from typing import Any, List, Optional, Protocol
+
+from backend.posts import Post
+
+
+class Repository(Protocol):
+    def get_status(self) -> Optional[dict[str, Any]]: ...
+    def update_status(self, payload: dict[str, Any]) -> dict[str, Any]: ...
+
+    def list_cities(self) -> List[dict[str, Any]]: ...
+    def get_city(self, city_id: int) -> Optional[dict[str, Any]]: ...
+    def update_city(self, city_id: int, data: dict[str, Any]) -> dict[str, Any]: ...
+
+    def save_city_posts(self, city_id: int, posts: list[Post]) -> int: ...
+    def list_city_posts(self, city_id: int) -> list[dict[str, Any]]: ...
+
+    def get_settings(self) -> dict[str, Any]: ...
+    def update_settings(self, data: dict[str, Any]) -> dict[str, Any]: ...
+    def add_interval_decision(self, data: dict[str, Any]) -> None: ...
+
+    def list_merch(self) -> list[dict[str, Any]]: ...
+    def create_merch(self, data: dict[str, Any]) -> dict[str, Any]: ...
+    def update_merch(self, item_id: str, data: dict[str, Any]) -> dict[str, Any]: ...
+
+    def get_polygon(self, polygon_id: str) -> Optional[dict[str, Any]]: ...
+    def save_polygon(self, polygon_id: str, data: dict[str, Any]) -> None: ...
+
+    def claim_scrape_job(self, job: dict[str, Any], stale_before: str) -> dict[str, Any]: ...
+    def get_scrape_job(self, job_id: str) -> Optional[dict[str, Any]]: ...
+    def update_scrape_job(self, job_id: str, data: dict[str, Any]) -> None: ...
+
+    def get_sleep_flag(self) -> bool: ...
+    def set_sleep_flag(self, is_sleep: bool) -> bool: ...
+
+    def compute_journey(self) -> dict[str, Any]: ...
+
+
+# Same defaults as the Firestore settings doc.
+DEFAULT_SETTINGS: dict[str, Any] = {
+    "socialScrapeIntervalMin": 60,
+    "nearDuplicateThreshold": 0.7,
+    "scrapeActorBudget": 6,
+    "scrapeRecentDays": 3,
+    "adaptiveScrapeInterval": False,
+    "scrapeIntervalFloorMin": 5,
+    "scrapeIntervalCeilingMin": 240,
+    "scrapeBurstYield": 5,
+    "instagramUsername": "",
+    "twitterUsername": "",
+    "tiktokUsername": "",
+    "twitchUsername": "",
+    "youtubeUsername": "",
+}
+
+MAX_CITY_POSTS = 100
+
+
+def scrape_job_is_live(job: Optional[dict[str, Any]], stale_before: str) -> bool:
+    """Queued or running, and heartbeated at or after **stale_before** (UTC ISO).
+
+    ``claim_scrape_job`` lets a new job replace a city's active one only when
+    this is False, so a job orphaned by a dead worker stops blocking the city.
+    """
+    return (
+        job is not None
+        and job.get("status") in ("queued", "running")
+        and (job.get("updated_at") or "") >= stale_before
+    )
+
+
+def journey_from_cities(all_cities: List[dict[str, Any]]) -> dict[str, Any]:
+    """Current city plus the path travelled so far (cities without coordinates skipped)."""
+
+    def has_coords(c: dict[str, Any]) -> bool:
+        lat = c.get("lat") or 0.0
+        lng = c.get("lng") or 0.0
+        return not (abs(lat) < 0.0001 and abs(lng) < 0.0001)
+
+    cities = [c for c in all_cities if has_coords(c)]
+    for c in cities:
+        if c.get("order") is None:
+            c["order"] = 0
+    cities.sort(key=lambda c: c["order"])
+
+    current = next((c for c in cities if c.get("isCurrent")), (cities[0] if cities else None))
+    if current and current.get("order") is not None:
+        path = [c for c in cities if c["order"] < current["order"]]
+    else:
+        path = []
+    return {"currentCity": current, "path": path}
+
+
+class BaseRepository:
+    """Behaviour shared by the non-Firestore backends (derived operations)."""
+
+    def list_cities(self) -> List[dict[str, Any]]:  # pragma: no cover – abstract
+        raise NotImplementedError
+
+    def get_status(self) -> Optional[dict[str, Any]]:  # pragma: no cover – abstract
+        raise NotImplementedError
+
+    def update_status(self, payload: dict[str, Any]) -> dict[str, Any]:  # pragma: no cover – abstract
+        raise NotImplementedError
+
+    def get_sleep_flag(self) -> bool:
+        doc = self.get_status()
+        return bool(doc.get("isSleep")) if doc else False
+
+    def set_sleep_flag(self, is_sleep: bool) -> bool:
+        self.update_status({"isSleep": is_sleep})
+        return is_sleep
+
+    def compute_journey(self) -> dict[str, Any]:
+        return journey_from_cities(self.list_cities())
@@ -0,0 +1,61 @@
+"""Repository backend selection.
+
+Endpoint, scheduler and scraper code talk to ``backend.repository.repo``
+and never to a concrete store. ``REPO_BACKEND`` picks the implementation:
+
+* ``firestore`` (default) – ``backend.firestore_repo``, the production store.
+* ``sqlite`` – ``backend.sqlite_repo`` on ``DATABASE_URL`` (WAL mode), using
+  the SQLModel ``Status``/``City`` tables plus a generic ``Document`` table.
+  Useful as a low-latency local replica.
+* ``memory`` – ``backend.memory_repo``; no credentials or network, for
+  tests, benchmarks and load tests.
+
+The interface is ``backend.repo_base.Repository``. Whatever the backend, it
+is wrapped in ``backend.metrics.InstrumentedRepository`` so every call is
+timed and counted. ``REPO_FAULTS`` additionally puts it behind
+``backend.faulty_repo.FaultyRepository`` (exposed as ``faults``) to inject
+failures and delays.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from typing import Optional
+
+from backend.faulty_repo import FaultyRepository, parse_faults
+from backend.metrics import InstrumentedRepository
+from backend.repo_base import Repository
+
+logger = logging.getLogger(__name__)
+
+
+def load_repository(kind: Optional[str] = None) -> Repository:
+    """Instantiate the backend named by **kind** or ``REPO_BACKEND``."""
+    kind = (kind or os.getenv("REPO_BACKEND", "firestore")).lower()
+    if kind == "memory":
+        from backend.memory_repo import MemoryRepository
+
+        backend: Repository = MemoryRepository()
+    elif kind == "sqlite":
+        from backend.sqlite_repo import SQLiteRepository
+
+        backend = SQLiteRepository()
+    elif kind == "firestore":
+        from backend import firestore_repo
+
+        backend = firestore_repo  # type: ignore[assignment]
+    else:
+        raise ValueError(f"Unknown REPO_BACKEND {kind!r} (expected firestore, sqlite or memory)")
+    logger.info("Using %s repository", kind)
+    spec = os.getenv("REPO_FAULTS")
+    if spec:
+        global faults
+        faults = FaultyRepository(backend, **parse_faults(spec))
+        logger.warning("Injecting repository faults: %s", spec)
+        backend = faults  # type: ignore[assignment]
+    return InstrumentedRepository(backend, kind)  # type: ignore[return-value]
+
+
+faults: Optional[FaultyRepository] = None
+repo: Repository = load_repository()
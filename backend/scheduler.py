@@ -1,55 +1,147 @@
 from __future__ import annotations
 
-"""AsyncIO background scheduler for social media scraping tasks."""
+"""AsyncIO background scheduler for social media scraping tasks.
+
+Every cycle ranks all recently-current cities with ``backend.scrape_queue``
+and refreshes as many as the actor-call budget allows, instead of only the
+city flagged ``isCurrent``. With ``adaptiveScrapeInterval`` on, the interval
+is re-decided after each cycle by ``backend.scrape_interval``.
+"""
 
 import os
 import asyncio
 import logging
+from collections import deque
 from datetime import datetime
+from typing import Any
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 
-from backend import firestore_repo as repo
+from backend.repository import repo
+from backend.repo_base import DEFAULT_SETTINGS
 
-from backend import social_scraper
+from backend import leader, metrics, scrape_interval
+from backend.scrape_jobs import ScrapeJob, jobs as scrape_jobs, profiles_from_settings
+from backend.scrape_queue import build_queue
 
 logger = logging.getLogger(__name__)
 
+JOB_ID = "social-scrape"
+
+
+# Adaptive mode state: the interval currently applied, whether the last
+# decision saw the sleep flag, and recent decisions for the admin UI.
+_adaptive_interval: float | None = None
+_was_sleep = False
+_decisions: deque[dict[str, Any]] = deque(maxlen=50)
+_adapt_tasks: set[asyncio.Task] = set()
+# Last settings read successfully; used while the repository is unreachable.
+_settings: dict[str, Any] | None = None
 
-def _current_interval_min() -> int:
-    settings = repo.get_settings()
+
+def _base_interval_min(settings: dict[str, Any]) -> int:
     return int(settings.get("socialScrapeIntervalMin", 60))
 
 
-async def scrape_current_city_job():
-    """Job: scrape posts for the current city and store to Firestore."""
-    cities = repo.list_cities()
-    current = next((c for c in cities if c.get("isCurrent")), None)
-    if not current:
-        logger.info("No current city found – skipping scrape job")
-        return
+def _read_settings() -> dict[str, Any]:
+    """Current settings, or the last ones seen (defaults at first) if the read fails."""
+    global _settings
+    try:
+        _settings = repo.get_settings()
+    except Exception:
+        logger.exception("Could not read settings; using the last known values")
+        return _settings if _settings is not None else dict(DEFAULT_SETTINGS)
+    return _settings
+
+
+def _current_interval_min() -> float:
+    settings = _read_settings()
+    base = _base_interval_min(settings)
+    if not settings.get("adaptiveScrapeInterval") or base <= 0:
+        return base
+    return scrape_interval.clamp_interval(_adaptive_interval or base, settings)
 
-    logger.info("Running social scrape for city %s (%s)", current.get("city"), datetime.utcnow())
-    settings = repo.get_settings()
-    profiles = []
-    if settings.get("instagramUsername"):
-        profiles.append(settings["instagramUsername"])
-    if settings.get("twitterUsername"):
-        profiles.append(settings["twitterUsername"])
-    if settings.get("tiktokUsername"):
-        profiles.append(settings["tiktokUsername"])
-    logger.debug("Profiles to scrape: %s", profiles)
-
-    posts = social_scraper.scrape_city_posts(current, profiles=profiles)
-    if posts:
-        repo.save_city_posts(current["id"], posts)
-        logger.info("Saved %d posts for city %s", len(posts), current.get("city"))
+
+async def scrape_cycle_job():
+    """Job: queue the highest-priority recent cities within the actor budget.
+
+    The scrapes themselves run on ``backend.scrape_jobs`` workers, off the
+    event loop.
+    """
+    try:
+        await _scrape_cycle()
+    except Exception:
+        metrics.scheduler_runs.inc(job=JOB_ID, outcome="error")
+        raise
+    metrics.scheduler_runs.inc(job=JOB_ID, outcome="ok")
+
+
+async def _scrape_cycle() -> None:
+    settings = await asyncio.to_thread(repo.get_settings)
+    cities = await asyncio.to_thread(repo.list_cities)
+    queue = build_queue(cities, settings, len(profiles_from_settings(settings)))
+    due = [e for e in queue if e.scheduled]
+    submitted: list[ScrapeJob] = []
+    if not due:
+        logger.info("No recently current cities – skipping scrape cycle")
     else:
-        logger.info("No posts captured for city %s", current.get("city"))
+        by_id = {c["id"]: c for c in cities}
+        logger.info(
+            "Running social scrape cycle for %s (%s)",
+            ", ".join(f"{e.city} [{e.priority:.2f}]" for e in due),
+            datetime.utcnow(),
+        )
+        # Same queue as manual scrapes: a city already being scraped is not queued twice.
+        for entry in due:
+            job, _ = await scrape_jobs.submit(by_id[entry.city_id], source="scheduler")
+            submitted.append(job)
+
+    if settings.get("adaptiveScrapeInterval"):
+        # Decide once the scrapes finish, without holding up this job.
+        task = asyncio.create_task(_adapt_interval(submitted, settings))
+        _adapt_tasks.add(task)
+        task.add_done_callback(_adapt_tasks.discard)
+
+
+async def _adapt_interval(submitted: list[ScrapeJob], settings: dict[str, Any]) -> None:
+    """Re-decide the scrape interval from the cycle's new-post yield."""
+    global _adaptive_interval, _was_sleep
+
+    finished = await asyncio.gather(*(scrape_jobs.wait(j) for j in submitted))
+    new_posts = sum(j.new or 0 for j in finished)
+    try:
+        is_sleep = await asyncio.to_thread(repo.get_sleep_flag)
+    except Exception:
+        logger.exception("Could not read sleep flag; assuming awake")
+        is_sleep = False
+
+    previous = scrape_interval.clamp_interval(_adaptive_interval or _base_interval_min(settings), settings)
+    decision = scrape_interval.decide(previous, new_posts, is_sleep, _was_sleep, settings)
+    _adaptive_interval = decision.interval_min
+    _was_sleep = is_sleep
+
+    record = decision.to_dict()
+    _decisions.append(record)
+    logger.info(
+        "Adaptive scrape interval %.1f -> %.1f min (%s, %d new posts)",
+        decision.previous_min,
+        decision.interval_min,
+        decision.reason,
+        new_posts,
+    )
+    try:
+        await asyncio.to_thread(repo.add_interval_decision, record)
+    except Exception:
+        logger.exception("Failed to record scrape interval decision")
+
+    if decision.interval_min != decision.previous_min:
+        _reschedule()
 
 
 _scheduler: AsyncIOScheduler | None = None
+_elector: leader.Elector | None = None
+_campaign_task: asyncio.Task | None = None
 
 
 def _reschedule():
@@ -58,28 +150,95 @@ def _reschedule():
     interval = _current_interval_min()
     # remove existing job if exists
     try:
-        _scheduler.remove_job("social-scrape")
+        _scheduler.remove_job(JOB_ID)
     except Exception:
         pass
-    _scheduler.add_job(scrape_current_city_job, IntervalTrigger(minutes=interval), id="social-scrape", replace_existing=True)
-    logger.info("Scheduler interval set to %d min", interval)
+    _scheduler.add_job(scrape_cycle_job, IntervalTrigger(minutes=interval), id=JOB_ID, replace_existing=True)
+    logger.info("Scheduler interval set to %.1f min", interval)
 
 
-def start_scheduler() -> None:
+def _start_jobs() -> None:
     global _scheduler
     if _scheduler is not None:
         return
+    _scheduler = AsyncIOScheduler()
+    _scheduler.start()
+    _reschedule()
+
+
+def _stop_jobs() -> None:
+    global _scheduler
+    if _scheduler is None:
+        return
+    _scheduler.shutdown(wait=False)
+    _scheduler = None
+    logger.info("Scheduler stopped")
+
+
+def start_scheduler() -> None:
+    """Join the leader election; only the elected process schedules scrapes.
+
+    Safe to call from every API worker (see ``backend.leader``).
+    """
+    global _elector, _campaign_task
+    if _campaign_task is not None:
+        return
 
     interval = _current_interval_min()
     if interval <= 0:
         logger.warning("SOCIAL_SCRAPE_INTERVAL_MIN <= 0; scheduler disabled")
         return
 
-    _scheduler = AsyncIOScheduler()
-    _scheduler.start()
-    _reschedule()
+    _elector = leader.elector_from_env()
+    _campaign_task = asyncio.create_task(leader.campaign(_elector, _start_jobs, _stop_jobs))
+
+
+async def stop_scheduler() -> None:
+    """Leave the election (releasing the lock/lease) and stop any jobs."""
+    global _campaign_task
+    if _campaign_task is None:
+        return
+    _campaign_task.cancel()
+    try:
+        await _campaign_task
+    except asyncio.CancelledError:
+        pass
+    _campaign_task = None
 
 
 def reload_settings():
-    """Call when settings updated to refresh scheduler interval."""
+    """Call when settings updated to refresh scheduler interval.
+
+    Also picks up the stored settings again after a failed read.
+    """
     _reschedule()
+
+
+def queue_state() -> dict[str, Any]:
+    """Snapshot of what the next scrape cycle would do (for the admin UI)."""
+    settings = _read_settings()
+    profiles = profiles_from_settings(settings)
+    try:
+        cities = repo.list_cities()
+    except Exception:
+        logger.exception("Could not list cities for the scrape queue")
+        cities = []
+    entries = build_queue(cities, settings, len(profiles))
+
+    next_run = None
+    if _scheduler is not None:
+        job = _scheduler.get_job(JOB_ID)
+        if job is not None and job.next_run_time is not None:
+            next_run = job.next_run_time.isoformat()
+
+    return {
+        "running": _scheduler is not None,
+        "election": _elector.kind if _elector is not None else None,
+        "nextRunAt": next_run,
+        "intervalMin": _current_interval_min(),
+        "adaptive": bool(settings.get("adaptiveScrapeInterval")),
+        "intervalDecisions": list(_decisions),
+        "actorBudget": settings.get("scrapeActorBudget"),
+        "profiles": len(profiles),
+        "entries": [e.to_dict() for e in entries],
+    }
@@ -0,0 +1,88 @@
+"""Adaptive scrape interval driven by observed yield.
+
+With ``adaptiveScrapeInterval`` enabled the scheduler stops applying
+``socialScrapeIntervalMin`` verbatim and re-decides the interval after every
+cycle from how many *new* posts the cycle found:
+
+* **sleep** – ``isSleep`` is set: back off straight to the ceiling.
+* **wake** – first cycle after sleep: return to the base interval.
+* **burst** – at least ``scrapeBurstYield`` new posts: halve the interval
+  (something is happening, e.g. a live event in the city).
+* **idle** – no new posts: grow the interval by ``IDLE_BACKOFF``.
+* **steady** – anything in between keeps the interval.
+
+The result is always clamped to ``[scrapeIntervalFloorMin,
+scrapeIntervalCeilingMin]``. Every decision is returned as an
+``IntervalDecision`` so the scheduler can record it for tuning.
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any
+
+BURST_SPEEDUP = 0.5
+IDLE_BACKOFF = 1.5
+
+DEFAULT_FLOOR_MIN = 5
+DEFAULT_CEILING_MIN = 240
+DEFAULT_BURST_YIELD = 5
+
+
+@dataclass(slots=True)
+class IntervalDecision:
+    at: str
+    previous_min: float
+    interval_min: float
+    new_posts: int
+    is_sleep: bool
+    reason: str
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def bounds(settings: dict[str, Any]) -> tuple[float, float]:
+    """``(floor, ceiling)`` in minutes; a misconfigured ceiling is raised to the floor."""
+    floor = max(float(settings.get("scrapeIntervalFloorMin") or DEFAULT_FLOOR_MIN), 1.0)
+    ceiling = max(float(settings.get("scrapeIntervalCeilingMin") or DEFAULT_CEILING_MIN), floor)
+    return floor, ceiling
+
+
+def clamp_interval(interval_min: float, settings: dict[str, Any]) -> float:
+    floor, ceiling = bounds(settings)
+    return min(max(interval_min, floor), ceiling)
+
+
+def decide(
+    previous_min: float,
+    new_posts: int,
+    is_sleep: bool,
+    was_sleep: bool,
+    settings: dict[str, Any],
+) -> IntervalDecision:
+    """Pick the next interval after a cycle that found **new_posts** new posts."""
+    floor, ceiling = bounds(settings)
+    base = float(settings.get("socialScrapeIntervalMin") or 60)
+    burst_yield = int(settings.get("scrapeBurstYield") or DEFAULT_BURST_YIELD)
+
+    if is_sleep:
+        interval, reason = ceiling, "sleep"
+    elif was_sleep:
+        interval, reason = base, "wake"
+    elif new_posts >= burst_yield:
+        interval, reason = previous_min * BURST_SPEEDUP, "burst"
+    elif new_posts == 0:
+        interval, reason = previous_min * IDLE_BACKOFF, "idle"
+    else:
+        interval, reason = previous_min, "steady"
+
+    return IntervalDecision(
+        at=datetime.now(timezone.utc).isoformat(),
+        previous_min=round(previous_min, 2),
+        interval_min=round(min(max(interval, floor), ceiling), 2),
+        new_posts=new_posts,
+        is_sleep=is_sleep,
+        reason=reason,
+    )
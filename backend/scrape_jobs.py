@@ -0,0 +1,281 @@
+"""Background scrape jobs shared by the admin endpoint and the scheduler.
+
+``POST /api/cities/{id}/scrape`` and the scheduler both *submit* a job and
+return immediately; a small pool of asyncio workers drains the queue and runs
+the blocking scrape (Apify + Firestore) in a thread so the event loop stays
+responsive. Submitting a city that already has a queued or running job – on
+any worker – attaches to that job instead of starting a second one
+(single-flight).
+
+Job state, including per-platform progress, is stored through the
+repository (``scrapeJobs``, with a per-city claim in ``scrapeJobClaims``), so
+``GET /api/scrape-jobs/{id}`` works from every worker. Each process keeps
+its own recent jobs (``SCRAPE_JOB_HISTORY``) in memory as well; a job whose
+worker stopped heartbeating for ``SCRAPE_JOB_STALE_SEC`` is abandoned.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field, fields
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional
+
+from backend.repository import repo
+from backend import metrics, post_search, social_scraper
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+ProgressFn = Callable[[str, str, int], None]
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# ------------------ Scrape work ------------------
+
+
+def profiles_from_settings(settings: dict[str, Any]) -> list[str]:
+    profiles = []
+    if settings.get("instagramUsername"):
+        profiles.append(settings["instagramUsername"])
+    if settings.get("twitterUsername"):
+        profiles.append(settings["twitterUsername"])
+    if settings.get("tiktokUsername"):
+        profiles.append(settings["tiktokUsername"])
+    return profiles
+
+
+def scrape_city(
+    city: dict[str, Any],
+    settings: dict[str, Any],
+    use_cache: bool = True,
+    progress: Optional[ProgressFn] = None,
+) -> tuple[int, int]:
+    """Scrape and store posts for one city; returns ``(saved, new)`` counts.
+
+    Records ``lastScrapedAt``/``lastScrapeYield`` on the city so the scrape
+    queue can prioritise productive cities. Blocking – run it off the loop.
+    """
+    profiles = profiles_from_settings(settings)
+    logger.debug("Profiles to scrape: %s", profiles)
+
+    posts = social_scraper.scrape_city_posts(
+        city,
+        profiles=profiles,
+        near_dup_threshold=settings.get("nearDuplicateThreshold"),
+        use_cache=use_cache,
+        progress=progress,
+    )
+    new_posts = 0
+    if posts:
+        new_posts = repo.save_city_posts(city["id"], posts)
+        logger.info("Saved %d posts (%d new) for city %s", len(posts), new_posts, city.get("city"))
+        if post_search.index is not None:
+            try:
+                post_search.index.add(city["id"], posts)
+            except Exception:
+                logger.exception("Failed to index posts for city %s", city.get("city"))
+    else:
+        logger.info("No posts captured for city %s", city.get("city"))
+
+    repo.update_city(city["id"], {"lastScrapedAt": _now_iso(), "lastScrapeYield": new_posts})
+    return len(posts), new_posts
+
+
+# ------------------ Jobs ------------------
+
+
+@dataclass
+class ScrapeJob:
+    id: str
+    city_id: int
+    city: str
+    source: str
+    use_cache: bool = True
+    status: str = QUEUED
+    created_at: str = field(default_factory=_now_iso)
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    # Heartbeat from the owning worker; see ``repo_base.scrape_job_is_live``.
+    updated_at: str = field(default_factory=_now_iso)
+    # platform -> {"status": "running"|"done", "items": n}
+    progress: dict[str, dict[str, Any]] = field(default_factory=dict)
+    saved: Optional[int] = None
+    new: Optional[int] = None
+    error: Optional[str] = None
+
+    @property
+    def active(self) -> bool:
+        return self.status in (QUEUED, RUNNING)
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "ScrapeJob":
+        return cls(**{k: v for k, v in data.items() if k in _JOB_FIELDS})
+
+
+_JOB_FIELDS = {f.name for f in fields(ScrapeJob)}
+
+
+class ScrapeJobManager:
+    """Job queue with per-city single-flight across every worker.
+
+    Jobs are recorded through the repository: ``claim_scrape_job`` makes a
+    job its city's active one unless a live job already holds the city, so a
+    manual scrape on one worker and a scheduled one on another share one
+    Apify run, and any worker can answer ``GET /api/scrape-jobs/{id}``. The
+    process that created a job runs it and heartbeats it every
+    ``stale_after / 3`` seconds; a job whose heartbeat is older than
+    ``stale_after`` (its worker died) no longer blocks the city.
+    """
+
+    def __init__(self, workers: int = 1, history: int = 100, stale_after: float = 600.0) -> None:
+        self.workers = max(workers, 1)
+        self.history = history
+        self.stale_after = stale_after
+        # Jobs run by this process (the repository holds every job).
+        self._jobs: "OrderedDict[str, ScrapeJob]" = OrderedDict()
+        self._done: dict[str, asyncio.Event] = {}
+        self._queue: Optional[asyncio.Queue[ScrapeJob]] = None
+        self._tasks: list[asyncio.Task] = []
+
+    def _ensure_workers(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+            self._tasks.append(asyncio.create_task(self._heartbeat()))
+        return self._queue
+
+    def _stale_before(self) -> str:
+        return (datetime.now(timezone.utc) - timedelta(seconds=self.stale_after)).isoformat()
+
+    async def submit(self, city: dict[str, Any], source: str, use_cache: bool = True) -> tuple[ScrapeJob, bool]:
+        """Queue a scrape for **city**. Returns ``(job, attached)``.
+
+        ``attached`` is True when the city's live queued/running job – from
+        this or another worker – was returned instead of creating a new one.
+        """
+        job = ScrapeJob(
+            id=uuid.uuid4().hex,
+            city_id=city["id"],
+            city=city.get("city", ""),
+            source=source,
+            use_cache=use_cache,
+        )
+        active = await asyncio.to_thread(repo.claim_scrape_job, job.to_dict(), self._stale_before())
+        if active["id"] != job.id:
+            return self._jobs.get(active["id"]) or ScrapeJob.from_dict(active), True
+
+        self._jobs[job.id] = job
+        self._done[job.id] = asyncio.Event()
+        self._trim_history()
+        self._ensure_workers().put_nowait(job)
+        logger.info("Queued %s scrape job %s for city %s", source, job.id, job.city)
+        return job, False
+
+    async def get(self, job_id: str) -> Optional[ScrapeJob]:
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        doc = await asyncio.to_thread(repo.get_scrape_job, job_id)
+        return ScrapeJob.from_dict(doc) if doc else None
+
+    def list(self) -> list[ScrapeJob]:
+        return list(self._jobs.values())
+
+    async def wait(self, job: ScrapeJob, poll_sec: float = 5.0) -> ScrapeJob:
+        """Wait until **job** has finished (succeeded or failed).
+
+        A job run by another worker is polled through the repository; one
+        whose worker stopped heartbeating is returned as it was last seen.
+        """
+        done = self._done.get(job.id)
+        if done is not None:
+            await done.wait()
+            return job
+        while job.active and job.updated_at >= self._stale_before():
+            await asyncio.sleep(poll_sec)
+            doc = await asyncio.to_thread(repo.get_scrape_job, job.id)
+            if doc is None:
+                break
+            job = ScrapeJob.from_dict(doc)
+        return job
+
+    def _trim_history(self) -> None:
+        while len(self._jobs) > self.history:
+            oldest_id = next((jid for jid, j in self._jobs.items() if not j.active), None)
+            if oldest_id is None:
+                break
+            del self._jobs[oldest_id]
+            self._done.pop(oldest_id, None)
+
+    def _save(self, job: ScrapeJob, *names: str) -> None:
+        """Write **names** (plus the heartbeat) of **job** to the repository. Blocking."""
+        job.updated_at = _now_iso()
+        data = {name: getattr(job, name) for name in names + ("updated_at",)}
+        try:
+            repo.update_scrape_job(job.id, data)
+        except Exception:
+            logger.exception("Could not record scrape job %s", job.id)
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.stale_after / 3)
+            for job in [j for j in self._jobs.values() if j.active]:
+                await asyncio.to_thread(self._save, job)
+
+    async def _worker(self) -> None:
+        assert self._queue is not None
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: ScrapeJob) -> None:
+        job.status = RUNNING
+        job.started_at = _now_iso()
+        await asyncio.to_thread(self._save, job, "status", "started_at")
+
+        def progress(platform: str, state: str, items: int) -> None:
+            # Called from the worker thread; single dict assignment is atomic.
+            job.progress[platform] = {"status": state, "items": items}
+            self._save(job, "progress")
+
+        try:
+            city = await asyncio.to_thread(repo.get_city, job.city_id)
+            if not city:
+                raise LookupError(f"City {job.city_id} not found")
+            settings = await asyncio.to_thread(repo.get_settings)
+            job.saved, job.new = await asyncio.to_thread(scrape_city, city, settings, job.use_cache, progress)
+            job.status = SUCCEEDED
+        except Exception as exc:
+            logger.exception("Scrape job %s for city %s failed", job.id, job.city)
+            job.status = FAILED
+            job.error = str(exc)
+        finally:
+            job.finished_at = _now_iso()
+            metrics.scrape_job_runs.inc(source=job.source, status=job.status)
+            await asyncio.to_thread(self._save, job, "status", "finished_at", "saved", "new", "error")
+            self._done[job.id].set()
+
+
+jobs = ScrapeJobManager(
+    workers=int(os.getenv("SCRAPE_JOB_WORKERS", 1)),
+    history=int(os.getenv("SCRAPE_JOB_HISTORY", 100)),
+    stale_after=float(os.getenv("SCRAPE_JOB_STALE_SEC", 600)),
+)
@@ -0,0 +1,139 @@
+"""Priority queue deciding which cities the scheduler scrapes each cycle.
+
+Posts about a city keep arriving for days after Speed moves on, so every city
+that was current recently stays eligible. Each cycle ranks them by
+
+    priority = recency × yield × staleness
+
+* **recency** – 1.0 for the current city, then halves every
+  ``RECENCY_HALF_LIFE_HOURS`` since the city stopped being current (i.e. since
+  the next city's ``lastCurrentAt``). Cities left more than
+  ``scrapeRecentDays`` ago are not queued at all.
+* **yield** – ``1 + log1p(lastScrapeYield)``: cities whose last scrape found
+  new posts are worth revisiting. Never-scraped cities get a bonus.
+* **staleness** – time since ``lastScrapedAt`` relative to the scrape
+  interval, so a city just refreshed yields to the others.
+
+The current city is always popped first; the rest follow best-first until
+the per-cycle actor-call budget (``scrapeActorBudget``) is spent. One city
+costs one call per platform per profile.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, List, Optional
+
+from backend.posts import parse_timestamp
+
+PLATFORMS_PER_PROFILE = 3  # Instagram, TikTok, Twitter
+RECENCY_HALF_LIFE_HOURS = 24.0
+UNSCRAPED_YIELD_FACTOR = 2.0
+MAX_STALENESS = 3.0
+MIN_STALENESS = 0.1
+
+DEFAULT_ACTOR_BUDGET = 6
+DEFAULT_RECENT_DAYS = 3
+
+
+@dataclass(slots=True)
+class QueueEntry:
+    """One city's place in the scrape queue (also the admin-visible state)."""
+
+    city_id: int
+    city: str
+    priority: float
+    recency: float
+    last_yield: Optional[int]
+    last_scraped_at: Optional[str]
+    cost: int
+    scheduled: bool = False
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def _left_at(cities: List[dict[str, Any]]) -> dict[int, Optional[datetime]]:
+    """Map city id -> when it stopped being current (None while current)."""
+    activations = []
+    for c in cities:
+        ts = parse_timestamp(c.get("lastCurrentAt"))
+        if ts is not None:
+            activations.append((ts, c["id"]))
+    activations.sort()
+
+    left: dict[int, Optional[datetime]] = {}
+    for idx, (_, city_id) in enumerate(activations):
+        left[city_id] = activations[idx + 1][0] if idx + 1 < len(activations) else None
+    # The flagged current city is current regardless of timestamps.
+    for c in cities:
+        if c.get("isCurrent"):
+            left[c["id"]] = None
+    return left
+
+
+def build_queue(
+    cities: List[dict[str, Any]],
+    settings: dict[str, Any],
+    profile_count: int,
+    now: Optional[datetime] = None,
+) -> List[QueueEntry]:
+    """Rank eligible cities and mark those that fit this cycle's budget.
+
+    Returns all eligible entries in pop order: the current city, then by priority.
+    """
+    now = now or datetime.now(timezone.utc)
+    budget = int(settings.get("scrapeActorBudget") or DEFAULT_ACTOR_BUDGET)
+    recent_days = float(settings.get("scrapeRecentDays") or DEFAULT_RECENT_DAYS)
+    interval_min = max(float(settings.get("socialScrapeIntervalMin") or 60), 1.0)
+    cost = max(profile_count, 1) * PLATFORMS_PER_PROFILE
+
+    left_at = _left_at(cities)
+    heap: list[tuple[bool, float, int, QueueEntry]] = []
+    for c in cities:
+        if c["id"] not in left_at:
+            continue  # never current – nothing to scrape since
+
+        left = left_at[c["id"]]
+        if left is None:
+            recency = 1.0
+        else:
+            hours = max((now - left).total_seconds(), 0.0) / 3600
+            if hours > recent_days * 24:
+                continue
+            recency = 0.5 ** (hours / RECENCY_HALF_LIFE_HOURS)
+
+        last_yield = c.get("lastScrapeYield")
+        yield_factor = UNSCRAPED_YIELD_FACTOR if last_yield is None else 1 + math.log1p(max(int(last_yield), 0))
+
+        scraped_at = parse_timestamp(c.get("lastScrapedAt"))
+        if scraped_at is None:
+            staleness = MAX_STALENESS
+        else:
+            minutes = max((now - scraped_at).total_seconds(), 0.0) / 60
+            staleness = min(max(minutes / interval_min, MIN_STALENESS), MAX_STALENESS)
+
+        entry = QueueEntry(
+            city_id=c["id"],
+            city=c.get("city", ""),
+            priority=round(recency * yield_factor * staleness, 6),
+            recency=round(recency, 6),
+            last_yield=last_yield,
+            last_scraped_at=c.get("lastScrapedAt"),
+            cost=cost,
+        )
+        heapq.heappush(heap, (left is not None, -entry.priority, c["id"], entry))
+
+    ordered: List[QueueEntry] = []
+    remaining = budget
+    while heap:
+        *_, entry = heapq.heappop(heap)
+        # Always scrape the top city, even when one city exceeds the budget.
+        if entry.cost <= remaining or not ordered:
+            entry.scheduled = True
+            remaining -= entry.cost
+        ordered.append(entry)
+    return ordered
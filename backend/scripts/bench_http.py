@@ -0,0 +1,474 @@
+#!/usr/bin/env python
+"""
+HTTP load test for ``backend.main:app`` with reproducible scenarios.
+
+The app runs under uvicorn in a child process with no external services:
+
+* ``REPO_BACKEND=memory`` stands in for Firestore, seeded from the dev
+  snapshot;
+* Google Geocoding/Places requests are answered by an in-process
+  ``httpx.MockTransport`` after ``--google-latency`` seconds;
+* the Apify client is replaced by a stub returning synthetic posts after
+  ``--apify-latency`` seconds;
+* admin auth is overridden (token verification is not measured).
+
+Scenarios (each a set of virtual-user groups running concurrently; every
+user sends a fixed, seeded sequence of requests):
+
+* ``viewer_spike``   – a trickle of viewers, then a viral spike on
+  ``/api/status`` and ``/api/journey``.
+* ``admin_updates``  – admins streaming live-location updates while
+  viewers poll ``/api/status``.
+* ``scrape_reads``   – manual scrapes running (and being polled) while
+  viewers read status, journey, posts and search.
+
+Results are JSON: requests, errors, throughput and p50/p95/p99 latency per
+scenario, group and endpoint. ``--save-baseline`` stores them;
+``--baseline`` compares a run against a stored file and exits non-zero
+when p95 latency or throughput regresses beyond ``--tolerance``. Baselines
+are machine-specific – record one on the same host before comparing.
+
+Usage:
+
+    python backend/scripts/bench_http.py [--scenario viewer_spike ...] [--scale 1.0]
+        [--out results.json] [--baseline base.json] [--save-baseline] [--tolerance 0.2]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import httpx
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+DEFAULT_BASELINE = REPO_ROOT / "backend" / ".cache" / "bench_http_baseline.json"
+SCRAPED_CITIES = (1, 2, 3)
+# Regressions smaller than this are noise, whatever the ratio.
+MIN_LATENCY_DELTA_MS = 2.0
+
+# (method, url, template, json body)
+RequestSpec = tuple[str, str, str, Optional[dict[str, Any]]]
+
+
+# ------------------ Stubbed server (child process) ------------------
+
+
+class _FakeDataset:
+    def __init__(self, items: list[dict[str, Any]]) -> None:
+        self._items = items
+
+    def iterate_items(self):
+        return iter(self._items)
+
+
+class _FakeActor:
+    def __init__(self, client: "FakeApifyClient", actor_id: str) -> None:
+        self.client = client
+        self.actor_id = actor_id
+
+    def call(self, run_input: dict[str, Any]) -> dict[str, Any]:
+        time.sleep(self.client.latency)
+        return self.client._store(self.client._items(self.actor_id, run_input))
+
+
+class FakeApifyClient:
+    """Answers ``actor(id).call()`` / ``dataset(id).iterate_items()`` with synthetic posts."""
+
+    def __init__(self, latency: float, seed: int) -> None:
+        self.latency = latency
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._datasets: dict[str, list[dict[str, Any]]] = {}
+        self._next_id = 0
+
+    def actor(self, actor_id: str) -> _FakeActor:
+        return _FakeActor(self, actor_id)
+
+    def dataset(self, dataset_id: str) -> _FakeDataset:
+        with self._lock:
+            return _FakeDataset(self._datasets.pop(dataset_id, []))
+
+    def _store(self, items: list[dict[str, Any]]) -> dict[str, Any]:
+        with self._lock:
+            self._next_id += 1
+            dataset_id = f"ds-{self._next_id}"
+            self._datasets[dataset_id] = items
+        return {"defaultDatasetId": dataset_id}
+
+    def _items(self, actor_id: str, run_input: dict[str, Any]) -> list[dict[str, Any]]:
+        term = str(run_input.get("search") or (run_input.get("searchQueries") or run_input.get("searchTerms") or ["speed"])[0])
+        now = datetime.now(timezone.utc)
+        items = []
+        with self._lock:
+            rng = random.Random(self.rng.getrandbits(64))
+        for _ in range(60):
+            ts = (now - timedelta(minutes=rng.randint(1, 3 * 24 * 60))).isoformat()
+            pid = str(rng.getrandbits(48))
+            likes = int(rng.paretovariate(1.2) * 10)
+            caption = f"{term} speed stream {rng.choice(['live', 'crowd', 'wow', 'irl'])} {pid[-4:]}"
+            if "tiktok" in actor_id:
+                items.append({"id": pid, "createTimeISO": ts, "text": caption, "diggCount": likes,
+                              "authorMeta": {"name": f"user{pid[-3:]}"}, "webVideoUrl": f"https://tiktok.test/{pid}"})
+            elif "tweet" in actor_id or "twitter" in actor_id:
+                items.append({"id": pid, "createdAt": ts, "fullText": caption, "likeCount": likes,
+                              "author": {"userName": f"user{pid[-3:]}"}, "url": f"https://x.test/{pid}"})
+            else:
+                items.append({"id": pid, "timestamp": ts, "caption": caption, "likesCount": likes,
+                              "ownerUsername": f"user{pid[-3:]}", "url": f"https://instagram.test/{pid}"})
+        return items
+
+
+def _google_transport(latency: float, seed: int) -> httpx.MockTransport:
+    rng = random.Random(seed)
+
+    async def handle(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency)
+        path = request.url.path
+        if path.endswith("geocode/json"):
+            loc = {"lat": rng.uniform(26, 47), "lng": rng.uniform(-122, -71)}
+            return httpx.Response(200, json={"results": [{"geometry": {"location": loc}}]})
+        if path.endswith("autocomplete/json"):
+            preds = [{"place_id": f"p{i}", "description": f"Place {i}"} for i in range(5)]
+            return httpx.Response(200, json={"predictions": preds})
+        if path.endswith("details/json"):
+            result = {"geometry": {"location": {"lat": 40.0, "lng": -75.0}}, "formatted_address": "Somewhere"}
+            return httpx.Response(200, json={"result": result})
+        return httpx.Response(404, json={})
+
+    return httpx.MockTransport(handle)
+
+
+def serve(port: int, apify_latency: float, google_latency: float, seed: int) -> None:
+    """Run the app with every external dependency stubbed (child process entry point)."""
+    import uvicorn
+
+    transport = _google_transport(google_latency, seed)
+    real_async_client = httpx.AsyncClient
+
+    class StubbedAsyncClient(real_async_client):  # type: ignore[misc, valid-type]
+        def __init__(self, *args: Any, **kwargs: Any) -> None:
+            kwargs.setdefault("transport", transport)
+            super().__init__(*args, **kwargs)
+
+    httpx.AsyncClient = StubbedAsyncClient  # type: ignore[misc]
+
+    from backend import main, social_scraper
+    from backend.auth import get_current_admin
+    from backend.repository import repo
+
+    social_scraper.client = FakeApifyClient(apify_latency, seed)
+    main.app.dependency_overrides[get_current_admin] = lambda: None
+    repo.update_settings({"instagramUsername": "speed", "tiktokUsername": "speed", "twitterUsername": "speed"})
+    uvicorn.run(main.app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+
+
+# ------------------ Scenarios ------------------
+
+
+@dataclass
+class Group:
+    name: str
+    users: int
+    requests: int  # per user
+    next_request: Callable[[random.Random, int], RequestSpec]
+    think_sec: float = 0.0
+    # Follow-up after each response (e.g. poll a scrape job); returns extra latencies.
+    follow: Optional[Callable[[httpx.AsyncClient, httpx.Response, dict], Any]] = None
+
+
+@dataclass
+class Stage:
+    groups: list[Group]
+
+
+def _viewer(mix: list[tuple[float, str]]) -> Callable[[random.Random, int], RequestSpec]:
+    weights = [w for w, _ in mix]
+    paths = [p for _, p in mix]
+
+    def make(rng: random.Random, _i: int) -> RequestSpec:
+        template = rng.choices(paths, weights)[0]
+        url = template.replace("{city_id}", str(rng.choice(SCRAPED_CITIES)))
+        return "GET", url, f"GET {template}", None
+
+    return make
+
+
+SPIKE_MIX = [(0.6, "/api/status"), (0.4, "/api/journey")]
+VIEWER_MIX = [(0.5, "/api/status"), (0.3, "/api/journey"), (0.1, "/api/cities"), (0.1, "/api/cities/{city_id}/posts")]
+READER_MIX = VIEWER_MIX + [(0.1, "/api/posts/search?q=speed")]
+
+
+def _admin_update(rng: random.Random, i: int) -> RequestSpec:
+    body = {
+        "lat": 30 + (i % 100) * 0.05 + rng.random() * 0.01,
+        "lng": -90 + (i % 100) * 0.05 + rng.random() * 0.01,
+        "quote": "On the road",
+        "city": "Somewhere",
+        "state": "Texas",
+    }
+    return "POST", "/api/status", "POST /api/status", body
+
+
+def _scrape(rng: random.Random, _i: int) -> RequestSpec:
+    city_id = rng.choice(SCRAPED_CITIES)
+    return "POST", f"/api/cities/{city_id}/scrape?refresh=true", "POST /api/cities/{id}/scrape", None
+
+
+async def _poll_job(client: httpx.AsyncClient, response: httpx.Response, record: dict) -> None:
+    """Poll a started scrape job until it finishes, recording each poll."""
+    job_id = response.json().get("jobId")
+    while job_id:
+        start = time.perf_counter()
+        resp = await client.get(f"/api/scrape-jobs/{job_id}")
+        record["GET /api/scrape-jobs/{id}"].append((time.perf_counter() - start, resp.status_code))
+        if resp.status_code != 200 or resp.json().get("status") in ("succeeded", "failed"):
+            return
+        await asyncio.sleep(0.1)
+
+
+def scenarios(scale: float) -> dict[str, list[Stage]]:
+    def n(users: int) -> int:
+        return max(1, round(users * scale))
+
+    return {
+        "viewer_spike": [
+            Stage([Group("trickle", n(10), 40, _viewer(SPIKE_MIX), think_sec=0.01)]),
+            Stage([Group("spike", n(200), 20, _viewer(SPIKE_MIX))]),
+        ],
+        "admin_updates": [
+            Stage([
+                Group("admins", n(2), 100, _admin_update, think_sec=0.02),
+                Group("viewers", n(50), 40, _viewer([(1.0, "/api/status")]), think_sec=0.005),
+            ]),
+        ],
+        "scrape_reads": [
+            Stage([
+                Group("scrapers", n(3), 3, _scrape, think_sec=0.2, follow=_poll_job),
+                Group("readers", n(50), 40, _viewer(READER_MIX), think_sec=0.01),
+            ]),
+        ],
+    }
+
+
+# ------------------ Load generation ------------------
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(samples: list[tuple[float, int]], duration: float) -> dict[str, Any]:
+    latencies = sorted(s[0] * 1000 for s in samples)
+    errors = sum(1 for _, status in samples if status >= 400 or status == 0)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "rps": round(len(samples) / duration, 1) if duration else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+    }
+
+
+async def _user(client: httpx.AsyncClient, group: Group, rng: random.Random, record: dict) -> None:
+    for i in range(group.requests):
+        method, url, template, body = group.next_request(rng, i)
+        start = time.perf_counter()
+        try:
+            resp = await client.request(method, url, json=body)
+            status = resp.status_code
+        except httpx.HTTPError:
+            resp, status = None, 0
+        record[template].append((time.perf_counter() - start, status))
+        if group.follow and resp is not None and status < 400:
+            await group.follow(client, resp, record)
+        if group.think_sec:
+            await asyncio.sleep(group.think_sec)
+
+
+async def run_stage(client: httpx.AsyncClient, stage: Stage, seed: int) -> dict[str, Any]:
+    records: dict[str, dict[str, list]] = {}
+    tasks = []
+    for g_index, group in enumerate(stage.groups):
+        record = records.setdefault(group.name, defaultdict(list))
+        for u in range(group.users):
+            rng = random.Random(seed * 1_000_003 + g_index * 10_007 + u)
+            tasks.append(_user(client, group, rng, record))
+    start = time.perf_counter()
+    await asyncio.gather(*tasks)
+    duration = time.perf_counter() - start
+
+    out: dict[str, Any] = {}
+    for name, by_endpoint in records.items():
+        all_samples = [s for samples in by_endpoint.values() for s in samples]
+        out[name] = {
+            "total": summarize(all_samples, duration),
+            "endpoints": {ep: summarize(samples, duration) for ep, samples in sorted(by_endpoint.items())},
+        }
+    return out
+
+
+async def run_scenarios(base_url: str, names: list[str], scale: float, seed: int) -> dict[str, Any]:
+    limits = httpx.Limits(max_connections=500, max_keepalive_connections=500)
+    results: dict[str, Any] = {}
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        # Warm up: give the read scenarios posts and search results to return.
+        for city_id in SCRAPED_CITIES:
+            resp = await client.post(f"/api/cities/{city_id}/scrape")
+            await _poll_job(client, resp, defaultdict(list))
+        for name in names:
+            stages = scenarios(scale)[name]
+            results[name] = {}
+            for stage in stages:
+                results[name].update(await run_stage(client, stage, seed))
+    return results
+
+
+# ------------------ Baseline comparison ------------------
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> dict[str, list]:
+    regressions, improvements = [], []
+    for scenario, groups in results.items():
+        for group, data in groups.items():
+            for endpoint, cur in data["endpoints"].items():
+                base = baseline.get(scenario, {}).get(group, {}).get("endpoints", {}).get(endpoint)
+                if not base:
+                    continue
+                where = f"{scenario}/{group}/{endpoint}"
+                delta = cur["p95_ms"] - base["p95_ms"]
+                if delta > MIN_LATENCY_DELTA_MS and cur["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+                    regressions.append({"where": where, "metric": "p95_ms", "baseline": base["p95_ms"], "current": cur["p95_ms"]})
+                elif -delta > MIN_LATENCY_DELTA_MS and cur["p95_ms"] < base["p95_ms"] * (1 - tolerance):
+                    improvements.append({"where": where, "metric": "p95_ms", "baseline": base["p95_ms"], "current": cur["p95_ms"]})
+                if cur["rps"] < base["rps"] * (1 - tolerance):
+                    regressions.append({"where": where, "metric": "rps", "baseline": base["rps"], "current": cur["rps"]})
+                if cur["errors"] > base["errors"]:
+                    regressions.append({"where": where, "metric": "errors", "baseline": base["errors"], "current": cur["errors"]})
+    return {"regressions": regressions, "improvements": improvements}
+
+
+# ------------------ Main ------------------
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(base_url: str, proc: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            sys.exit(f"Server exited with code {proc.returncode}")
+        try:
+            if httpx.get(f"{base_url}/api/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    sys.exit("Server did not become ready")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load-test the API with stubbed dependencies")
+    parser.add_argument("--scenario", action="append", choices=list(scenarios(1.0)), help="Repeatable; default all")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply virtual users per group")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--apify-latency", type=float, default=0.5, help="Seconds per stub actor run")
+    parser.add_argument("--google-latency", type=float, default=0.05, help="Seconds per stub Google request")
+    parser.add_argument("--out", type=Path, help="Write results JSON here (default stdout)")
+    parser.add_argument("--baseline", type=Path, help="Compare against this results file")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, type=Path, help="Store results as baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)  # child process: port
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.apify_latency, args.google_latency, args.seed)
+        return
+
+    names = args.scenario or list(scenarios(1.0))
+    port = _free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory(prefix="bench-http-") as tmp:
+        env = {
+            **os.environ,
+            "REPO_BACKEND": "memory",
+            "DATABASE_URL": f"sqlite:///{tmp}/speed.db",
+            "POST_SEARCH_DB": f"{tmp}/search.db",
+            "POST_ARCHIVE_DIR": f"{tmp}/archive",
+            "TIMELINE_DIR": f"{tmp}/timeline",
+            "GOOGLE_PLACES_API_KEY": "bench",
+            "APIFY_TOKEN": "",
+            "SCHEDULER_LEADER": "none",
+            "SEED_SNAPSHOT": str(REPO_ROOT / "backend" / "seed" / "dev_snapshot.jsonl"),
+        }
+        cmd = [sys.executable, __file__, "--serve", str(port), "--seed", str(args.seed),
+               "--apify-latency", str(args.apify_latency), "--google-latency", str(args.google_latency)]
+        proc = subprocess.Popen(cmd, env=env, cwd=REPO_ROOT)
+        try:
+            _wait_ready(base_url, proc)
+            started = time.perf_counter()
+            results = asyncio.run(run_scenarios(base_url, names, args.scale, args.seed))
+            elapsed = time.perf_counter() - started
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    report: dict[str, Any] = {
+        "meta": {
+            "scenarios": names,
+            "scale": args.scale,
+            "seed": args.seed,
+            "apifyLatency": args.apify_latency,
+            "googleLatency": args.google_latency,
+            "elapsedSec": round(elapsed, 1),
+            "python": sys.version.split()[0],
+            "createdAt": datetime.now(timezone.utc).isoformat(),
+        },
+        "results": results,
+    }
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        report["comparison"] = compare(results, baseline.get("results", {}), args.tolerance)
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        args.out.write_text(text)
+    else:
+        print(text)
+    if args.save_baseline:
+        args.save_baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.save_baseline.write_text(text)
+        print(f"Baseline saved to {args.save_baseline}", file=sys.stderr)
+    if report.get("comparison", {}).get("regressions"):
+        print(f"{len(report['comparison']['regressions'])} regression(s) vs {args.baseline}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
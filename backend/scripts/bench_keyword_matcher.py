@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark: compiled `KeywordMatcher` vs. the previous per-term scan.
+
+Generates synthetic captions (a mix of matching, near-miss and unrelated
+posts) and times both implementations over the same inputs. Also reports how
+many posts each one accepts so the false positives of plain substring matching
+("Austin" in "Austintown") are visible.
+
+Usage:
+
+    python backend/scripts/bench_keyword_matcher.py [--posts 20000] [--repeat 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import timeit
+from pathlib import Path
+from typing import Any
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from backend.keyword_matcher import KeywordMatcher  # noqa: E402
+
+
+# ---------------------------------------------------------------
+# Previous implementation (kept here only for comparison)
+# ---------------------------------------------------------------
+
+
+def legacy_contains_keywords(post: dict[str, Any], terms: list[str]) -> bool:
+    searchable_fields = [
+        post.get("caption"),
+        post.get("text"),
+        post.get("description"),
+        post.get("title"),
+    ]
+    blob = " ".join([s for s in searchable_fields if isinstance(s, str)]).lower()
+    if not blob:
+        return False
+    return any(term.lower() in blob for term in terms if term)
+
+
+def post_text(post: dict[str, Any]) -> str:
+    fields = (post.get("caption"), post.get("text"), post.get("description"), post.get("title"))
+    return " ".join(s for s in fields if isinstance(s, str))
+
+
+# ---------------------------------------------------------------
+# Synthetic data
+# ---------------------------------------------------------------
+
+FILLER = (
+    "speed live stream today crazy moment chat went wild lets go fans "
+    "backflip car ronaldo suiii meet greet crowd police street food"
+).split()
+
+MENTIONS = ["Austin", "#austin", "Texas", "#SpeedInAustin", "AUSTIN TX", "Austintown", "Texasville"]
+
+
+def make_posts(n: int, seed: int = 7) -> list[dict[str, Any]]:
+    rng = random.Random(seed)
+    posts = []
+    for i in range(n):
+        words = rng.choices(FILLER, k=rng.randint(8, 40))
+        if rng.random() < 0.3:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(MENTIONS))
+        caption = " ".join(words)
+        field = ("caption", "text", "description")[i % 3]
+        posts.append({field: caption, "title": "ishowspeed" if i % 5 == 0 else None})
+    return posts
+
+
+# ---------------------------------------------------------------
+# Main CLI
+# ---------------------------------------------------------------
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark post keyword filtering")
+    parser.add_argument("--posts", type=int, default=20_000, help="Number of synthetic posts")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repetitions (best is reported)")
+    parser.add_argument(
+        "--extra-terms",
+        type=int,
+        default=0,
+        help="Add N synthetic city keywords (legacy cost grows per term, compiled does not)",
+    )
+    args = parser.parse_args()
+
+    posts = make_posts(args.posts)
+    terms = ["Austin", "Texas", "SXSW", "Sixth Street", "Zilker", "ishowspeed austin"]
+    terms += [f"landmark{i}" for i in range(args.extra_terms)]
+
+    def run_legacy() -> int:
+        return sum(1 for p in posts if legacy_contains_keywords(p, terms))
+
+    def run_compiled() -> int:
+        matcher = KeywordMatcher(terms)  # compiled once per scrape, as in scrape_city_posts
+        return sum(1 for p in posts if matcher.matches(post_text(p)))
+
+    legacy_t = min(timeit.repeat(run_legacy, number=1, repeat=args.repeat))
+    compiled_t = min(timeit.repeat(run_compiled, number=1, repeat=args.repeat))
+
+    print(f"posts:     {len(posts)}  terms: {len(terms)}")
+    print(f"legacy:    {legacy_t * 1000:8.2f} ms  matched={run_legacy()}")
+    print(f"compiled:  {compiled_t * 1000:8.2f} ms  matched={run_compiled()}")
+    print(f"speed-up:  {legacy_t / compiled_t:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
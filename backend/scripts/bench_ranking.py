@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""
+Benchmark post ranking: bounded-heap `top_k` vs. scoring + full sort.
+
+Generates synthetic posts across platforms with heavy-tailed engagement and
+ages spread over a week, then selects the top K both ways with the same
+scorer. Results must be identical; only the selection strategy differs.
+
+Usage:
+
+    python backend/scripts/bench_ranking.py [--posts 100000] [--k 100] [--repeat 3]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import timeit
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from backend.posts import INSTAGRAM, TIKTOK, TWITTER, Post  # noqa: E402
+from backend.ranking import EngagementScorer, top_k  # noqa: E402
+
+
+def make_posts(n: int, now: datetime, seed: int = 11) -> list[Post]:
+    rng = random.Random(seed)
+    platforms = (INSTAGRAM, TIKTOK, TWITTER)
+    posts = []
+    for i in range(n):
+        likes = int(rng.paretovariate(1.2) * 10)
+        posts.append(
+            Post(
+                platform=platforms[i % 3],
+                post_id=str(i),
+                timestamp=now - timedelta(minutes=rng.randrange(7 * 24 * 60)),
+                likes=likes,
+                comments=likes // rng.randint(5, 50),
+                shares=likes // rng.randint(10, 100),
+                views=likes * rng.randint(10, 200),
+            )
+        )
+    return posts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark heap top-k post ranking")
+    parser.add_argument("--posts", type=int, default=100_000, help="Number of synthetic posts")
+    parser.add_argument("--k", type=int, default=100, help="Posts to keep")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions (best is reported)")
+    args = parser.parse_args()
+
+    now = datetime.now(timezone.utc)
+    posts = make_posts(args.posts, now)
+    scorer = EngagementScorer()
+
+    def run_sort() -> list[Post]:
+        for p in posts:
+            p.score = scorer(p, now)
+        return sorted(posts, key=lambda p: p.score, reverse=True)[: args.k]
+
+    def run_heap() -> list[Post]:
+        return top_k(iter(posts), args.k, scorer, now)
+
+    # Selection only: scores already computed, isolates sort vs. heap cost.
+    def stored(p: Post, _now: datetime) -> float:
+        return p.score
+
+    def select_sort() -> list[Post]:
+        return sorted(posts, key=lambda p: p.score, reverse=True)[: args.k]
+
+    def select_heap() -> list[Post]:
+        return top_k(iter(posts), args.k, stored, now)
+
+    assert [p.post_id for p in run_sort()] == [p.post_id for p in run_heap()], "rankings differ"
+
+    sort_t = min(timeit.repeat(run_sort, number=1, repeat=args.repeat))
+    heap_t = min(timeit.repeat(run_heap, number=1, repeat=args.repeat))
+    sel_sort_t = min(timeit.repeat(select_sort, number=1, repeat=args.repeat))
+    sel_heap_t = min(timeit.repeat(select_heap, number=1, repeat=args.repeat))
+
+    print(f"posts:           {len(posts)}  k: {args.k}")
+    print(f"score+sort:      {sort_t * 1000:8.2f} ms")
+    print(f"score+heap:      {heap_t * 1000:8.2f} ms   ({sort_t / heap_t:.2f}x)")
+    print(f"select (sort):   {sel_sort_t * 1000:8.2f} ms")
+    print(f"select (heap):   {sel_heap_t * 1000:8.2f} ms   ({sel_sort_t / sel_heap_t:.2f}x)")
+    print(f"heap keeps {args.k} posts in memory; full sort materialises all {len(posts)}")
+
+
+if __name__ == "__main__":
+    main()
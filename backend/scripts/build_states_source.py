@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+"""
+Build the bundled ``backend/geo/us-states.json`` from a Census shapefile.
+
+Input is a US Census cartographic boundary file for states (public domain),
+e.g. ``cb_2016_us_state_500k.shp`` with its ``.dbf`` – the same file ships
+in the ``plotly-geo`` wheel under ``_plotly_geo/package_data``. The output
+is the FeatureCollection the maps used to fetch from GitHub: one feature per
+state plus DC and Puerto Rico, ``id`` the FIPS code and ``properties.name``
+the state name.
+
+The 500k file is far more detailed than the maps need, so it is reduced
+with the same topology builder that serves ``/api/geo/states`` (shared
+borders stay identical) at ``--zoom`` (default 8, two levels above the zoom-6
+layer built from it) and written back out as plain GeoJSON.
+
+Usage::
+
+    python -m backend.scripts.build_states_source path/to/cb_2016_us_state_500k.shp
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import struct
+from pathlib import Path
+from typing import Any, Iterator, List
+
+from backend.polygons import decimals_for_tolerance, tolerance_for_zoom
+from backend.states_topology import DEFAULT_SOURCE, build_topology
+
+# The 50 states, DC and Puerto Rico; the other territories are not drawn.
+SKIP_FIPS = {"60", "66", "69", "78"}
+
+
+# ------------------ Shapefile ------------------
+
+
+def read_dbf(path: Path) -> Iterator[dict[str, str]]:
+    data = path.read_bytes()
+    count, header_len, record_len = struct.unpack("<IHH", data[4:12])
+    fields = []
+    offset = 32
+    while data[offset] != 0x0D:
+        name = data[offset : offset + 11].split(b"\0", 1)[0].decode("ascii")
+        fields.append((name, data[offset + 16]))
+        offset += 32
+    for i in range(count):
+        record = data[header_len + i * record_len : header_len + (i + 1) * record_len]
+        pos, row = 1, {}
+        for name, length in fields:
+            row[name] = record[pos : pos + length].decode("latin-1").strip()
+            pos += length
+        yield row
+
+
+def read_polygons(path: Path) -> Iterator[List[List[List[float]]]]:
+    """Rings of each polygon record, in shapefile orientation (outer clockwise)."""
+    data = path.read_bytes()
+    offset = 100
+    while offset < len(data):
+        _, words = struct.unpack(">ii", data[offset : offset + 8])
+        content = data[offset + 8 : offset + 8 + 2 * words]
+        offset += 8 + 2 * words
+        if struct.unpack("<i", content[:4])[0] != 5:
+            yield []
+            continue
+        num_parts, num_points = struct.unpack("<ii", content[36:44])
+        parts = list(struct.unpack(f"<{num_parts}i", content[44 : 44 + 4 * num_parts])) + [num_points]
+        base = 44 + 4 * num_parts
+        points = struct.unpack(f"<{2 * num_points}d", content[base : base + 16 * num_points])
+        yield [
+            [[points[2 * j], points[2 * j + 1]] for j in range(a, b)]
+            for a, b in zip(parts, parts[1:])
+        ]
+
+
+def _signed_area(ring: List[List[float]]) -> float:
+    return sum(x0 * y1 - x1 * y0 for (x0, y0), (x1, y1) in zip(ring, ring[1:] + ring[:1])) / 2
+
+
+def _contains(ring: List[List[float]], point: List[float]) -> bool:
+    x, y = point
+    inside = False
+    for (x0, y0), (x1, y1) in zip(ring, ring[1:] + ring[:1]):
+        if (y0 > y) != (y1 > y) and x < (x1 - x0) * (y - y0) / (y1 - y0) + x0:
+            inside = not inside
+    return inside
+
+
+def to_geometry(rings: List[List[List[float]]]) -> dict[str, Any]:
+    """GeoJSON (Multi)Polygon; shapefile holes run counter-clockwise."""
+    polygons: List[List[List[List[float]]]] = []
+    holes = []
+    for ring in rings:
+        # RFC 7946 orientation: outer rings counter-clockwise, holes clockwise.
+        if _signed_area(ring) < 0:
+            polygons.append([ring[::-1]])
+        else:
+            holes.append(ring[::-1])
+    for hole in holes:
+        owner = next((p for p in polygons if _contains(p[0], hole[0])), polygons[-1])
+        owner.append(hole)
+    if len(polygons) == 1:
+        return {"type": "Polygon", "coordinates": polygons[0]}
+    return {"type": "MultiPolygon", "coordinates": polygons}
+
+
+# ------------------ Topology → GeoJSON ------------------
+
+
+def topology_to_geojson(topology: dict[str, Any], decimals: int) -> dict[str, Any]:
+    (sx, sy), (tx, ty) = topology["transform"]["scale"], topology["transform"]["translate"]
+    arcs = []
+    for arc in topology["arcs"]:
+        x = y = 0
+        points = []
+        for dx, dy in arc:
+            x, y = x + dx, y + dy
+            points.append([round(x * sx + tx, decimals), round(y * sy + ty, decimals)])
+        arcs.append(points)
+
+    def ring(refs: List[int]) -> List[List[float]]:
+        points: List[List[float]] = []
+        for ref in refs:
+            for p in arcs[~ref][::-1] if ref < 0 else arcs[ref]:
+                # Rounding can merge neighbouring points.
+                if not points or points[-1] != p:
+                    points.append(p)
+        return points
+
+    def polygon(rings: List[List[int]]) -> List[List[List[float]]]:
+        out = [ring(r) for r in rings]
+        if len(out[0]) < 4:
+            return []
+        return [out[0]] + [hole for hole in out[1:] if len(hole) >= 4]
+
+    features = []
+    for g in next(iter(topology["objects"].values()))["geometries"]:
+        polygons = [p for p in map(polygon, [g["arcs"]] if g["type"] == "Polygon" else g["arcs"]) if p]
+        if len(polygons) == 1:
+            geometry = {"type": "Polygon", "coordinates": polygons[0]}
+        else:
+            geometry = {"type": "MultiPolygon", "coordinates": polygons}
+        features.append({"type": "Feature", "id": g["id"], "properties": g["properties"], "geometry": geometry})
+    return {"type": "FeatureCollection", "features": features}
+
+
+# ------------------ Main ------------------
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("shp", type=Path, help="Census states .shp (the .dbf must sit next to it)")
+    parser.add_argument("--zoom", type=int, default=8, help="Detail kept, as a web map zoom level")
+    parser.add_argument("--out", type=Path, default=DEFAULT_SOURCE)
+    args = parser.parse_args()
+
+    features = []
+    for row, rings in zip(read_dbf(args.shp.with_suffix(".dbf")), read_polygons(args.shp)):
+        if row["STATEFP"] in SKIP_FIPS or not rings:
+            continue
+        features.append(
+            {"type": "Feature", "id": row["STATEFP"], "properties": {"name": row["NAME"]}, "geometry": to_geometry(rings)}
+        )
+    features.sort(key=lambda f: f["id"])
+
+    tol = tolerance_for_zoom(args.zoom)
+    collection = topology_to_geojson(build_topology({"features": features}, tol), decimals_for_tolerance(tol))
+    args.out.parent.mkdir(parents=True, exist_ok=True)
+    args.out.write_text(json.dumps(collection, separators=(",", ":")), encoding="utf-8")
+    print(f"Wrote {len(collection['features'])} states to {args.out} ({args.out.stat().st_size} bytes)")
+
+
+if __name__ == "__main__":
+    main()
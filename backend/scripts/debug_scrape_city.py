@@ -53,7 +53,7 @@ if str(REPO_ROOT) not in sys.path:
 
 # Now safe to import backend modules which rely on env vars
 
-from backend import firestore_repo as repo  # type: ignore
+from backend.repository import repo  # type: ignore
 from backend import social_scraper  # type: ignore
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s:%(name)s:%(message)s")
@@ -119,7 +119,7 @@ def main() -> None:
         # Monkey-patch social_scraper._run_actor so that it only prints the
         # actor ID & payload instead of invoking the network request.
 
-        def _echo_run_actor(actor_id: str, run_input: dict[str, Any]):  # type: ignore
+        def _echo_run_actor(actor_id: str, run_input: dict[str, Any], use_cache: bool = True):  # type: ignore
             logger.info("[DRY-RUN] Would call actor %s with payload: %s", actor_id, run_input)
             return []
 
@@ -129,7 +129,7 @@ def main() -> None:
     logger.info("Fetched %d posts", len(posts))
 
     for i, p in enumerate(posts[:10]):
-        logger.info("%02d. [%s] @%s – %s", i + 1, p.get("platform"), p.get("username"), (p.get("caption") or p.get("text") or "")[:80])
+        logger.info("%02d. [%s] @%s – %s", i + 1, p.platform, p.username, p.text[:80])
 
 
 if __name__ == "__main__":
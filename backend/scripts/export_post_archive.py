@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+"""
+Stream records from the historical post archive as JSON lines.
+
+Reads ``POST_ARCHIVE_DIR`` (default ``backend/archive``) one line at a time,
+so exporting a large archive needs constant memory.
+
+Usage:
+
+    python backend/scripts/export_post_archive.py [--city 12] [--from 2025-08-01] [--to 2025-08-31] \\
+        [--latest] [--out posts.jsonl]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from datetime import date
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from backend.post_archive import DEFAULT_ARCHIVE_DIR, PostArchive  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export the post archive as JSON lines")
+    parser.add_argument("--dir", type=Path, default=None, help="Archive directory (default: POST_ARCHIVE_DIR)")
+    parser.add_argument("--city", type=int, default=None, help="Only this city id")
+    parser.add_argument("--from", dest="start", type=date.fromisoformat, default=None, help="First day (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="end", type=date.fromisoformat, default=None, help="Last day (YYYY-MM-DD)")
+    parser.add_argument("--latest", action="store_true", help="Only the newest snapshot of each post")
+    parser.add_argument("--out", type=Path, default=None, help="Output file (default: stdout)")
+    args = parser.parse_args()
+
+    directory = args.dir or Path(os.getenv("POST_ARCHIVE_DIR") or DEFAULT_ARCHIVE_DIR)
+    archive = PostArchive(directory)
+    if args.city is not None:
+        records = archive.iter_city_records(args.city, args.start, args.end, args.latest)
+    else:
+        records = archive.iter_records(args.start, args.end, args.latest)
+
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    count = 0
+    try:
+        for rec in records:
+            out.write(json.dumps(rec, separators=(",", ":")) + "\n")
+            count += 1
+    finally:
+        if args.out:
+            out.close()
+    print(f"Exported {count} records from {directory}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+"""
+Export or restore a snapshot of status, settings, cities (with posts), merch
+and polygons.
+
+Snapshots are gzip-compressed JSON lines written while Firestore is paged
+through, so memory stays flat; see ``backend.snapshot`` for the format.
+
+Usage:
+
+    # full backup
+    python backend/scripts/firestore_snapshot.py export backups/full.jsonl.gz
+
+    # only documents changed since a timestamp, or since an earlier snapshot
+    python backend/scripts/firestore_snapshot.py export backups/inc.jsonl.gz --since backups/full.jsonl.gz
+
+    # restore into Firestore (or the emulator, via FIRESTORE_EMULATOR_HOST)
+    python backend/scripts/firestore_snapshot.py import backups/full.jsonl.gz
+
+    # restore through the configured REPO_BACKEND instead
+    python backend/scripts/firestore_snapshot.py import backups/full.jsonl.gz --target repo
+
+``--source repo`` exports through the repository interface for the SQLite
+and memory backends (full exports only).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from backend import snapshot  # noqa: E402
+from backend.posts import parse_timestamp  # noqa: E402
+
+
+def _firestore_client():
+    from firebase_admin import firestore  # type: ignore
+
+    from backend.firebase import init_firebase
+
+    init_firebase()
+    return firestore.client()
+
+
+def _since(value: str | None) -> datetime | None:
+    """``--since`` is an ISO timestamp or an earlier snapshot (its createdAt)."""
+    if not value:
+        return None
+    path = Path(value)
+    if path.exists():
+        return parse_timestamp(snapshot.read_header(path)["createdAt"])
+    ts = parse_timestamp(value)
+    if ts is None:
+        sys.exit(f"--since must be an ISO timestamp or a snapshot file: {value!r}")
+    return ts
+
+
+def export(args: argparse.Namespace) -> None:
+    since = _since(args.since)
+    if args.source == "repo":
+        if since:
+            sys.exit("Incremental exports need Firestore update times; use --source firestore")
+        from backend.repository import repo
+
+        records = snapshot.iter_repository(repo)
+    else:
+        collections = args.collections or snapshot.COLLECTIONS
+        records = snapshot.iter_firestore(_firestore_client(), collections, since=since, page_size=args.page_size)
+    count = snapshot.write_snapshot(args.file, records, source=args.source, since=since)
+    print(json.dumps({"exported": count, "file": str(args.file), "since": since.isoformat() if since else None}))
+
+
+def restore(args: argparse.Namespace) -> None:
+    header = snapshot.read_header(args.file)
+    records = snapshot.read_snapshot(args.file)
+    if args.target == "repo":
+        from backend.repository import repo
+
+        count = snapshot.import_repository(repo, records)
+    else:
+        count = snapshot.import_firestore(_firestore_client(), records, args.batch_size, args.parallel)
+    print(json.dumps({"imported": count, "file": str(args.file), "snapshotCreatedAt": header["createdAt"]}))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export/import app data snapshots")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    exp = sub.add_parser("export", help="Write a snapshot")
+    exp.add_argument("file", type=Path, help="Output path (.jsonl.gz compresses)")
+    exp.add_argument("--since", help="Only documents changed after this ISO time or snapshot file")
+    exp.add_argument("--source", choices=("firestore", "repo"), default="firestore")
+    exp.add_argument(
+        "--collections",
+        nargs="+",
+        choices=snapshot.COLLECTIONS + snapshot.OPTIONAL_COLLECTIONS,
+        help="Collections to export (default: all but scrapeIntervalDecisions)",
+    )
+    exp.add_argument("--page-size", type=int, default=1000, help="Documents per Firestore read")
+
+    imp = sub.add_parser("import", help="Restore a snapshot")
+    imp.add_argument("file", type=Path)
+    imp.add_argument("--target", choices=("firestore", "repo"), default="firestore")
+    imp.add_argument("--batch-size", type=int, default=snapshot.FIRESTORE_BATCH_LIMIT, help="Writes per batch (max 500)")
+    imp.add_argument("--parallel", type=int, default=4, help="Batches in flight")
+
+    args = parser.parse_args()
+    started = time.monotonic()
+    (export if args.command == "export" else restore)(args)
+    print(f"Done in {time.monotonic() - started:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,115 +1,511 @@
 #!/usr/bin/env python3
-"""One-time migration: copy data from local SQLite speed.db into Firestore.
+"""Stream data between the local SQLite database and Firestore.
+
+Modes:
+
+    to-firestore   SQLite -> Firestore (default)
+    to-sqlite      Firestore -> SQLite
+    verify         compare per-document checksums on both sides
 
 Usage:
-    python scripts/migrate_speeddb_to_firestore.py [--dry-run]
+    python backend/scripts/migrate_speeddb_to_firestore.py [MODE] [--db speed.db]
+        [--batch-size 500] [--parallel 8] [--page-size 1000] [--reset] [--dry-run]
+
+What moves:
+    status/current          – the ``status`` row (typed columns + ``extra``)
+    cities/<id>             – ``city`` rows, including lastCurrentAt/keywords
+    everything else         – ``document`` rows keyed by their Firestore path
+                              (settings/globals, merch, polygons,
+                              scrapeIntervalDecisions, cities/<id>/posts)
 
-Requires:
-    • Service account creds configured via FIREBASE_SERVICE_ACCOUNT_JSON env
-    • firebase-admin installed (already in backend requirements)
+SQLite is read with keyset-paginated cursors and Firestore with
+``__name__``-ordered pages, so memory stays flat however large the data.
+Firestore writes go out in batches of up to 500 with ``--parallel``
+batches in flight. Progress is checkpointed after every committed batch
+(``backend/.cache/migrate-<mode>.json``); rerunning resumes where a failed
+run stopped, ``--reset`` starts over. Writes are whole-document sets, so
+replaying a batch after a crash is harmless.
 
-Collections created:
-    status/current          – single doc representing current Status
-    cities/<id>             – docs for each City row
+Requires FIREBASE_SERVICE_ACCOUNT_JSON (or ADC) like the backend.
 """
 # mypy: ignore-errors
 from __future__ import annotations
 
 import argparse
-import datetime as dt
+import hashlib
+import json
 import os
 import sqlite3
 import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from backend.posts import parse_timestamp  # noqa: E402
+from backend.sqlite_repo import CITY_COLUMNS  # noqa: E402
+
+BACKEND_DIR = REPO_ROOT / "backend"
+CHECKPOINT_DIR = BACKEND_DIR / ".cache"
+FIRESTORE_BATCH_LIMIT = 500
+COMMIT_RETRIES = 4
+
+# Firestore collections copied back into the ``document`` table
+# (posts are read with a collection-group query over cities/*/posts).
+DOCUMENT_COLLECTIONS = ("settings", "merch", "scrapeIntervalDecisions", "polygons")
+POSTS_SUB = "posts"
+
+# (collection, doc_id, data, resume_key)
+Row = tuple[str, str, dict[str, Any], Any]
+
+
+def default_db_path() -> Path:
+    url = os.getenv("DATABASE_URL", "")
+    if url.startswith("sqlite:///"):
+        return Path(url[len("sqlite:///"):])
+    return BACKEND_DIR / "speed.db"
+
+
+# ------------------ Value conversion ------------------
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return _iso_utc(value)
+    return str(value)
+
+
+def _iso_utc(value: Any) -> Optional[str]:
+    ts = parse_timestamp(value)
+    return ts.astimezone(timezone.utc).isoformat() if ts else None
+
+
+def _sql_datetime(value: Any) -> Optional[str]:
+    """Naive UTC in SQLAlchemy's SQLite storage format."""
+    ts = parse_timestamp(value)
+    return ts.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f") if ts else None
+
+
+def _status_doc(row: sqlite3.Row) -> dict[str, Any]:
+    if row["extra"]:
+        return json.loads(row["extra"])
+    return {
+        "lat": row["lat"],
+        "lng": row["lng"],
+        "state": row["state"],
+        "quote": row["quote"],
+        "city": row["city"],
+        "city_polygon": row["city_polygon"],
+        "isSleep": bool(row["is_sleep"]),
+        "lastUpdated": _iso_utc(row["last_updated"]),
+    }
+
+
+def _city_doc(row: sqlite3.Row) -> dict[str, Any]:
+    doc = json.loads(row["extra"]) if row["extra"] else {}
+    for field, column in CITY_COLUMNS.items():
+        value = row[column]
+        if value is None:
+            continue
+        if column == "last_current_at":
+            value = _iso_utc(value)
+        elif column == "is_current":
+            value = bool(value)
+        doc[field] = value
+    return doc
+
+
+def _status_params(doc: dict[str, Any]) -> tuple:
+    return (
+        doc.get("lat") or 0.0,
+        doc.get("lng") or 0.0,
+        doc.get("state"),
+        doc.get("quote") or "",
+        doc.get("city"),
+        doc.get("city_polygon"),
+        bool(doc.get("isSleep", False)),
+        _sql_datetime(doc.get("lastUpdated")) or _sql_datetime(datetime.now(timezone.utc)),
+        json.dumps(doc, default=_json_default),
+    )
 
-# Ensure project root on PYTHONPATH so `backend` is importable when script run directly
-ROOT = Path(__file__).resolve().parent.parent
-if str(ROOT) not in sys.path:
-    sys.path.append(str(ROOT))
 
-from firebase_admin import firestore  # type: ignore
+def _city_params(city_id: int, doc: dict[str, Any]) -> tuple:
+    extra = {k: v for k, v in doc.items() if k not in CITY_COLUMNS}
+    return (
+        city_id,
+        doc.get("city") or "",
+        doc.get("state") or "",
+        doc.get("lat") or 0.0,
+        doc.get("lng") or 0.0,
+        doc.get("order") or 0,
+        bool(doc.get("isCurrent", False)),
+        _sql_datetime(doc.get("lastCurrentAt")),
+        doc.get("keywords"),
+        json.dumps(extra, default=_json_default) if extra else None,
+    )
 
-# Initialise Firebase Admin (re-uses singleton across imports)
-from backend.firebase import init_firebase  # noqa: E402
 
-init_firebase()
+def _canonical(value: Any) -> Any:
+    """Representation shared by both stores: UTC ISO datetimes, integral floats as ints."""
+    if isinstance(value, dict):
+        return {k: _canonical(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, datetime):
+        return _iso_utc(value)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
 
-# Paths
-ROOT = Path(__file__).resolve().parent.parent
-DB_PATH = ROOT / "speed.db"
 
+def digest(collection: str, doc: dict[str, Any]) -> bytes:
+    doc = _canonical(doc)
+    if collection == "cities" and "lastCurrentAt" in doc:
+        doc["lastCurrentAt"] = _iso_utc(doc["lastCurrentAt"])
+    if collection == "status" and "lastUpdated" in doc:
+        doc["lastUpdated"] = _iso_utc(doc["lastUpdated"])
+    body = json.dumps(doc, sort_keys=True, separators=(",", ":"), default=_json_default)
+    return hashlib.blake2b(body.encode(), digest_size=16).digest()
 
-def fetch_sqlite_rows() -> tuple[dict[str, Any] | None, list[dict[str, Any]]]:
-    if not DB_PATH.exists():
-        raise FileNotFoundError(f"SQLite DB not found at {DB_PATH}")
 
-    conn = sqlite3.connect(DB_PATH)
+# ------------------ Checkpoint ------------------
+
+
+class Checkpoint:
+    """Last committed resume key per stream, persisted after every batch."""
+
+    DONE = "__done__"
+
+    def __init__(self, path: Path, mode: str, reset: bool = False) -> None:
+        self.path = path
+        self.mode = mode
+        self.streams: dict[str, Any] = {}
+        if path.exists() and not reset:
+            data = json.loads(path.read_text())
+            if data.get("mode") == mode:
+                self.streams = data.get("streams", {})
+
+    def after(self, stream: str) -> Any:
+        return self.streams.get(stream)
+
+    def is_done(self, stream: str) -> bool:
+        return self.streams.get(stream) == self.DONE
+
+    def advance(self, stream: str, key: Any) -> None:
+        self.streams[stream] = key
+        self._save()
+
+    def finish(self, stream: str) -> None:
+        self.advance(stream, self.DONE)
+
+    def clear(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"mode": self.mode, "streams": self.streams}))
+        os.replace(tmp, self.path)
+
+
+# ------------------ SQLite side ------------------
+
+
+def connect_sqlite(db_path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path)
     conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
+    conn.execute("PRAGMA busy_timeout=5000")
+    return conn
+
+
+def ensure_sqlite_schema(db_path: Path) -> None:
+    """Create the SQLModel tables (and ``extra`` columns) the repository expects."""
+    from sqlmodel import create_engine
+
+    from backend.sqlite_repo import SQLiteRepository
+
+    SQLiteRepository(create_engine(f"sqlite:///{db_path}"))
+
+
+def _sqlite_rows(conn: sqlite3.Connection, stream: str, after: Any, page_size: int) -> Iterator[Row]:
+    """Keyset-paginated reads; each row carries the key to resume after it."""
+    if stream == "status":
+        row = conn.execute("SELECT * FROM status ORDER BY id LIMIT 1").fetchone()
+        if row is not None:
+            yield "status", "current", _status_doc(row), row["id"]
+        return
+
+    query, to_row = {
+        "cities": (
+            "SELECT * FROM city WHERE id > ? ORDER BY id LIMIT ?",
+            lambda r: ("cities", str(r["id"]), _city_doc(r), r["id"]),
+        ),
+        "documents": (
+            "SELECT rowid, collection, id, data FROM document WHERE rowid > ? ORDER BY rowid LIMIT ?",
+            lambda r: (r["collection"], r["id"], json.loads(r["data"]), r["rowid"]),
+        ),
+    }[stream]
+    last = after if after is not None else -1
+    while True:
+        rows = conn.execute(query, (last, page_size)).fetchall()
+        for row in rows:
+            yield to_row(row)
+        if len(rows) < page_size:
+            return
+        last = to_row(rows[-1])[3]
+
+
+SQLITE_STREAMS = ("status", "cities", "documents")
 
-    cur.execute("SELECT * FROM status LIMIT 1")
-    status_row = cur.fetchone()
-    status: dict[str, Any] | None = dict(status_row) if status_row else None
 
-    cur.execute("SELECT * FROM city")
-    cities_rows = [dict(r) for r in cur.fetchall()]
+# ------------------ Firestore side ------------------
 
+
+def firestore_client():
+    from firebase_admin import firestore  # type: ignore
+
+    from backend.firebase import init_firebase
+
+    init_firebase()
+    return firestore.client()
+
+
+def _firestore_query(client, stream: str):
+    if stream == "cities":
+        return client.collection("cities")
+    if stream == POSTS_SUB:
+        return client.collection_group(POSTS_SUB)
+    return client.collection(stream)
+
+
+def _firestore_pages(client, stream: str, after: Optional[str], page_size: int) -> Iterator[list]:
+    """``__name__``-ordered pages; the next page is fetched while the caller handles this one."""
+    if stream == "status":
+        snap = client.collection("status").document("current").get()
+        if snap.exists:
+            yield [snap]
+        return
+
+    query = _firestore_query(client, stream).order_by("__name__")
+
+    def fetch(cursor):
+        q = query.limit(page_size)
+        if cursor is not None:
+            q = q.start_after(cursor)
+        return list(q.stream())
+
+    cursor = client.document(after).get() if after else None
+    with ThreadPoolExecutor(max_workers=1) as prefetch:
+        page = fetch(cursor)
+        while page:
+            nxt = prefetch.submit(fetch, page[-1]) if len(page) == page_size else None
+            yield page
+            page = nxt.result() if nxt else []
+
+
+FIRESTORE_STREAMS = ("status", "cities", *DOCUMENT_COLLECTIONS, POSTS_SUB)
+
+
+def _firestore_rows(client, stream: str, after: Optional[str], page_size: int) -> Iterator[Row]:
+    for page in _firestore_pages(client, stream, after, page_size):
+        for snap in page:
+            yield snap.reference.parent.path, snap.id, snap.to_dict() or {}, snap.reference.path
+
+
+def _commit_batch(client, rows: list[Row]) -> int:
+    for attempt in range(COMMIT_RETRIES):
+        batch = client.batch()
+        for collection, doc_id, data, _ in rows:
+            batch.set(client.collection(collection).document(doc_id), data)
+        try:
+            batch.commit()
+            return len(rows)
+        except Exception as exc:  # noqa: BLE001 – transient RPC errors
+            if attempt == COMMIT_RETRIES - 1:
+                raise
+            delay = 2**attempt
+            print(f"  batch commit failed ({exc}); retrying in {delay}s", file=sys.stderr)
+            time.sleep(delay)
+    return 0
+
+
+def write_firestore(
+    client,
+    rows: Iterable[Row],
+    batch_size: int,
+    parallel: int,
+    on_commit: Callable[[Any, int], None],
+) -> None:
+    """Commit **rows** in batches with at most **parallel** batches in flight.
+
+    ``on_commit`` is called in submission order, so a checkpoint never skips
+    past a batch that has not been written.
+    """
+    pending: deque = deque()
+    with ThreadPoolExecutor(max_workers=parallel) as pool:
+
+        def drain(limit: int) -> None:
+            while len(pending) > limit:
+                future, key = pending.popleft()
+                on_commit(key, future.result())
+
+        batch: list[Row] = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                pending.append((pool.submit(_commit_batch, client, batch), row[3]))
+                batch = []
+                drain(parallel)
+        if batch:
+            pending.append((pool.submit(_commit_batch, client, batch), batch[-1][3]))
+        drain(0)
+
+
+# ------------------ Modes ------------------
+
+
+def to_firestore(args, checkpoint: Checkpoint) -> None:
+    conn = connect_sqlite(args.db)
+    client = None if args.dry_run else firestore_client()
+    for stream in SQLITE_STREAMS:
+        if checkpoint.is_done(stream):
+            print(f"{stream}: already migrated")
+            continue
+        started, copied = time.monotonic(), 0
+        rows = _sqlite_rows(conn, stream, checkpoint.after(stream), args.page_size)
+        if args.dry_run:
+            copied = sum(1 for _ in rows)
+        else:
+
+            def committed(key: Any, count: int, stream: str = stream) -> None:
+                nonlocal copied
+                copied += count
+                checkpoint.advance(stream, key)
+
+            write_firestore(client, rows, args.batch_size, args.parallel, committed)
+            checkpoint.finish(stream)
+        print(f"{stream}: {copied} docs in {time.monotonic() - started:.1f}s")
     conn.close()
-    return status, cities_rows
-
-
-def iso(dt_val: Any) -> str | None:
-    if dt_val is None:
-        return None
-    if isinstance(dt_val, str):
-        return dt_val
-    if isinstance(dt_val, (int, float)):
-        return dt.datetime.utcfromtimestamp(dt_val).isoformat()
-    if isinstance(dt_val, dt.datetime):
-        return dt_val.isoformat()
-    return str(dt_val)
-
-
-def migrate(dry_run: bool = False) -> None:
-    status, cities = fetch_sqlite_rows()
-    client = firestore.client()
-
-    # --- Migrate status ---
-    if status:
-        doc = {
-            "lat": status["lat"],
-            "lng": status["lng"],
-            "state": status["state"],
-            "quote": status["quote"],
-            "city": status.get("city"),
-            "cityPolygon": status.get("city_polygon"),
-            "isSleep": bool(status.get("is_sleep")),
-            "lastUpdated": iso(status.get("last_updated")),
-        }
-        print("Status document:", doc)
-        if not dry_run:
-            client.collection("status").document("current").set(doc)
-
-    # --- Migrate cities ---
-    for row in cities:
-        city_doc = {
-            "city": row["city"],
-            "state": row["state"],
-            "lat": row["lat"],
-            "lng": row["lng"],
-            "order": row["order"],
-            "isCurrent": bool(row["is_current"]),
-        }
-        print(f"City {row['id']}: {city_doc}")
-        if not dry_run:
-            client.collection("cities").document(str(row["id"])).set(city_doc)
-
-    print("Migration complete." if not dry_run else "Dry-run complete; no data written.")
 
 
-if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Migrate speed.db to Firestore")
-    parser.add_argument("--dry-run", action="store_true", help="Print docs without writing")
+def to_sqlite(args, checkpoint: Checkpoint) -> None:
+    client = firestore_client()
+    if not args.dry_run:
+        ensure_sqlite_schema(args.db)
+    conn = connect_sqlite(args.db)
+    for stream in FIRESTORE_STREAMS:
+        if checkpoint.is_done(stream):
+            print(f"{stream}: already migrated")
+            continue
+        started, copied = time.monotonic(), 0
+        for page in _firestore_pages(client, stream, checkpoint.after(stream), args.page_size):
+            if not args.dry_run:
+                with conn:  # one transaction per page
+                    _write_sqlite_page(conn, stream, page)
+                checkpoint.advance(stream, page[-1].reference.path)
+            copied += len(page)
+        if not args.dry_run:
+            checkpoint.finish(stream)
+        print(f"{stream}: {copied} docs in {time.monotonic() - started:.1f}s")
+    conn.close()
+
+
+def _write_sqlite_page(conn: sqlite3.Connection, stream: str, page: list) -> None:
+    if stream == "status":
+        conn.execute("DELETE FROM status")
+        conn.execute(
+            "INSERT INTO status (id, lat, lng, state, quote, city, city_polygon, is_sleep, last_updated, extra)"
+            " VALUES (1, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            _status_params(page[0].to_dict() or {}),
+        )
+    elif stream == "cities":
+        conn.executemany(
+            'INSERT OR REPLACE INTO city (id, city, state, lat, lng, "order", is_current, last_current_at, keywords, extra)'
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [_city_params(int(snap.id), snap.to_dict() or {}) for snap in page],
+        )
+    else:
+        params = []
+        for snap in page:
+            data = snap.to_dict() or {}
+            score = data.get("score") if stream == POSTS_SUB else None
+            params.append((snap.reference.parent.path, snap.id, json.dumps(data, default=_json_default), score))
+        conn.executemany("INSERT OR REPLACE INTO document (collection, id, data, score) VALUES (?, ?, ?, ?)", params)
+
+
+def verify(args) -> bool:
+    """Compare both stores document by document; True when they match."""
+    conn = connect_sqlite(args.db)
+    client = firestore_client()
+
+    local: dict[str, bytes] = {}
+    for stream in SQLITE_STREAMS:
+        for collection, doc_id, data, _ in _sqlite_rows(conn, stream, None, args.page_size):
+            local[f"{collection}/{doc_id}"] = digest(collection, data)
+    conn.close()
+
+    remote: dict[str, bytes] = {}
+    for stream in FIRESTORE_STREAMS:
+        for collection, doc_id, data, _ in _firestore_rows(client, stream, None, args.page_size):
+            remote[f"{collection}/{doc_id}"] = digest(collection, data)
+
+    missing = sorted(local.keys() - remote.keys())
+    extra = sorted(remote.keys() - local.keys())
+    differ = sorted(k for k in local.keys() & remote.keys() if local[k] != remote[k])
+
+    def combined(digests: dict[str, bytes]) -> str:
+        h = hashlib.blake2b(digest_size=16)
+        for key in sorted(digests):
+            h.update(key.encode())
+            h.update(digests[key])
+        return h.hexdigest()
+
+    print(json.dumps({
+        "sqlite": {"docs": len(local), "checksum": combined(local)},
+        "firestore": {"docs": len(remote), "checksum": combined(remote)},
+        "onlyInSqlite": len(missing),
+        "onlyInFirestore": len(extra),
+        "different": len(differ),
+    }, indent=2))
+    for label, keys in (("only in SQLite", missing), ("only in Firestore", extra), ("different", differ)):
+        for key in keys[: args.show]:
+            print(f"  {label}: {key}")
+    return not (missing or extra or differ)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Migrate data between speed.db and Firestore")
+    parser.add_argument("mode", nargs="?", default="to-firestore", choices=("to-firestore", "to-sqlite", "verify"))
+    parser.add_argument("--db", type=Path, default=default_db_path(), help="SQLite database file")
+    parser.add_argument("--batch-size", type=int, default=FIRESTORE_BATCH_LIMIT, help="Docs per Firestore batch (max 500)")
+    parser.add_argument("--parallel", type=int, default=8, help="Firestore batches in flight")
+    parser.add_argument("--page-size", type=int, default=1000, help="Rows/docs per read page")
+    parser.add_argument("--checkpoint", type=Path, help="Checkpoint file (default backend/.cache/migrate-<mode>.json)")
+    parser.add_argument("--reset", action="store_true", help="Ignore an existing checkpoint and start over")
+    parser.add_argument("--dry-run", action="store_true", help="Read and count without writing")
+    parser.add_argument("--show", type=int, default=20, help="Mismatched paths to list in verify mode")
     args = parser.parse_args()
-    migrate(dry_run=args.dry_run)
+    args.batch_size = max(1, min(args.batch_size, FIRESTORE_BATCH_LIMIT))
+    args.parallel = max(1, args.parallel)
+
+    if args.mode == "verify":
+        sys.exit(0 if verify(args) else 1)
+    if args.mode == "to-firestore" and not args.db.exists():
+        sys.exit(f"SQLite DB not found at {args.db}")
+
+    checkpoint = Checkpoint(args.checkpoint or CHECKPOINT_DIR / f"migrate-{args.mode}.json", args.mode, args.reset)
+    started = time.monotonic()
+    (to_firestore if args.mode == "to-firestore" else to_sqlite)(args, checkpoint)
+    if not args.dry_run:
+        checkpoint.clear()
+    print(f"{'Dry-run' if args.dry_run else 'Migration'} complete in {time.monotonic() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
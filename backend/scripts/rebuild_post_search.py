@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""
+Backfill the post search index from the post archive and the repository.
+
+The index is normally updated as scrapes save posts; run this once after
+enabling search, or to rebuild ``POST_SEARCH_DB`` from scratch. Archive
+records are indexed first (newest snapshot per post), then each city's
+currently saved posts so their scores win.
+
+Usage:
+
+    python backend/scripts/rebuild_post_search.py [--no-archive] [--no-repo] [--batch 5000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from backend import post_archive, post_search  # noqa: E402
+from backend.posts import Post  # noqa: E402
+
+
+def _flush(index: post_search.PostSearchIndex, batch: list[tuple[int, Post]]) -> int:
+    by_city: dict[int, list[Post]] = {}
+    for city_id, post in batch:
+        by_city.setdefault(city_id, []).append(post)
+    return sum(index.add(city_id, posts) for city_id, posts in by_city.items())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild the post full-text search index")
+    parser.add_argument("--no-archive", action="store_true", help="Skip the historical archive")
+    parser.add_argument("--no-repo", action="store_true", help="Skip currently saved posts")
+    parser.add_argument("--batch", type=int, default=5000, help="Posts per index transaction")
+    args = parser.parse_args()
+
+    index = post_search.index
+    if index is None:
+        sys.exit("Post search is disabled (POST_SEARCH_ENABLED=0 or SQLite lacks FTS5)")
+
+    total = 0
+    batch: list[tuple[int, Post]] = []
+
+    if not args.no_archive and post_archive.archive is not None:
+        for rec in post_archive.archive.iter_records(latest=True):
+            batch.append((int(rec["cityId"]), Post.from_dict(rec)))
+            if len(batch) >= args.batch:
+                total += _flush(index, batch)
+                batch.clear()
+        total += _flush(index, batch)
+        batch.clear()
+        print(f"Indexed {total} archived posts")
+
+    if not args.no_repo:
+        from backend.repository import repo
+
+        for city in repo.list_cities():
+            # Docs saved before the compact Post record lack postId; skip them.
+            posts = [Post.from_dict(d) for d in repo.list_city_posts(city["id"]) if d.get("postId")]
+            total += index.add(city["id"], posts)
+        print(f"Indexed {total} posts in total")
+
+    print(json.dumps({"indexedRows": index.count(), "db": str(index.path)}))
+
+
+if __name__ == "__main__":
+    main()
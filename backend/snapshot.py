@@ -0,0 +1,294 @@
+"""Streaming snapshots of the app's data for backups and dev seeding.
+
+A snapshot is gzip-compressed JSON lines (plain ``.jsonl`` is read too):
+
+* line 1 – header ``{"snapshot": 1, "createdAt", "since", "source"}``;
+* then one record per document ``{"path", "updateTime", "data"}``, where
+  ``path`` is the Firestore document path (``status/current``,
+  ``cities/7``, ``cities/7/posts/<id>``, ``merch/<id>``, ...).
+
+Datetimes are written as ``{"$ts": "<iso>"}`` so Firestore timestamps come
+back as timestamps. Firestore is read in ``__name__``-ordered pages, so
+memory stays flat, and records are written as they are read.
+
+**Incremental** exports (``since``) keep only documents whose Firestore
+``update_time`` is newer; Firestore cannot filter on it server-side, so
+every document is still read. Deletions are not captured – restore a full
+snapshot first, then apply incrementals on top.
+
+Snapshots import either straight into Firestore (batched writes) or
+through any repository backend (``seed_repository`` at startup).
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+import json
+import logging
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional, TextIO
+
+from backend.posts import Post, parse_timestamp
+from backend.repo_base import MAX_CITY_POSTS
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+FIRESTORE_BATCH_LIMIT = 500
+DEFAULT_SEED = Path(__file__).resolve().parent / "seed" / "dev_snapshot.jsonl"
+
+# Firestore collections in export order; "posts" is the cities/*/posts group.
+COLLECTIONS = ("status", "settings", "cities", "posts", "merch", "polygons")
+OPTIONAL_COLLECTIONS = ("scrapeIntervalDecisions",)
+
+Record = dict[str, Any]
+
+
+# ------------------ Encoding ------------------
+
+
+def encode(value: Any) -> Any:
+    if isinstance(value, datetime):
+        ts = value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+        return {"$ts": ts.isoformat()}
+    if isinstance(value, dict):
+        return {k: encode(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [encode(v) for v in value]
+    return value
+
+
+def decode(value: Any) -> Any:
+    if isinstance(value, dict):
+        if len(value) == 1 and "$ts" in value:
+            return parse_timestamp(value["$ts"])
+        return {k: decode(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [decode(v) for v in value]
+    return value
+
+
+def _open_text(path: Path, mode: str, compressed: Optional[bool] = None) -> TextIO:
+    """Text handle on **path**; gzip is detected from the magic bytes when reading."""
+    if compressed is None:
+        with open(path, "rb") as fh:
+            compressed = fh.read(2) == b"\x1f\x8b"
+    if compressed:
+        return io.TextIOWrapper(gzip.open(path, mode + "b", compresslevel=6), encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+# ------------------ Reading / writing files ------------------
+
+
+def write_snapshot(path: Path, records: Iterable[Record], source: str, since: Optional[datetime] = None) -> int:
+    """Stream **records** to **path**; returns the number written."""
+    header = {
+        "snapshot": FORMAT_VERSION,
+        "createdAt": datetime.now(timezone.utc).isoformat(),
+        "since": since.isoformat() if since else None,
+        "source": source,
+    }
+    count = 0
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".part")
+    with _open_text(tmp, "w", compressed=path.suffix == ".gz") as fh:
+        fh.write(json.dumps(header) + "\n")
+        for rec in records:
+            fh.write(json.dumps(encode(rec), separators=(",", ":"), default=str) + "\n")
+            count += 1
+    tmp.replace(path)
+    return count
+
+
+def read_header(path: Path) -> dict[str, Any]:
+    with _open_text(path, "r") as fh:
+        header = json.loads(fh.readline())
+    if header.get("snapshot") != FORMAT_VERSION:
+        raise ValueError(f"{path} is not a version {FORMAT_VERSION} snapshot")
+    return header
+
+
+def read_snapshot(path: Path) -> Iterator[Record]:
+    """Records of the snapshot at **path**, one line at a time."""
+    read_header(path)
+    with _open_text(path, "r") as fh:
+        fh.readline()
+        for line in fh:
+            if line.strip():
+                yield decode(json.loads(line))
+
+
+# ------------------ Firestore ------------------
+
+
+def _query(client, collection: str):
+    if collection == "posts":
+        return client.collection_group("posts")
+    return client.collection(collection)
+
+
+def iter_firestore(
+    client,
+    collections: Iterable[str] = COLLECTIONS,
+    since: Optional[datetime] = None,
+    page_size: int = 1000,
+) -> Iterator[Record]:
+    """Page through **collections** ordered by document name."""
+    for collection in collections:
+        base = _query(client, collection).order_by("__name__")
+        last = None
+        while True:
+            query = base.limit(page_size)
+            if last is not None:
+                query = query.start_after(last)
+            page = list(query.stream())
+            for snap in page:
+                updated = getattr(snap, "update_time", None)
+                if since and updated and updated <= since:
+                    continue
+                yield {
+                    "path": snap.reference.path,
+                    "updateTime": updated.isoformat() if updated else None,
+                    "data": snap.to_dict() or {},
+                }
+            if len(page) < page_size:
+                break
+            last = page[-1]
+
+
+def import_firestore(client, records: Iterable[Record], batch_size: int = FIRESTORE_BATCH_LIMIT, parallel: int = 4) -> int:
+    """Whole-document sets in batches, with at most **parallel** batches in flight."""
+    batch_size = max(1, min(batch_size, FIRESTORE_BATCH_LIMIT))
+    written = 0
+    pending = []
+
+    def commit(recs: list[Record]) -> int:
+        batch = client.batch()
+        for rec in recs:
+            batch.set(client.document(rec["path"]), rec["data"])
+        batch.commit()
+        return len(recs)
+
+    with ThreadPoolExecutor(max_workers=parallel) as pool:
+        chunk: list[Record] = []
+        for rec in records:
+            chunk.append(rec)
+            if len(chunk) >= batch_size:
+                pending.append(pool.submit(commit, chunk))
+                chunk = []
+                while len(pending) > parallel:
+                    written += pending.pop(0).result()
+        if chunk:
+            pending.append(pool.submit(commit, chunk))
+        for future in pending:
+            written += future.result()
+    return written
+
+
+# ------------------ Repository ------------------
+
+
+def iter_repository(repo: Any) -> Iterator[Record]:
+    """Full export through the repository interface (non-Firestore backends)."""
+    status = repo.get_status()
+    if status:
+        yield {"path": "status/current", "updateTime": None, "data": status}
+        ref = status.get("cityPolygonRef") or {}
+        polygon = repo.get_polygon(ref["id"]) if ref.get("id") else None
+        if polygon:
+            yield {"path": f"polygons/{ref['id']}", "updateTime": None, "data": polygon}
+    yield {"path": "settings/globals", "updateTime": None, "data": repo.get_settings()}
+    for city in repo.list_cities():
+        city_id = city.pop("id")
+        yield {"path": f"cities/{city_id}", "updateTime": None, "data": city}
+        for post in repo.list_city_posts(city_id):
+            post_id = post.pop("id")
+            yield {"path": f"cities/{city_id}/posts/{post_id}", "updateTime": None, "data": post}
+    for item in repo.list_merch():
+        item_id = item.pop("id")
+        yield {"path": f"merch/{item_id}", "updateTime": None, "data": item}
+
+
+def import_repository(repo: Any, records: Iterable[Record]) -> int:
+    """Apply **records** through the repository's write methods.
+
+    Posts are buffered per city and merged with the city's saved posts,
+    since ``save_city_posts`` replaces the whole set.
+    """
+    count = 0
+    posts: dict[int, list[Post]] = defaultdict(list)
+    for rec in records:
+        parts = rec["path"].split("/")
+        data = rec["data"]
+        collection = parts[0]
+        if parts[:2] == ["status", "current"]:
+            repo.update_status(dict(data))
+        elif collection == "cities" and len(parts) == 2:
+            repo.update_city(int(parts[1]), data)
+        elif collection == "cities" and len(parts) == 4 and parts[2] == "posts":
+            if data.get("postId"):
+                posts[int(parts[1])].append(Post.from_dict(data))
+            continue
+        elif parts[:2] == ["settings", "globals"]:
+            repo.update_settings(data)
+        elif collection == "merch":
+            repo.update_merch(parts[1], data)
+        elif collection == "polygons":
+            repo.save_polygon(parts[1], data)
+        elif collection == "scrapeIntervalDecisions":
+            repo.add_interval_decision(data)
+        else:
+            logger.warning("Snapshot record %s has no repository mapping; skipped", rec["path"])
+            continue
+        count += 1
+
+    for city_id, incoming in posts.items():
+        merged = {p.doc_id: p for p in (Post.from_dict(d) for d in repo.list_city_posts(city_id) if d.get("postId"))}
+        merged.update((p.doc_id, p) for p in incoming)
+        ranked = sorted(merged.values(), key=lambda p: p.score, reverse=True)
+        repo.save_city_posts(city_id, ranked[:MAX_CITY_POSTS])
+        count += len(incoming)
+    return count
+
+
+def seed_path_from_env() -> Optional[Path]:
+    """Snapshot to seed from at startup, or None.
+
+    Opt-in: ``SEED_SNAPSHOT`` (empty disables), otherwise the bundled dev seed
+    for the local ``memory``/``sqlite`` backends only – never implicitly
+    against Firestore.
+    """
+    explicit = os.getenv("SEED_SNAPSHOT")
+    if explicit is not None:
+        return Path(explicit) if explicit else None
+    if os.getenv("REPO_BACKEND", "firestore").lower() in ("memory", "sqlite"):
+        return DEFAULT_SEED
+    return None
+
+
+def seed_repository(repo: Any, path: Path = DEFAULT_SEED) -> int:
+    """Load **path** into an empty repository (dev startup).
+
+    The status document is seeded when missing; everything else only when
+    there are no cities yet, so an existing journey is never touched.
+    """
+    if not path.exists():
+        logger.warning("Seed snapshot %s not found", path)
+        return 0
+    have_status = repo.get_status() is not None
+    have_cities = bool(repo.list_cities())
+    if have_status and have_cities:
+        return 0
+
+    def wanted(rec: Record) -> bool:
+        return not have_status if rec["path"].startswith("status/") else not have_cities
+
+    count = import_repository(repo, (r for r in read_snapshot(path) if wanted(r)))
+    logger.info("Seeded %d documents from %s", count, path)
+    return count
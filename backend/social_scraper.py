@@ -8,28 +8,24 @@ routes here. They can be imported by a scheduler/background task. Logic:
 1. Determine the timestamp when the current city was activated (``lastCurrentAt``).
 2. For each configured profile handle (``SOCIAL_PROFILES`` env, comma-separated),
    run Apify Instagram & TikTok actor searches for mentions newer than that time.
-3. Combine, deduplicate, and score the results (basic likeCount/created order for now).
-4. Caller (e.g. scheduler) is responsible for persisting results to Firestore.
+3. Normalise every actor item once into a compact ``Post`` (see ``backend.posts``).
+4. Combine, deduplicate (exact ids, then near-duplicate captions/media), and
+   rank the results (time-decayed engagement, bounded-heap top-k).
+5. Caller (e.g. scheduler) is responsible for persisting results to Firestore.
 """
 
 import os
 import logging
+import time
 from datetime import datetime, timezone
-from typing import Any, List
+from typing import Any, Callable, List
 
-
-def _contains_keywords(post: dict[str, Any], terms: list[str]) -> bool:
-    """Return True if any of the given terms appear in post caption/text."""
-    searchable_fields = [
-        post.get("caption"),
-        post.get("text"),
-        post.get("description"),
-        post.get("title"),
-    ]
-    blob = " ".join([s for s in searchable_fields if isinstance(s, str)]).lower()
-    if not blob:
-        return False
-    return any(term.lower() in blob for term in terms if term)
+from backend import metrics, post_archive, tracing
+from backend.actor_cache import cache_from_env
+from backend.keyword_matcher import KeywordMatcher
+from backend.near_dupes import DEFAULT_THRESHOLD as NEAR_DUP_DEFAULT_THRESHOLD, collapse_near_duplicates
+from backend.ranking import Scorer, top_k
+from backend.posts import INSTAGRAM, TIKTOK, TWITTER, Post, normalize_items, parse_timestamp
 
 
 try:
@@ -59,61 +55,67 @@ INSTAGRAM_ACTOR = os.getenv("APIFY_INSTAGRAM_ACTOR", "apify/instagram-scraper")
 TIKTOK_ACTOR = os.getenv("APIFY_TIKTOK_ACTOR", "clockworks/tiktok-scraper")
 TWITTER_ACTOR = os.getenv("APIFY_TWITTER_ACTOR", "apidojo/tweet-scraper")
 
+# Results of identical actor calls are reused for APIFY_CACHE_TTL_SEC.
+actor_cache = cache_from_env()
+
 
 # ------------------ Core helpers ------------------
 
-def _run_actor(actor_id: str, run_input: dict[str, Any]) -> List[dict[str, Any]]:
-    """Invoke an Apify actor and return its dataset items list."""
+def _call_actor(actor_id: str, run_input: dict[str, Any]) -> List[dict[str, Any]]:
+    """Run the actor and fetch its dataset items; raises on failure."""
+    logger.debug("Calling Apify actor %s with payload: %s", actor_id, run_input)
+    start = time.perf_counter()
+    try:
+        run = client.actor(actor_id).call(run_input=run_input)
+        dataset_id = run["defaultDatasetId"]
+        items: List[dict[str, Any]] = list(client.dataset(dataset_id).iterate_items())
+    except Exception:
+        metrics.apify_runs.inc(actor=actor_id, outcome="error")
+        raise
+    finally:
+        metrics.apify_duration.observe(time.perf_counter() - start, actor=actor_id)
+    metrics.apify_runs.inc(actor=actor_id, outcome="ok")
+    logger.debug("Fetched %s items from actor %s", len(items), actor_id)
+    return items
+
+
+def _run_actor(actor_id: str, run_input: dict[str, Any], use_cache: bool = True) -> List[dict[str, Any]]:
+    """Invoke an Apify actor and return its dataset items list.
+
+    Fresh results of an identical earlier call are served from ``actor_cache``
+    and concurrent identical calls share one actor run. ``use_cache=False``
+    forces a new run (whose result then refreshes the cache).
+    """
     if not client:
         logger.debug("Apify client not initialised; returning empty results")
         return []
 
     try:
-        logger.debug("Calling Apify actor %s with payload: %s", actor_id, run_input)
-        run = client.actor(actor_id).call(run_input=run_input)
-        dataset_id = run["defaultDatasetId"]
-        items: List[dict[str, Any]] = list(client.dataset(dataset_id).iterate_items())
-        logger.debug("Fetched %s items from actor %s", len(items), actor_id)
-        return items
+        with tracing.span("apify.run_actor", kind=tracing.KIND_CLIENT, actor=actor_id, use_cache=use_cache):
+            return actor_cache.get_or_compute(
+                actor_id,
+                run_input,
+                lambda: _call_actor(actor_id, run_input),
+                bypass=not use_cache,
+            )
     except Exception as exc:
         logger.error("Apify actor %s failed: %s", actor_id, exc)
         return []
 
 
-def _filter_since(items: List[dict[str, Any]], dt: datetime, time_key: str) -> List[dict[str, Any]]:
-    """Return items whose **time_key** ISO timestamp is >= **dt**.
+def _filter_since(posts: List[Post], dt: datetime) -> List[Post]:
+    """Return posts whose (already parsed) timestamp is >= **dt**.
 
-    Handles comparisons safely between offset-aware and offset-naive datetimes by
-    normalising both to *naive UTC* before comparison.
+    Naive **dt** values are treated as UTC; post timestamps are always aware UTC.
     """
-
-    # Normalise **dt** to naive UTC
-    if dt.tzinfo is not None:
-        dt_cmp = dt.astimezone(timezone.utc).replace(tzinfo=None)
-    else:
-        dt_cmp = dt
-
-    res = []
-    for it in items:
-        ts_raw = it.get(time_key)  # Expect ISO-8601 string
-        if not ts_raw:
-            continue
-        try:
-            ts_dt = datetime.fromisoformat(ts_raw.replace("Z", "+00:00"))
-            # Normalise ts_dt
-            if ts_dt.tzinfo is not None:
-                ts_dt = ts_dt.astimezone(timezone.utc).replace(tzinfo=None)
-
-            if ts_dt >= dt_cmp:
-                res.append(it)
-        except ValueError:
-            continue
-    return res
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return [p for p in posts if p.timestamp >= dt]
 
 
 # ------------------ Platform functions ------------------
 
-def search_instagram(term: str, since: datetime) -> List[dict[str, Any]]:
+def search_instagram(term: str, since: datetime, use_cache: bool = True) -> List[Post]:
     """Return Instagram posts for **term** newer than **since** (UTC).
 
     The Apify Instagram scraper actor supports *multiple* input styles. To reduce
@@ -125,7 +127,7 @@ def search_instagram(term: str, since: datetime) -> List[dict[str, Any]]:
     2. Build the `/tagged/` feed URL for that handle and pass it in `directUrls`.
     3. Supply `onlyPostsNewerThan` (ISO 8601) so the actor pre-filters.
     4. Keep `resultsLimit` and `resultsType` as before.
-    5. Down-stream keyword filtering happens via `_contains_keywords` so we don't
+    5. Down-stream keyword filtering happens via `KeywordMatcher` so we don't
        need the actor to do any full-text filtering.
     """
 
@@ -159,11 +161,11 @@ def search_instagram(term: str, since: datetime) -> List[dict[str, Any]]:
             "isUserTaggedFeedURL": True,
         }
 
-    raw = _run_actor(INSTAGRAM_ACTOR, input_payload)
-    return _filter_since(raw, since, "timestamp")
+    raw = _run_actor(INSTAGRAM_ACTOR, input_payload, use_cache=use_cache)
+    return _filter_since(normalize_items(INSTAGRAM, raw), since)
 
 
-def search_tiktok(term: str, since: datetime) -> List[dict[str, Any]]:
+def search_tiktok(term: str, since: datetime, use_cache: bool = True) -> List[Post]:
     """Return TikTok posts newer than **since** for the given **term**.
 
     Similar strategy to Instagram: if we detect a profile handle in the term we
@@ -205,11 +207,11 @@ def search_tiktok(term: str, since: datetime) -> List[dict[str, Any]]:
         "proxyCountryCode": "None",
     }
 
-    raw = _run_actor(TIKTOK_ACTOR, input_payload)
-    return _filter_since(raw, since, "createTimeISO")
+    raw = _run_actor(TIKTOK_ACTOR, input_payload, use_cache=use_cache)
+    return _filter_since(normalize_items(TIKTOK, raw), since)
 
 
-def search_twitter(term: str, since: datetime) -> List[dict[str, Any]]:
+def search_twitter(term: str, since: datetime, use_cache: bool = True) -> List[Post]:
     """Return tweets matching **term** (full-text query) created after **since** UTC."""
     # The Apify tweet-scraper actor supports a `query` parameter for standard
     # Twitter search operators. This allows us to pass the full term – including
@@ -234,24 +236,34 @@ def search_twitter(term: str, since: datetime) -> List[dict[str, Any]]:
         "start": since.strftime("%Y-%m-%d"),
     }
 
-    raw = _run_actor(TWITTER_ACTOR, input_payload)
-
-    # The actor may emit either `created_at` (snake) or `createdAt` (camel)
-    # depending on its version. Choose whichever exists in the first item.
-    time_key = "created_at"
-    if raw and "createdAt" in raw[0]:
-        time_key = "createdAt"
-
-    return _filter_since(raw, since, time_key)
+    raw = _run_actor(TWITTER_ACTOR, input_payload, use_cache=use_cache)
+    # `normalize_items` accepts both `createdAt` and `created_at`, in ISO or
+    # classic Twitter date format.
+    return _filter_since(normalize_items(TWITTER, raw), since)
 
 
 # ------------------ Public API ------------------
 
-def scrape_city_posts(city: dict[str, Any], profiles: List[str] | None = None) -> List[dict[str, Any]]:
+def scrape_city_posts(
+    city: dict[str, Any],
+    profiles: List[str] | None = None,
+    near_dup_threshold: float | None = None,
+    scorer: Scorer | None = None,
+    use_cache: bool = True,
+    progress: Callable[[str, str, int], None] | None = None,
+) -> List[Post]:
     """Scrape posts for the given **city** document.
 
-    Returns up to 100 combined posts sorted by a simple heuristic (likes). Caller
-    should persist to Firestore under `cities/{city.id}/posts`.
+    Returns up to 100 combined, normalised posts ranked best-first by
+    **scorer** (default: time-decayed, per-platform engagement from
+    ``backend.ranking``), with ``Post.score`` set. Near-identical cross-posts are collapsed into their
+    highest-engagement copy when their caption similarity reaches
+    **near_dup_threshold** (``SOCIAL_NEAR_DUP_THRESHOLD`` env, default 0.7;
+    values above 1 disable collapsing). ``use_cache=False`` bypasses the
+    actor result cache. **progress**, if given, is called as
+    ``progress(platform, "running" | "done", items_so_far)`` while the
+    platforms are searched. Caller should persist to Firestore under
+    `cities/{city.id}/posts`.
     """
     if not profiles:
         profiles_env = os.getenv("SOCIAL_PROFILES", "")
@@ -265,9 +277,8 @@ def scrape_city_posts(city: dict[str, Any], profiles: List[str] | None = None) -
         logger.debug("City %s has no lastCurrentAt; nothing to scrape", city.get("city"))
         return []
 
-    try:
-        since_dt = datetime.fromisoformat(last_ts_str.replace("Z", "+00:00"))
-    except ValueError:
+    since_dt = parse_timestamp(last_ts_str)
+    if since_dt is None:
         logger.warning("Invalid lastCurrentAt format for city %s: %s", city.get("city"), last_ts_str)
         return []
 
@@ -282,33 +293,51 @@ def scrape_city_posts(city: dict[str, Any], profiles: List[str] | None = None) -
 
     keywords.extend(city_kw)
 
-    results: List[dict[str, Any]] = []
-    for profile in profiles:
-        query = f"@{profile} {' '.join(keywords)}"
-        results.extend(search_instagram(query, since_dt))
-        results.extend(search_tiktok(query, since_dt))
-        results.extend(search_twitter(query, since_dt))
+    searches = ((INSTAGRAM, search_instagram), (TIKTOK, search_tiktok), (TWITTER, search_twitter))
+    counts = {platform: 0 for platform, _ in searches}
+    results: List[Post] = []
+    for platform, search in searches:
+        if progress:
+            progress(platform, "running", 0)
+        for profile in profiles:
+            query = f"@{profile} {' '.join(keywords)}"
+            found = search(query, since_dt, use_cache=use_cache)
+            counts[platform] += len(found)
+            results.extend(found)
+            if progress:
+                progress(platform, "running", counts[platform])
+        if progress:
+            progress(platform, "done", counts[platform])
 
     # Deduplicate by platform+id
     seen = set()
-    deduped: List[dict[str, Any]] = []
+    deduped: List[Post] = []
     for post in results:
-        key = (post.get("platform"), post.get("id") or post.get("postId"))
-        if key not in seen:
-            seen.add(key)
+        if post.key not in seen:
+            seen.add(post.key)
             deduped.append(post)
 
-    # Sort by likes if available else timestamp desc
-    def score(item: dict[str, Any]):
-        return item.get("likeCount", 0) or item.get("likes", 0)
-
-    deduped.sort(key=score, reverse=True)
+    # Everything fetched goes to the historical archive (queued, written in
+    # the background) before filtering and the top-100 cut.
+    if post_archive.archive is not None and city.get("id") is not None:
+        post_archive.archive.submit(city["id"], deduped)
 
     # --- Keyword filter ----------------
     extra_kw_env = os.getenv("SOCIAL_KEYWORDS", "")
     extra_kw = [k.strip() for k in extra_kw_env.split(",") if k.strip()]
     keyword_terms = keywords + extra_kw
 
-    filtered = [p for p in deduped if _contains_keywords(p, keyword_terms)]
+    # Compile once per scrape; each post is then a single pass over its text.
+    matcher = KeywordMatcher(keyword_terms)
+    filtered = [p for p in deduped if matcher.matches(p.text)]
+
+    # --- Near-duplicate collapse -------
+    if near_dup_threshold is None:
+        near_dup_threshold = float(os.getenv("SOCIAL_NEAR_DUP_THRESHOLD", NEAR_DUP_DEFAULT_THRESHOLD))
+    collapsed = collapse_near_duplicates(filtered, near_dup_threshold)
+    if len(collapsed) < len(filtered):
+        logger.info("Collapsed %d near-duplicate posts", len(filtered) - len(collapsed))
+    filtered = collapsed
 
-    return filtered[:100]
+    # --- Rank: bounded-heap top-k ------
+    return top_k(filtered, 100, scorer)
@@ -0,0 +1,276 @@
+"""SQLite repository backend (``REPO_BACKEND=sqlite``).
+
+Stores status and cities in the existing SQLModel ``Status``/``City`` tables
+and everything schemaless (settings, merch, per-city posts, interval
+decisions, polygons, scrape jobs) in the ``Document`` table, keyed by its Firestore path. The
+database is ``DATABASE_URL`` (default ``speed.db``) in WAL mode, so the API
+can read while the scheduler writes.
+
+Fields without a column are kept as JSON in ``extra`` so documents round-trip
+exactly as they would through Firestore.
+"""
+
+from __future__ import annotations
+
+import json
+import uuid
+from datetime import datetime, timezone
+from typing import Any, List, Optional
+
+from sqlalchemy import inspect, text
+from sqlmodel import Session, col, delete, select
+
+from backend.database import create_db_and_tables, engine as default_engine
+from backend.models import City, Document, Status
+from backend.posts import Post, parse_timestamp
+from backend.repo_base import DEFAULT_SETTINGS, MAX_CITY_POSTS, BaseRepository, scrape_job_is_live
+
+# Firestore field -> City column
+CITY_COLUMNS = {
+    "city": "city",
+    "state": "state",
+    "lat": "lat",
+    "lng": "lng",
+    "order": "order",
+    "isCurrent": "is_current",
+    "lastCurrentAt": "last_current_at",
+    "keywords": "keywords",
+}
+
+SETTINGS_PATH = ("settings", "globals")
+MERCH_COLL = "merch"
+DECISIONS_COLL = "scrapeIntervalDecisions"
+POLYGONS_COLL = "polygons"
+SCRAPE_JOBS_COLL = "scrapeJobs"
+SCRAPE_CLAIMS_COLL = "scrapeJobClaims"
+
+
+def _posts_coll(city_id: int) -> str:
+    return f"cities/{city_id}/posts"
+
+
+def _naive_utc(value: Any) -> Optional[datetime]:
+    ts = parse_timestamp(value)
+    return ts.astimezone(timezone.utc).replace(tzinfo=None) if ts else None
+
+
+class SQLiteRepository(BaseRepository):
+    def __init__(self, engine=default_engine) -> None:
+        self.engine = engine
+        if engine is default_engine:
+            create_db_and_tables()
+        else:
+            Document.metadata.create_all(engine)
+        self._ensure_extra_columns()
+
+    def _ensure_extra_columns(self) -> None:
+        """Databases created before the ``extra`` columns existed get them added."""
+        inspector = inspect(self.engine)
+        with self.engine.begin() as conn:
+            for table in ("status", "city"):
+                columns = {c["name"] for c in inspector.get_columns(table)}
+                if "extra" not in columns:
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN extra TEXT"))
+
+    # ------------------ Documents ------------------
+
+    def _get_doc(self, session: Session, collection: str, doc_id: str) -> Optional[dict[str, Any]]:
+        row = session.get(Document, (collection, doc_id))
+        return json.loads(row.data) if row else None
+
+    def _put_doc(
+        self,
+        session: Session,
+        collection: str,
+        doc_id: str,
+        data: dict[str, Any],
+        score: Optional[float] = None,
+    ) -> None:
+        session.merge(Document(collection=collection, id=doc_id, data=json.dumps(data, default=str), score=score))
+
+    # ------------------ Status ------------------
+
+    @staticmethod
+    def _status_doc(row: Status) -> dict[str, Any]:
+        if row.extra:
+            return json.loads(row.extra)
+        # Row seeded by the SQLModel startup code – derive the document.
+        return {
+            "lat": row.lat,
+            "lng": row.lng,
+            "state": row.state,
+            "quote": row.quote,
+            "city": row.city,
+            "city_polygon": row.city_polygon,
+            "isSleep": row.is_sleep,
+            "lastUpdated": row.last_updated.isoformat() if row.last_updated else None,
+        }
+
+    def get_status(self) -> Optional[dict[str, Any]]:
+        with Session(self.engine) as session:
+            row = session.exec(select(Status)).first()
+            return self._status_doc(row) if row else None
+
+    def update_status(self, payload: dict[str, Any]) -> dict[str, Any]:
+        payload["lastUpdated"] = datetime.utcnow().isoformat()
+        with Session(self.engine) as session:
+            row = session.exec(select(Status)).first()
+            doc = {**(self._status_doc(row) if row else {}), **payload}
+            row = row or Status(lat=0, lng=0, quote="")
+            # Mirror the typed columns so SQL queries on the table stay meaningful.
+            row.lat = doc.get("lat") or 0.0
+            row.lng = doc.get("lng") or 0.0
+            row.state = doc.get("state")
+            row.quote = doc.get("quote") or ""
+            row.city = doc.get("city")
+            row.city_polygon = doc.get("city_polygon")
+            row.is_sleep = bool(doc.get("isSleep", doc.get("is_sleep", False)))
+            row.last_updated = datetime.utcnow()
+            row.extra = json.dumps(doc, default=str)
+            session.add(row)
+            session.commit()
+        return doc
+
+    # ------------------ Cities ------------------
+
+    @staticmethod
+    def _city_doc(row: City) -> dict[str, Any]:
+        doc = json.loads(row.extra) if row.extra else {}
+        for field, column in CITY_COLUMNS.items():
+            value = getattr(row, column)
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            if value is not None:
+                doc[field] = value
+        doc["id"] = row.id
+        return doc
+
+    def list_cities(self) -> List[dict[str, Any]]:
+        with Session(self.engine) as session:
+            rows = session.exec(select(City).order_by(City.order)).all()
+            return [self._city_doc(r) for r in rows]
+
+    def get_city(self, city_id: int) -> Optional[dict[str, Any]]:
+        with Session(self.engine) as session:
+            row = session.get(City, city_id)
+            return self._city_doc(row) if row else None
+
+    def update_city(self, city_id: int, data: dict[str, Any]) -> dict[str, Any]:
+        with Session(self.engine) as session:
+            row = session.get(City, city_id) or City(id=city_id, city="", state="", lat=0.0, lng=0.0, order=0)
+            extra = json.loads(row.extra) if row.extra else {}
+            for field, value in data.items():
+                column = CITY_COLUMNS.get(field)
+                if column is None:
+                    extra[field] = value
+                elif column == "last_current_at":
+                    row.last_current_at = _naive_utc(value)
+                else:
+                    setattr(row, column, value)
+            row.extra = json.dumps(extra, default=str) if extra else None
+            session.add(row)
+            session.commit()
+            session.refresh(row)
+            return self._city_doc(row)
+
+    # ------------------ Posts ------------------
+
+    def save_city_posts(self, city_id: int, posts: list[Post]) -> int:
+        keep = posts[:MAX_CITY_POSTS]
+        keep_ids = {p.doc_id for p in keep}
+        coll = _posts_coll(city_id)
+        with Session(self.engine) as session:
+            existing_ids = set(session.exec(select(Document.id).where(Document.collection == coll)).all())
+            stale = existing_ids - keep_ids
+            if stale:
+                session.exec(delete(Document).where(Document.collection == coll, col(Document.id).in_(stale)))
+            for p in keep:
+                self._put_doc(session, coll, p.doc_id, p.to_dict(), score=p.score)
+            session.commit()
+        return len(keep_ids - existing_ids)
+
+    def list_city_posts(self, city_id: int) -> list[dict[str, Any]]:
+        with Session(self.engine) as session:
+            rows = session.exec(
+                select(Document)
+                .where(Document.collection == _posts_coll(city_id))
+                .order_by(col(Document.score).desc())
+            ).all()
+            return [json.loads(r.data) | {"id": r.id} for r in rows]
+
+    # ------------------ Settings ------------------
+
+    def get_settings(self) -> dict[str, Any]:
+        with Session(self.engine) as session:
+            data = self._get_doc(session, *SETTINGS_PATH) or {}
+        return {**DEFAULT_SETTINGS, **data}
+
+    def update_settings(self, data: dict[str, Any]) -> dict[str, Any]:
+        with Session(self.engine) as session:
+            current = self._get_doc(session, *SETTINGS_PATH) or {}
+            self._put_doc(session, *SETTINGS_PATH, {**current, **data})
+            session.commit()
+        return self.get_settings()
+
+    def add_interval_decision(self, data: dict[str, Any]) -> None:
+        with Session(self.engine) as session:
+            self._put_doc(session, DECISIONS_COLL, uuid.uuid4().hex, data)
+            session.commit()
+
+    # ------------------ Merch ------------------
+
+    def list_merch(self) -> list[dict[str, Any]]:
+        with Session(self.engine) as session:
+            rows = session.exec(select(Document).where(Document.collection == MERCH_COLL)).all()
+            return [json.loads(r.data) | {"id": r.id} for r in rows]
+
+    def create_merch(self, data: dict[str, Any]) -> dict[str, Any]:
+        item_id = uuid.uuid4().hex[:20]
+        with Session(self.engine) as session:
+            self._put_doc(session, MERCH_COLL, item_id, data)
+            session.commit()
+        return data | {"id": item_id}
+
+    def update_merch(self, item_id: str, data: dict[str, Any]) -> dict[str, Any]:
+        with Session(self.engine) as session:
+            merged = {**(self._get_doc(session, MERCH_COLL, item_id) or {}), **data}
+            self._put_doc(session, MERCH_COLL, item_id, merged)
+            session.commit()
+        return merged | {"id": item_id}
+
+    # ------------------ Polygons ------------------
+
+    def get_polygon(self, polygon_id: str) -> Optional[dict[str, Any]]:
+        with Session(self.engine) as session:
+            return self._get_doc(session, POLYGONS_COLL, polygon_id)
+
+    def save_polygon(self, polygon_id: str, data: dict[str, Any]) -> None:
+        with Session(self.engine) as session:
+            self._put_doc(session, POLYGONS_COLL, polygon_id, data)
+            session.commit()
+
+    # ------------------ Scrape jobs ------------------
+
+    def claim_scrape_job(self, job: dict[str, Any], stale_before: str) -> dict[str, Any]:
+        with Session(self.engine) as session:
+            # Take the write lock before reading, so two processes cannot both claim the city.
+            session.connection().exec_driver_sql("BEGIN IMMEDIATE")
+            claim = self._get_doc(session, SCRAPE_CLAIMS_COLL, str(job["city_id"]))
+            current = self._get_doc(session, SCRAPE_JOBS_COLL, claim["jobId"]) if claim else None
+            if scrape_job_is_live(current, stale_before):
+                session.rollback()
+                return current  # type: ignore[return-value]
+            self._put_doc(session, SCRAPE_JOBS_COLL, job["id"], job)
+            self._put_doc(session, SCRAPE_CLAIMS_COLL, str(job["city_id"]), {"jobId": job["id"]})
+            session.commit()
+        return job
+
+    def get_scrape_job(self, job_id: str) -> Optional[dict[str, Any]]:
+        with Session(self.engine) as session:
+            return self._get_doc(session, SCRAPE_JOBS_COLL, job_id)
+
+    def update_scrape_job(self, job_id: str, data: dict[str, Any]) -> None:
+        with Session(self.engine) as session:
+            merged = {**(self._get_doc(session, SCRAPE_JOBS_COLL, job_id) or {}), **data}
+            self._put_doc(session, SCRAPE_JOBS_COLL, job_id, merged)
+            session.commit()
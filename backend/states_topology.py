@@ -0,0 +1,262 @@
+"""US states boundary layer as a simplified, quantized TopoJSON.
+
+Both maps used to download the full-resolution states GeoJSON from GitHub
+on every load. The backend now builds a TopoJSON topology once from the
+bundled ``backend/geo/us-states.json`` (Census cartographic boundaries
+with the same ``properties.name`` as before, generated by
+``backend/scripts/build_states_source.py``; ``STATES_SOURCE`` overrides the
+path):
+
+1. coordinates are quantized to an integer grid of half the simplification
+   tolerance, so borders shared by two states become identical points;
+2. rings are cut at junctions (points with more than two distinct
+   neighbours) into arcs, and each shared border is stored once;
+3. every arc is Douglas-Peucker simplified with its endpoints fixed, so
+   neighbouring states still meet exactly;
+4. arcs are delta-encoded and the JSON gzipped once.
+
+The result is served from memory by ``/api/geo/states`` (ETag) and
+``/api/geo/states/{version}`` (immutable; the version is a hash of the
+output).
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import math
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterable, List, Optional, Sequence
+
+from backend.polygons import douglas_peucker, tolerance_for_zoom
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOURCE = Path(__file__).resolve().parent / "geo" / "us-states.json"
+# One pixel at zoom 6 (~600 m): the maps show the states at zoom 3-6.
+DEFAULT_TOLERANCE = tolerance_for_zoom(6)
+KEEP_PROPERTIES = ("name",)
+
+GridPoint = tuple[int, int]
+
+
+class StatesLayer:
+    """Built topology: JSON body, its gzip encoding and a content version."""
+
+    def __init__(self, body: bytes, source_bytes: int) -> None:
+        self.body = body
+        self.gzip_body = gzip.compress(body, 9, mtime=0)
+        self.version = hashlib.sha256(body).hexdigest()[:16]
+        self.etag = f'"states-{self.version}"'
+        self.source_bytes = source_bytes
+
+
+# ------------------ Topology ------------------
+
+
+def _polygons(geometry: dict[str, Any]) -> List[List[Sequence]]:
+    if not geometry:
+        return []
+    if geometry["type"] == "Polygon":
+        return [geometry["coordinates"]]
+    if geometry["type"] == "MultiPolygon":
+        return list(geometry["coordinates"])
+    return []
+
+
+def _bbox(features: Sequence[dict[str, Any]]) -> List[float]:
+    xs, ys = [], []
+    for feature in features:
+        for polygon in _polygons(feature.get("geometry")):
+            for ring in polygon:
+                xs.extend(p[0] for p in ring)
+                ys.extend(p[1] for p in ring)
+    return [min(xs), min(ys), max(xs), max(ys)]
+
+
+def _quantize_ring(ring: Iterable[Sequence[float]], x0: float, y0: float, sx: float, sy: float) -> List[GridPoint]:
+    """Open ring (no closing duplicate) on the grid, consecutive duplicates removed."""
+    out: List[GridPoint] = []
+    for p in ring:
+        q = (round((p[0] - x0) / sx), round((p[1] - y0) / sy))
+        if not out or out[-1] != q:
+            out.append(q)
+    while len(out) > 1 and out[0] == out[-1]:
+        out.pop()
+    return out
+
+
+def _junctions(rings: Iterable[List[GridPoint]]) -> set[GridPoint]:
+    neighbours: dict[GridPoint, set[GridPoint]] = {}
+    for ring in rings:
+        n = len(ring)
+        for i, p in enumerate(ring):
+            s = neighbours.get(p)
+            if s is None:
+                s = neighbours[p] = set()
+            s.add(ring[i - 1])
+            s.add(ring[(i + 1) % n])
+    return {p for p, s in neighbours.items() if len(s) > 2}
+
+
+def _rotate_to_min(ring: List[GridPoint]) -> List[GridPoint]:
+    i = ring.index(min(ring))
+    return ring[i:] + ring[:i]
+
+
+class _ArcIndex:
+    """Deduplicates arcs; a reversed copy of a known arc is ``~index``."""
+
+    def __init__(self) -> None:
+        self.arcs: List[List[GridPoint]] = []
+        self._index: dict[tuple[GridPoint, ...], int] = {}
+
+    def add(self, arc: List[GridPoint], reversed_arc: Optional[List[GridPoint]] = None) -> int:
+        key = tuple(arc)
+        if key in self._index:
+            return self._index[key]
+        rkey = tuple(reversed_arc if reversed_arc is not None else arc[::-1])
+        if rkey in self._index:
+            return ~self._index[rkey]
+        self._index[key] = len(self.arcs)
+        self.arcs.append(arc)
+        return self._index[key]
+
+    def cut(self, ring: List[GridPoint], junctions: set[GridPoint]) -> List[int]:
+        cuts = [i for i, p in enumerate(ring) if p in junctions]
+        if not cuts:
+            # Island: one closed arc, rotated so either orientation dedupes.
+            forward = _rotate_to_min(ring)
+            backward = _rotate_to_min(ring[::-1])
+            return [self.add(forward + forward[:1], backward + backward[:1])]
+        start = cuts[0]
+        rotated = ring[start:] + ring[:start]
+        cuts = [c - start for c in cuts] + [len(ring)]
+        rotated.append(rotated[0])
+        return [self.add(rotated[a : b + 1]) for a, b in zip(cuts, cuts[1:])]
+
+
+def _simplify_arc(arc: List[GridPoint], tol: float, sx: float, sy: float, lng_scale: float) -> List[GridPoint]:
+    points = [[x * sx, y * sy, x, y] for x, y in arc]
+    if arc[0] == arc[-1] and len(arc) > 3:
+        # Closed arc: split at the farthest point so both halves have fixed ends.
+        far = max(range(len(arc)), key=lambda i: (arc[i][0] - arc[0][0]) ** 2 + (arc[i][1] - arc[0][1]) ** 2)
+        head = douglas_peucker(points[: far + 1], tol, lng_scale)
+        tail = douglas_peucker(points[far:], tol, lng_scale)
+        kept = head + tail[1:]
+    else:
+        kept = douglas_peucker(points, tol, lng_scale)
+    return [(int(p[2]), int(p[3])) for p in kept]
+
+
+def _ring_length(refs: List[int], arcs: List[List[GridPoint]]) -> int:
+    return sum(len(arcs[~r if r < 0 else r]) - 1 for r in refs) + 1
+
+
+def build_topology(collection: dict[str, Any], tol: float = DEFAULT_TOLERANCE, object_name: str = "states") -> dict[str, Any]:
+    """TopoJSON ``Topology`` for the Polygon/MultiPolygon features of **collection**."""
+    features = [f for f in collection.get("features", []) if _polygons(f.get("geometry"))]
+    if not features:
+        raise ValueError("No polygon features to build a topology from")
+    x0, y0, x1, y1 = _bbox(features)
+    grid = tol / 2
+    kx = max(2, math.ceil((x1 - x0) / grid) + 1)
+    ky = max(2, math.ceil((y1 - y0) / grid) + 1)
+    sx, sy = (x1 - x0) / (kx - 1), (y1 - y0) / (ky - 1)
+    lng_scale = math.cos(math.radians((y0 + y1) / 2))
+
+    quantized = [
+        [[_quantize_ring(ring, x0, y0, sx, sy) for ring in polygon] for polygon in _polygons(f["geometry"])]
+        for f in features
+    ]
+    junctions = _junctions(r for polys in quantized for polygon in polys for r in polygon if len(r) >= 3)
+
+    index = _ArcIndex()
+    cut = [
+        [
+            [index.cut(ring, junctions) for ring in polygon if len(ring) >= 3]
+            for polygon in polys
+            if polygon and len(polygon[0]) >= 3
+        ]
+        for polys in quantized
+    ]
+    arcs = [_simplify_arc(arc, tol, sx, sy, lng_scale) for arc in index.arcs]
+
+    # Drop rings that collapsed below a triangle, then renumber the arcs used.
+    used: dict[int, int] = {}
+
+    def renumber(ref: int) -> int:
+        i = ~ref if ref < 0 else ref
+        if i not in used:
+            used[i] = len(used)
+        return ~used[i] if ref < 0 else used[i]
+
+    geometries = []
+    for feature, polys in zip(features, cut):
+        polygons = []
+        for polygon in polys:
+            if not polygon or _ring_length(polygon[0], arcs) < 4:
+                continue
+            rings = [polygon[0]] + [hole for hole in polygon[1:] if _ring_length(hole, arcs) >= 4]
+            polygons.append([[renumber(r) for r in ring] for ring in rings])
+        props = {k: v for k, v in (feature.get("properties") or {}).items() if k in KEEP_PROPERTIES}
+        geometry: dict[str, Any]
+        if not polygons:
+            geometry = {"type": None}
+        elif len(polygons) == 1:
+            geometry = {"type": "Polygon", "arcs": polygons[0]}
+        else:
+            geometry = {"type": "MultiPolygon", "arcs": polygons}
+        if feature.get("id") is not None:
+            geometry["id"] = feature["id"]
+        geometry["properties"] = props
+        geometries.append(geometry)
+
+    encoded: List[Any] = [None] * len(used)
+    for old, new in used.items():
+        arc, delta = arcs[old], []
+        px = py = 0
+        for x, y in arc:
+            delta.append([x - px, y - py])
+            px, py = x, y
+        encoded[new] = delta
+
+    return {
+        "type": "Topology",
+        "bbox": [x0, y0, x1, y1],
+        "transform": {"scale": [sx, sy], "translate": [x0, y0]},
+        "objects": {object_name: {"type": "GeometryCollection", "geometries": geometries}},
+        "arcs": encoded,
+    }
+
+
+# ------------------ Layer ------------------
+
+
+@lru_cache(maxsize=4)
+def load_layer(path: str, tol: float = DEFAULT_TOLERANCE) -> Optional[StatesLayer]:
+    """Build the layer from the GeoJSON at **path** once; None if it is missing."""
+    source = Path(path)
+    if not source.is_file():
+        logger.warning("States boundary source %s not found; /api/geo/states is unavailable", source)
+        return None
+    raw = source.read_bytes()
+    try:
+        topology = build_topology(json.loads(raw), tol)
+    except (ValueError, KeyError, TypeError, IndexError):
+        logger.exception("Could not build the states topology from %s", source)
+        return None
+    layer = StatesLayer(json.dumps(topology, separators=(",", ":")).encode("utf-8"), len(raw))
+    logger.info(
+        "Built states topology: %d arcs, %d bytes (%d gzipped) from %d bytes of GeoJSON",
+        len(topology["arcs"]), len(layer.body), len(layer.gzip_body), len(raw),
+    )
+    return layer
+
+
+def source_path() -> str:
+    return os.getenv("STATES_SOURCE", str(DEFAULT_SOURCE))
@@ -0,0 +1,33 @@
+"""Shared fixtures: an isolated, credential-free app (memory repository)."""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+# Must be set before backend modules read their configuration at import.
+_TMP = Path(tempfile.mkdtemp(prefix="speed-tests-"))
+os.environ.setdefault("REPO_BACKEND", "memory")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_TMP / 'speed.db'}")
+os.environ.setdefault("POST_SEARCH_DB", str(_TMP / "search.db"))
+os.environ.setdefault("TIMELINE_DIR", str(_TMP / "timeline"))
+os.environ.setdefault("LAST_GOOD_DIR", str(_TMP / "last_good"))
+os.environ.setdefault("LOOP_MONITOR_ENABLED", "0")
+
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+
+    from backend import main
+
+    with TestClient(main.app) as c:
+        yield c
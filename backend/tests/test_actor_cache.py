@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import os
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from backend import actor_cache
+from backend.actor_cache import ActorCache, cache_key
+
+RUN_INPUT = {"hashtags": ["austin"], "resultsLimit": 20}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(actor_cache, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def _compute(items, calls):
+    def compute():
+        calls.append(1)
+        return items
+
+    return compute
+
+
+def test_key_ignores_input_order_but_not_values():
+    assert cache_key("actor", {"a": 1, "b": [2]}) == cache_key("actor", {"b": [2], "a": 1})
+    assert cache_key("actor", {"a": 1}) != cache_key("actor", {"a": 2})
+    assert cache_key("actor", {"a": 1}) != cache_key("other", {"a": 1})
+
+
+def test_hit_within_ttl_and_recompute_after(tmp_path, clock):
+    cache = ActorCache(tmp_path, ttl_sec=60)
+    calls: list = []
+
+    assert cache.get_or_compute("actor", RUN_INPUT, _compute([{"id": 1}], calls)) == [{"id": 1}]
+    clock[0] += 59
+    assert cache.get_or_compute("actor", RUN_INPUT, _compute([{"id": 2}], calls)) == [{"id": 1}]
+    assert len(calls) == 1
+
+    clock[0] += 2
+    assert cache.get_or_compute("actor", RUN_INPUT, _compute([{"id": 2}], calls)) == [{"id": 2}]
+    assert len(calls) == 2
+
+
+def test_expired_disk_entry_is_removed(tmp_path, clock):
+    cache = ActorCache(tmp_path, ttl_sec=60)
+    key = cache_key("actor", RUN_INPUT)
+    cache.put(key, [{"id": 1}])
+
+    clock[0] += 61
+    assert ActorCache(tmp_path, ttl_sec=60).get(key) is None
+    assert not list(tmp_path.glob("*.json.gz"))
+
+
+def test_disk_tier_survives_restart(tmp_path, clock):
+    key = cache_key("actor", RUN_INPUT)
+    ActorCache(tmp_path).put(key, [{"id": 1}])
+
+    assert ActorCache(tmp_path).get(key) == [{"id": 1}]
+
+
+def test_memory_tier_evicts_least_recently_used(clock):
+    cache = ActorCache(None, max_entries=2)
+    cache.put("a", [{"id": "a"}])
+    cache.put("b", [{"id": "b"}])
+    cache.get("a")
+    cache.put("c", [{"id": "c"}])
+
+    assert cache.get("b") is None
+    assert cache.get("a") == [{"id": "a"}]
+    assert cache.get("c") == [{"id": "c"}]
+
+
+def test_disk_tier_evicts_oldest_files_past_the_byte_budget(tmp_path, clock):
+    cache = ActorCache(tmp_path)
+    cache.put("old", [{"id": "old"}])
+    os.utime(tmp_path / "old.json.gz", (1, 1))
+    # Room for one entry only.
+    cache.max_disk_bytes = (tmp_path / "old.json.gz").stat().st_size + 8
+    cache.put("new", [{"id": "new"}])
+
+    assert sorted(p.name for p in tmp_path.glob("*.json.gz")) == ["new.json.gz"]
+
+
+class _CountingCache(ActorCache):
+    """Signals once **callers** lookups have missed, i.e. are about to join."""
+
+    def __init__(self, callers: int) -> None:
+        super().__init__(None)
+        self.misses = threading.Semaphore(0)
+        self.callers = callers
+
+    def get(self, key):
+        items = super().get(key)
+        if items is None:
+            self.misses.release()
+        return items
+
+    def all_missed(self) -> None:
+        for _ in range(self.callers):
+            assert self.misses.acquire(timeout=5)
+
+
+def _call_from_threads(cache, compute, callers):
+    results: list = []
+
+    def call():
+        try:
+            results.append(cache.get_or_compute("actor", RUN_INPUT, compute))
+        except RuntimeError as exc:
+            results.append(str(exc))
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for t in threads:
+        t.start()
+    return threads, results
+
+
+def test_concurrent_calls_share_one_run(clock):
+    cache = _CountingCache(callers=4)
+    calls: list = []
+
+    def compute():
+        calls.append(1)
+        cache.all_missed()
+        return [{"id": 1}]
+
+    threads, results = _call_from_threads(cache, compute, 4)
+    for t in threads:
+        t.join(5)
+
+    assert len(calls) == 1
+    assert results == [[{"id": 1}]] * 4
+
+
+def test_failed_run_is_not_cached_and_reaches_waiters(clock):
+    cache = _CountingCache(callers=2)
+
+    def compute():
+        cache.all_missed()
+        raise RuntimeError("actor failed")
+
+    threads, results = _call_from_threads(cache, compute, 2)
+    for t in threads:
+        t.join(5)
+
+    assert results == ["actor failed"] * 2
+    assert cache.get(cache_key("actor", RUN_INPUT)) is None
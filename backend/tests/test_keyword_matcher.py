@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import pytest
+
+from backend import keyword_matcher
+from backend.keyword_matcher import KeywordMatcher
+
+ENGINES = ["python"]
+if keyword_matcher.ahocorasick is not None:
+    ENGINES.append("aho-corasick")
+
+TERMS = ["New York", "Austin", "Straße", "C++"]
+
+CORPUS = [
+    ("Live from New York tonight", True),
+    ("live from new  york", True),
+    ("New-York rocks", True),
+    ("NEW\nYORK", True),
+    ("#NewYork #road", True),
+    ("#new_york", True),
+    ("Austin, TX!", True),
+    ("#austin", True),
+    ("Austintown is not Austin-adjacent", True),
+    ("Austintown only", False),
+    ("newyorker magazine", False),
+    ("York, PA", False),
+    ("STRASSE", True),
+    pytest.param(
+        "learning c today",
+        False,
+        marks=pytest.mark.xfail(strict=True, reason="known limitation: punctuation is dropped, so 'C++' is 'c'"),
+    ),
+    ("abc", False),
+    ("", False),
+]
+
+
+@pytest.fixture(params=ENGINES)
+def engine(request, monkeypatch):
+    if request.param == "python":
+        monkeypatch.setattr(keyword_matcher, "ahocorasick", None)
+    return request.param
+
+
+@pytest.mark.parametrize("text,expected", CORPUS)
+def test_engines_agree_on_word_boundary_matches(engine, text, expected):
+    matcher = KeywordMatcher(TERMS)
+    assert repr(matcher).find(f"engine={engine}") > 0
+    assert matcher.matches(text) is expected
+
+
+@pytest.mark.parametrize("text,expected", [("Austintown", True), ("xnew yorkx", True), ("york", False)])
+def test_engines_agree_on_substring_matches(engine, text, expected):
+    assert KeywordMatcher(TERMS, word_boundary=False).matches(text) is expected
@@ -0,0 +1,182 @@
+"""Stale-while-error reads against a fault-injecting repository."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from backend import last_good
+from backend.faulty_repo import FaultyRepository, InjectedFault
+from backend.last_good import CircuitBreaker, CircuitOpen, Dependency, LastGoodStore, StaleWhileError
+
+
+class _Repo:
+    def __init__(self) -> None:
+        self.status = {"city": "Austin", "state": "TX"}
+
+    def get_status(self) -> dict:
+        return dict(self.status)
+
+
+def _reads(directory, timeout: float = 1.0, failures: int = 5, reset_after: float = 30.0) -> StaleWhileError:
+    breaker = CircuitBreaker(failure_threshold=failures, reset_after=reset_after)
+    return StaleWhileError(Dependency("repository", timeout, breaker), LastGoodStore(directory))
+
+
+def _run(coro_fn):
+    async def main():
+        reads = await coro_fn()
+        if reads is not None:
+            await reads.close()
+
+    asyncio.run(main())
+
+
+def test_error_serves_last_good_from_memory(tmp_path):
+    faulty = FaultyRepository(_Repo())
+
+    async def scenario():
+        reads = _reads(tmp_path)
+        value, stale = await reads.get("status", faulty.get_status)
+        assert (value["city"], stale) == ("Austin", None)
+
+        faulty.error_rate = 1.0
+        value, stale = await reads.get("status", faulty.get_status)
+        assert value["city"] == "Austin"
+        assert stale is not None and stale.source == "memory"
+        return reads
+
+    _run(scenario)
+
+
+def test_error_without_last_good_propagates(tmp_path):
+    faulty = FaultyRepository(_Repo(), error_rate=1.0)
+
+    async def scenario():
+        reads = _reads(tmp_path)
+        with pytest.raises(InjectedFault):
+            await reads.get("status", faulty.get_status)
+        return reads
+
+    _run(scenario)
+
+
+def test_timeout_serves_last_good(tmp_path):
+    faulty = FaultyRepository(_Repo())
+
+    async def scenario():
+        reads = _reads(tmp_path, timeout=0.05)
+        await reads.get("status", faulty.get_status)
+
+        faulty.delay = 0.3
+        started = time.monotonic()
+        value, stale = await reads.get("status", faulty.get_status)
+        assert time.monotonic() - started < 0.25
+        assert value["city"] == "Austin" and stale is not None
+        return reads
+
+    _run(scenario)
+
+
+def test_breaker_opens_then_half_opens_then_closes(tmp_path):
+    faulty = FaultyRepository(_Repo(), error_rate=1.0)
+    dependency = Dependency("repository", 1.0, CircuitBreaker(failure_threshold=2, reset_after=0.05))
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(InjectedFault):
+                await dependency.call(faulty.get_status)
+        assert dependency.breaker.state == "open"
+        with pytest.raises(CircuitOpen):
+            await dependency.call(faulty.get_status)
+
+        await asyncio.sleep(0.06)
+        assert dependency.breaker.state == "half_open"
+        # A failed probe re-opens it at once.
+        with pytest.raises(InjectedFault):
+            await dependency.call(faulty.get_status)
+        assert dependency.breaker.state == "open"
+
+        await asyncio.sleep(0.06)
+        faulty.error_rate = 0.0
+        assert (await dependency.call(faulty.get_status))["city"] == "Austin"
+        assert dependency.breaker.state == "closed"
+
+    asyncio.run(scenario())
+
+
+def test_cold_start_reads_last_good_from_disk(tmp_path):
+    repo = _Repo()
+
+    async def warm():
+        reads = _reads(tmp_path)
+        await reads.get("status", FaultyRepository(repo).get_status)
+        return reads
+
+    _run(warm)
+    assert json.loads((tmp_path / "status.json").read_text())["value"]["city"] == "Austin"
+
+    # A new process: empty memory, store down.
+    async def restarted():
+        reads = _reads(tmp_path)
+        value, stale = await reads.get("status", FaultyRepository(repo, error_rate=1.0).get_status)
+        assert value["city"] == "Austin"
+        assert stale is not None and stale.source == "disk"
+        return reads
+
+    _run(restarted)
+
+
+def test_refresh_replaces_stale_value_once_the_store_recovers(tmp_path, monkeypatch):
+    repo = _Repo()
+    faulty = FaultyRepository(repo)
+
+    async def sleep(_delay, _sleep=asyncio.sleep):
+        await _sleep(0)
+
+    monkeypatch.setattr(last_good.asyncio, "sleep", sleep)
+
+    async def scenario():
+        reads = _reads(tmp_path)
+        await reads.get("status", faulty.get_status)
+        faulty.error_rate = 1.0
+        repo.status["city"] = "Dallas"
+        _, stale = await reads.get("status", faulty.get_status)
+        assert stale is not None
+
+        faulty.error_rate = 0.0
+        await asyncio.wait_for(asyncio.gather(*reads._refreshing.values()), 5)
+        value, stale = reads.store.get("status")
+        assert value["city"] == "Dallas"
+        return reads
+
+    _run(scenario)
+
+
+def test_app_starts_and_serves_from_disk_while_the_store_is_down(monkeypatch, tmp_path):
+    from fastapi.testclient import TestClient
+
+    from backend import main, repository, scheduler
+
+    # Left on disk by the previous process.
+    asyncio.run(LastGoodStore(tmp_path).put("status", {"city": "Austin", "state": "TX"}))
+    monkeypatch.setattr(last_good, "public_reads", _reads(tmp_path, timeout=0.5))
+    monkeypatch.setenv("GOOGLE_PLACES_API_KEY", "test")
+    # Every call fails, on the repository object every module shares.
+    shared = repository.repo
+    monkeypatch.setattr(shared, "_inner", FaultyRepository(shared._inner, error_rate=1.0))
+    monkeypatch.setattr(shared, "_wrapped", {})
+
+    with TestClient(main.app) as client:
+        with pytest.raises(InjectedFault):
+            shared.get_settings()
+        r = client.get("/api/status")
+        # The scheduler's settings reads fall back instead of raising.
+        scheduler.reload_settings()
+        assert scheduler.queue_state()["entries"] == []
+    assert r.status_code == 200
+    assert r.json()["city"] == "Austin"
+    assert r.headers["X-Stale-Source"] == "disk"
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from backend import metrics
+
+
+def test_metrics_middleware_is_outermost():
+    from backend import main
+
+    # Starlette runs the first entry of user_middleware outermost.
+    assert main.app.user_middleware[0].cls is metrics.MetricsMiddleware
+
+
+def test_metrics_require_credentials(client, monkeypatch):
+    monkeypatch.delenv("METRICS_TOKEN", raising=False)
+    assert client.get("/api/metrics").status_code == 401
+
+
+def test_metrics_reject_a_wrong_token(client, monkeypatch):
+    monkeypatch.setenv("METRICS_TOKEN", "scrape-secret")
+    r = client.get("/api/metrics", headers={"Authorization": "Bearer nope"})
+    assert r.status_code == 401
+
+
+def test_metrics_accept_the_scrape_token(client, monkeypatch):
+    monkeypatch.setenv("METRICS_TOKEN", "scrape-secret")
+    r = client.get("/api/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert r.status_code == 200
+    assert "http_requests_in_flight" in r.text
+
+
+def test_list_bytes_are_estimated_from_a_sample(monkeypatch):
+    docs = [{"id": f"{i:04d}", "text": "x" * 50} for i in range(500)]
+    exact = len(metrics.json.dumps(docs))
+
+    sizes = []
+    dumps = metrics.json.dumps
+
+    def counting_dumps(value, *args, **kwargs):
+        sizes.append(value)
+        return dumps(value, *args, **kwargs)
+
+    monkeypatch.setattr(metrics.json, "dumps", counting_dumps)
+    estimate = metrics._approx_bytes([docs])
+    assert len(sizes) == metrics.BYTES_SAMPLE
+    assert abs(estimate - exact - 2) <= exact * 0.01
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import random
+from datetime import datetime, timezone
+
+from backend.near_dupes import (
+    NUM_PERM,
+    _band_layout,
+    caption_shingles,
+    collapse_near_duplicates,
+    minhash,
+)
+from backend.posts import INSTAGRAM, TIKTOK, TWITTER, Post
+
+NOW = datetime(2024, 5, 1, tzinfo=timezone.utc)
+
+CAPTION = "Walking into Austin this morning with the whole crew, thanks for the coffee everyone"
+
+
+def _post(platform: str, post_id: str, text: str, likes: int = 0, media_url: str | None = None) -> Post:
+    return Post(platform, post_id, NOW, text=text, likes=likes, media_url=media_url)
+
+
+def test_cross_posted_caption_collapses_into_most_engaged_copy():
+    posts = [
+        _post(INSTAGRAM, "1", CAPTION, likes=10),
+        _post(TIKTOK, "2", CAPTION + " https://tiktok.com/@walker #walk", likes=50),
+        _post(TWITTER, "3", CAPTION.upper(), likes=3),
+        _post(INSTAGRAM, "4", "Rest day in a motel outside Waco, feet are done for the week"),
+    ]
+
+    out = collapse_near_duplicates(posts)
+
+    assert [p.doc_id for p in out] == ["tiktok_2", "instagram_4"]
+    assert sorted(out[0].siblings) == ["instagram_1", "twitter_3"]
+    assert out[1].siblings == []
+
+
+def test_unrelated_captions_are_kept():
+    rng = random.Random(1)
+    words = [f"word{i}" for i in range(500)]
+    posts = [_post(INSTAGRAM, str(i), " ".join(rng.sample(words, 12))) for i in range(40)]
+
+    assert collapse_near_duplicates(posts) == posts
+
+
+def test_same_media_collapses_regardless_of_caption():
+    posts = [
+        _post(INSTAGRAM, "1", "first", media_url="https://cdn.example.com/v/clip.mp4?sig=a"),
+        _post(TIKTOK, "2", "entirely different words", likes=5, media_url="https://cdn.example.com/v/clip.mp4?sig=b"),
+    ]
+
+    out = collapse_near_duplicates(posts)
+
+    assert [p.doc_id for p in out] == ["tiktok_2"]
+    assert out[0].siblings == ["instagram_1"]
+
+
+def test_short_captions_are_never_compared():
+    posts = [_post(INSTAGRAM, "1", "Day 12!"), _post(TIKTOK, "2", "Day 12!")]
+
+    assert caption_shingles("Day 12!") == set()
+    assert len(collapse_near_duplicates(posts)) == 2
+
+
+def test_threshold_controls_how_close_captions_must_be():
+    edited = CAPTION.replace("whole crew", "entire team").replace("coffee", "tacos")
+    posts = [_post(INSTAGRAM, "1", CAPTION), _post(TIKTOK, "2", edited)]
+
+    assert len(collapse_near_duplicates(posts, threshold=0.3)) == 1
+    assert len(collapse_near_duplicates(posts, threshold=0.95)) == 2
+    assert len(collapse_near_duplicates(posts, threshold=1.1)) == 2
+
+
+def test_minhash_agreement_estimates_jaccard():
+    a = caption_shingles(" ".join(f"w{i}" for i in range(0, 60)))
+    b = caption_shingles(" ".join(f"w{i}" for i in range(20, 80)))
+    jaccard = len(a & b) / len(a | b)
+
+    agree = sum(x == y for x, y in zip(minhash(a), minhash(b))) / NUM_PERM
+
+    assert len(minhash(a)) == NUM_PERM
+    assert abs(agree - jaccard) < 0.2
+
+
+def test_band_layout_midpoint_sits_below_threshold():
+    for threshold in (0.3, 0.5, 0.7, 0.9):
+        bands, rows = _band_layout(threshold)
+        assert bands * rows == NUM_PERM
+        assert (1 / bands) ** (1 / rows) <= threshold
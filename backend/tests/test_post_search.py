@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from backend.post_search import PostSearchIndex, fts_query
+from backend.posts import INSTAGRAM, TIKTOK, Post
+
+NOW = datetime(2024, 5, 1, tzinfo=timezone.utc)
+
+
+def _post(post_id: str, text: str, platform: str = INSTAGRAM, hours_old: float = 0, score: float = 0.0) -> Post:
+    return Post(platform, post_id, NOW - timedelta(hours=hours_old), text=text, username=f"user{post_id}", score=score)
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = PostSearchIndex(tmp_path / "search.db")
+    index.add(
+        1,
+        [
+            _post("1", "Speed walking through Austin downtown", score=1.0, hours_old=3),
+            _post("2", "austin tacos after the stream", TIKTOK, score=5.0, hours_old=1),
+            _post("3", "Crowd outside the Austin hotel", score=3.0, hours_old=2),
+        ],
+    )
+    index.add(2, [_post("4", "Waco crowd is huge", score=2.0)])
+    return index
+
+
+def _ids(page) -> list[str]:
+    return [r["id"] for r in page["results"]]
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("Austin", '"austin"*'),
+        ("austin  tacos", '"austin" "tacos"*'),
+        # FTS5 syntax is quoted away, not interpreted.
+        ('tacos" OR caption:*', '"tacos" "or" "caption"*'),
+        ("NEAR(a b)", '"near" "a" "b"*'),
+        ("café", '"café"*'),
+        ("", None),
+        ('"*:()-', None),
+    ],
+)
+def test_fts_query_quotes_every_word(text, expected):
+    assert fts_query(text) == expected
+
+
+def test_search_requires_all_words_and_prefixes_the_last(index):
+    assert sorted(_ids(index.search("austin"))) == ["instagram_1", "instagram_3", "tiktok_2"]
+    assert _ids(index.search("austin cro")) == ["instagram_3"]
+    assert _ids(index.search("user4")) == ["instagram_4"]
+
+
+def test_operator_syntax_in_input_does_not_error(index):
+    assert index.search('crowd" OR "waco')["results"] == index.search("crowd or waco")["results"]
+    assert index.search("*")["results"] == []
+
+
+def test_filters_by_city_and_platform(index):
+    assert _ids(index.search("crowd", city_id=2)) == ["instagram_4"]
+    assert [r["cityId"] for r in index.search("crowd", city_id=2)["results"]] == [2]
+    assert _ids(index.search("austin", platform=TIKTOK)) == ["tiktok_2"]
+
+
+def test_sort_orders(index):
+    assert _ids(index.search("austin", sort="score")) == ["tiktok_2", "instagram_3", "instagram_1"]
+    assert _ids(index.search("austin", sort="recent")) == ["tiktok_2", "instagram_3", "instagram_1"]
+
+
+def test_pagination_walks_every_result_once(index):
+    pages, offset = [], 0
+    while offset is not None:
+        page = index.search("austin", sort="score", limit=2, offset=offset)
+        pages.append(_ids(page))
+        offset = page["nextOffset"]
+
+    assert pages == [["tiktok_2", "instagram_3"], ["instagram_1"]]
+
+
+def test_exact_last_page_has_no_next_offset(index):
+    page = index.search("austin", limit=3)
+
+    assert len(page["results"]) == 3
+    assert page["nextOffset"] is None
+
+
+def test_upsert_reindexes_the_post(index):
+    index.add(1, [_post("1", "Now in Houston")])
+
+    assert "instagram_1" not in _ids(index.search("austin"))
+    assert _ids(index.search("houston")) == ["instagram_1"]
+    assert index.count() == 4
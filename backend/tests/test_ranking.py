@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from backend.posts import INSTAGRAM, TIKTOK, TWITTER, Post
+from backend.ranking import EngagementScorer, default_scorer, top_k
+
+NOW = datetime(2024, 5, 1, 12, tzinfo=timezone.utc)
+
+
+def _post(post_id: str, hours_old: float = 0.0, platform: str = INSTAGRAM, **counts: int) -> Post:
+    return Post(platform, post_id, NOW - timedelta(hours=hours_old), **counts)
+
+
+def test_score_halves_every_half_life():
+    scorer = EngagementScorer(half_life_hours=24)
+    fresh = scorer(_post("a", likes=100), NOW)
+
+    assert scorer(_post("b", hours_old=24, likes=100), NOW) == pytest.approx(fresh / 2)
+    assert scorer(_post("c", hours_old=48, likes=100), NOW) == pytest.approx(fresh / 4)
+
+
+def test_no_decay_without_half_life_and_future_posts_are_not_boosted():
+    assert EngagementScorer(half_life_hours=0)(_post("a", hours_old=1000, likes=100), NOW) == pytest.approx(
+        EngagementScorer()(_post("b", likes=100), NOW)
+    )
+    scorer = EngagementScorer()
+    assert scorer(_post("a", hours_old=-5, likes=100), NOW) == scorer(_post("b", likes=100), NOW)
+
+
+def test_platform_weights_apply():
+    scorer = EngagementScorer(half_life_hours=0)
+    # A TikTok like counts half an Instagram like, an X like twice.
+    tiktok = scorer(_post("t", platform=TIKTOK, likes=200), NOW)
+    instagram = scorer(_post("i", likes=100), NOW)
+    twitter = scorer(_post("x", platform=TWITTER, likes=50), NOW)
+    assert tiktok == pytest.approx(instagram) == pytest.approx(twitter)
+
+
+def test_half_life_from_env(monkeypatch):
+    monkeypatch.setenv("SOCIAL_SCORE_HALF_LIFE_HOURS", "6")
+    assert default_scorer().half_life_hours == 6
+
+
+def test_top_k_matches_full_sort():
+    rng = random.Random(7)
+    posts = [
+        _post(str(i), hours_old=rng.uniform(0, 96), likes=rng.randint(0, 500), comments=rng.randint(0, 50))
+        for i in range(500)
+    ]
+    scorer = EngagementScorer()
+
+    best = top_k(iter(posts), 25, scorer, NOW)
+
+    # sorted() is stable, so ties keep the earlier post as top_k promises.
+    expected = sorted(posts, key=lambda p: scorer(p, NOW), reverse=True)[:25]
+    assert [p.post_id for p in best] == [p.post_id for p in expected]
+    assert all(p.score == scorer(p, NOW) for p in posts)
+
+
+def test_top_k_ties_keep_earlier_post():
+    posts = [_post(str(i), likes=10) for i in range(5)]
+
+    assert [p.post_id for p in top_k(posts, 3, EngagementScorer(), NOW)] == ["0", "1", "2"]
+
+
+def test_top_k_edge_sizes():
+    posts = [_post("a", likes=1), _post("b", likes=5)]
+
+    assert top_k(posts, 0, now=NOW) == []
+    assert [p.post_id for p in top_k(posts, 10, now=NOW)] == ["b", "a"]
+    assert top_k([], 3, now=NOW) == []
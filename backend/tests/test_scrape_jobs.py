@@ -0,0 +1,119 @@
+"""Scrape jobs shared between workers through the repository."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlmodel import create_engine
+
+from backend import scrape_jobs
+from backend.memory_repo import MemoryRepository
+from backend.scrape_jobs import ScrapeJob, ScrapeJobManager
+from backend.sqlite_repo import SQLiteRepository
+
+CITY = {"id": 7, "city": "Austin", "state": "TX"}
+
+
+@pytest.fixture
+def shared_repo(monkeypatch):
+    """One store, as several workers would see it; scrapes block until released."""
+    store = MemoryRepository()
+    store.update_city(CITY["id"], {"city": "Austin", "state": "TX"})
+    release = threading.Event()
+
+    def scrape_city(city, settings, use_cache=True, progress=None):
+        progress("instagram", "running", 0)
+        release.wait(5)
+        return 3, 2
+
+    monkeypatch.setattr(scrape_jobs, "repo", store)
+    monkeypatch.setattr(scrape_jobs, "scrape_city", scrape_city)
+    yield store, release
+    release.set()
+
+
+def test_second_worker_attaches_and_can_poll_the_job(shared_repo):
+    store, release = shared_repo
+
+    async def scenario():
+        a, b = ScrapeJobManager(), ScrapeJobManager()
+        job, attached = await a.submit(CITY, source="manual")
+        assert not attached
+
+        other, attached = await b.submit(CITY, source="scheduler")
+        assert attached and other.id == job.id
+
+        await asyncio.sleep(0.05)
+        seen = await b.get(job.id)
+        assert seen is not None and seen.status == "running"
+        assert seen.progress == {"instagram": {"status": "running", "items": 0}}
+
+        release.set()
+        await a.wait(job)
+        finished = await b.wait(other, poll_sec=0.01)
+        assert (finished.status, finished.saved, finished.new) == ("succeeded", 3, 2)
+
+        # The city is free again once the job finished.
+        _, attached = await b.submit(CITY, source="scheduler")
+        assert not attached
+
+    asyncio.run(scenario())
+
+
+def test_unknown_job_is_none(shared_repo):
+    assert asyncio.run(ScrapeJobManager().get("missing")) is None
+
+
+def test_job_of_a_dead_worker_stops_blocking_the_city(shared_repo):
+    store, _ = shared_repo
+    old = (datetime.now(timezone.utc) - timedelta(hours=1)).isoformat()
+    orphan = ScrapeJob(id="orphan", city_id=CITY["id"], city="Austin", source="manual", status="running", updated_at=old)
+    store.claim_scrape_job(orphan.to_dict(), old)
+
+    async def scenario():
+        manager = ScrapeJobManager(stale_after=60)
+        assert (await manager.wait(orphan)).status == "running"
+        job, attached = await manager.submit(CITY, source="manual")
+        assert not attached and job.id != "orphan"
+
+    asyncio.run(scenario())
+
+
+def test_sqlite_claim_is_single_flight(tmp_path):
+    store = SQLiteRepository(create_engine(f"sqlite:///{tmp_path / 'jobs.db'}"))
+    now = datetime.now(timezone.utc)
+    stale_before = (now - timedelta(minutes=10)).isoformat()
+    first = ScrapeJob(id="a", city_id=1, city="Austin", source="manual").to_dict()
+    second = ScrapeJob(id="b", city_id=1, city="Austin", source="scheduler").to_dict()
+
+    assert store.claim_scrape_job(first, stale_before)["id"] == "a"
+    assert store.claim_scrape_job(second, stale_before)["id"] == "a"
+
+    store.update_scrape_job("a", {"status": "succeeded"})
+    assert store.get_scrape_job("a")["status"] == "succeeded"
+    assert store.claim_scrape_job(second, stale_before)["id"] == "b"
+
+
+def test_refresh_on_an_attached_job_is_reported(client, shared_repo, monkeypatch):
+    from backend import main
+
+    store, release = shared_repo
+    monkeypatch.setattr(main, "scrape_jobs", ScrapeJobManager())
+    monkeypatch.setattr(main, "repo", store)
+    main.app.dependency_overrides[main.get_current_admin] = lambda: None
+    try:
+        first = client.post(f"/api/cities/{CITY['id']}/scrape").json()
+        assert first["attached"] is False and first["refreshIgnored"] is False
+
+        again = client.post(f"/api/cities/{CITY['id']}/scrape", params={"refresh": "true"}).json()
+        assert again["jobId"] == first["jobId"]
+        assert again["attached"] is True and again["refreshIgnored"] is True
+
+        release.set()
+        assert client.get(f"/api/scrape-jobs/{first['jobId']}").status_code == 200
+        assert client.get("/api/scrape-jobs/missing").status_code == 404
+    finally:
+        main.app.dependency_overrides.pop(main.get_current_admin, None)
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from backend.scrape_queue import PLATFORMS_PER_PROFILE, build_queue
+
+NOW = datetime(2024, 5, 10, 12, tzinfo=timezone.utc)
+
+
+def _iso(hours_ago: float) -> str:
+    return (NOW - timedelta(hours=hours_ago)).isoformat()
+
+
+def _city(city_id: int, current_hours_ago: float | None, **extra) -> dict:
+    doc = {"id": city_id, "city": f"City {city_id}"}
+    if current_hours_ago is not None:
+        doc["lastCurrentAt"] = _iso(current_hours_ago)
+    return {**doc, **extra}
+
+
+def _ids(entries, scheduled_only: bool = False) -> list[int]:
+    return [e.city_id for e in entries if e.scheduled or not scheduled_only]
+
+
+def test_current_city_first_then_by_priority():
+    cities = [
+        _city(1, 60, lastScrapeYield=0, lastScrapedAt=_iso(2)),
+        _city(2, 40, lastScrapeYield=20, lastScrapedAt=_iso(2)),
+        _city(3, 30, lastScrapeYield=0, lastScrapedAt=_iso(0.1)),
+        _city(4, 10, lastScrapeYield=0, lastScrapedAt=_iso(0)),
+    ]
+
+    entries = build_queue(cities, {"scrapeActorBudget": 100}, profile_count=1, now=NOW)
+
+    # 4 is current even though it was just scraped; 2 found posts last time.
+    assert _ids(entries) == [4, 2, 1, 3]
+    assert entries[0].recency == 1.0
+    assert entries[1].priority > entries[2].priority > entries[3].priority
+
+
+def test_is_current_flag_wins_over_timestamps():
+    # By timestamps city 1 was left 100 h ago, outside the window.
+    cities = [_city(1, 200, isCurrent=True), _city(2, 100)]
+
+    entries = build_queue(cities, {"scrapeRecentDays": 3}, 1, NOW)
+
+    assert 1 in _ids(entries)
+    assert entries[_ids(entries).index(1)].recency == 1.0
+
+
+def test_recency_halves_per_day_and_old_or_never_current_cities_drop_out():
+    cities = [
+        _city(1, 200),  # left 100 h ago, past the 3 day window
+        _city(2, 100),  # left 24 h ago
+        _city(3, 24),
+        _city(4, None),  # never current
+    ]
+
+    entries = build_queue(cities, {"scrapeRecentDays": 3}, 1, NOW)
+
+    assert _ids(entries) == [3, 2]
+    assert entries[1].recency == pytest.approx(0.5)
+
+
+def test_budget_limits_scheduled_cities():
+    cities = [_city(i, 10 - i) for i in range(1, 6)]
+    cost = 2 * PLATFORMS_PER_PROFILE
+
+    entries = build_queue(cities, {"scrapeActorBudget": 3 * cost}, profile_count=2, now=NOW)
+
+    assert all(e.cost == cost for e in entries)
+    assert len(entries) == 5
+    assert _ids(entries, scheduled_only=True) == _ids(entries)[:3]
+
+
+def test_current_city_is_scheduled_even_over_budget():
+    cities = [_city(1, 5), _city(2, 2)]
+
+    entries = build_queue(cities, {"scrapeActorBudget": 1}, profile_count=1, now=NOW)
+
+    assert _ids(entries, scheduled_only=True) == [2]
+
+
+def test_unscraped_city_outranks_one_scraped_just_now():
+    cities = [
+        _city(1, 30, lastScrapeYield=5, lastScrapedAt=_iso(0)),
+        _city(2, 20),
+        _city(3, 30),
+    ]
+
+    entries = build_queue(cities, {"socialScrapeIntervalMin": 60}, 1, NOW)
+
+    assert _ids(entries) == [2, 3, 1]
+    assert entries[1].to_dict()["last_scraped_at"] is None
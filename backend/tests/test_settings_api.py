@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import pytest
+
+
+@pytest.fixture
+def admin_client(client):
+    from backend import main
+
+    main.app.dependency_overrides[main.get_current_admin] = lambda: None
+    yield client
+    main.app.dependency_overrides.pop(main.get_current_admin, None)
+
+
+@pytest.mark.parametrize("value", [-1, 0, 1.5])
+def test_near_duplicate_threshold_out_of_range_is_rejected(admin_client, value):
+    r = admin_client.put("/api/settings", json={"nearDuplicateThreshold": value})
+    assert r.status_code == 422
+
+
+def test_near_duplicate_threshold_in_range_is_stored(admin_client):
+    r = admin_client.put("/api/settings", json={"nearDuplicateThreshold": 0.8})
+    assert r.status_code == 200
+    assert r.json()["nearDuplicateThreshold"] == 0.8
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [{"scrapeActorBudget": 0}, {"scrapeActorBudget": -3}, {"scrapeRecentDays": 0}, {"scrapeRecentDays": -1.5}],
+)
+def test_scrape_queue_settings_out_of_range_are_rejected(admin_client, payload):
+    assert admin_client.put("/api/settings", json=payload).status_code == 422
+
+
+def test_scrape_queue_settings_in_range_are_stored(admin_client):
+    r = admin_client.put("/api/settings", json={"scrapeActorBudget": 4, "scrapeRecentDays": 2.5})
+    assert r.status_code == 200
+    assert (r.json()["scrapeActorBudget"], r.json()["scrapeRecentDays"]) == (4, 2.5)
+
+
+@pytest.mark.parametrize("field", ["scrapeBurstYield", "scrapeIntervalFloorMin", "scrapeIntervalCeilingMin"])
+@pytest.mark.parametrize("value", [0, -5])
+def test_adaptive_interval_settings_out_of_range_are_rejected(admin_client, field, value):
+    assert admin_client.put("/api/settings", json={field: value}).status_code == 422
+
+
+def test_adaptive_interval_settings_in_range_are_stored(admin_client):
+    payload = {"scrapeBurstYield": 3, "scrapeIntervalFloorMin": 10, "scrapeIntervalCeilingMin": 120}
+    r = admin_client.put("/api/settings", json=payload)
+    assert r.status_code == 200
+    assert {k: r.json()[k] for k in payload} == payload
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from backend import snapshot
+
+
+@pytest.mark.parametrize("backend", ["firestore", "FIRESTORE"])
+def test_firestore_is_never_seeded_implicitly(monkeypatch, backend):
+    monkeypatch.delenv("SEED_SNAPSHOT", raising=False)
+    monkeypatch.setenv("REPO_BACKEND", backend)
+    assert snapshot.seed_path_from_env() is None
+
+
+def test_unset_backend_defaults_to_firestore_and_is_not_seeded(monkeypatch):
+    monkeypatch.delenv("SEED_SNAPSHOT", raising=False)
+    monkeypatch.delenv("REPO_BACKEND", raising=False)
+    assert snapshot.seed_path_from_env() is None
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_local_backends_use_the_bundled_seed(monkeypatch, backend):
+    monkeypatch.delenv("SEED_SNAPSHOT", raising=False)
+    monkeypatch.setenv("REPO_BACKEND", backend)
+    assert snapshot.seed_path_from_env() == snapshot.DEFAULT_SEED
+
+
+def test_explicit_seed_snapshot_wins(monkeypatch, tmp_path):
+    monkeypatch.setenv("REPO_BACKEND", "firestore")
+    monkeypatch.setenv("SEED_SNAPSHOT", str(tmp_path / "seed.jsonl.gz"))
+    assert snapshot.seed_path_from_env() == Path(tmp_path / "seed.jsonl.gz")
+
+
+def test_empty_seed_snapshot_disables_seeding(monkeypatch):
+    monkeypatch.setenv("REPO_BACKEND", "memory")
+    monkeypatch.setenv("SEED_SNAPSHOT", "")
+    assert snapshot.seed_path_from_env() is None
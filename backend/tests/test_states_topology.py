@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import gzip
+import json
+
+from backend import states_topology
+
+
+def _source() -> dict:
+    return json.loads(states_topology.DEFAULT_SOURCE.read_text(encoding="utf-8"))
+
+
+def test_bundled_source_has_every_state():
+    names = {f["properties"]["name"] for f in _source()["features"]}
+    assert len(names) == 52  # 50 states, DC and Puerto Rico
+    assert {"New York", "District of Columbia", "Puerto Rico", "Alaska", "Hawaii"} <= names
+
+
+def test_layer_keeps_every_state_and_is_much_smaller_than_the_geojson():
+    raw = states_topology.DEFAULT_SOURCE.read_bytes()
+    layer = states_topology.load_layer(str(states_topology.DEFAULT_SOURCE))
+    assert layer is not None
+
+    topology = json.loads(layer.body)
+    geometries = topology["objects"]["states"]["geometries"]
+    assert {g["properties"]["name"] for g in geometries} == {f["properties"]["name"] for f in _source()["features"]}
+    assert all(g["type"] in ("Polygon", "MultiPolygon") for g in geometries)
+
+    # What a browser downloads either way: gzip against gzip.
+    assert len(layer.gzip_body) * 4 < len(gzip.compress(raw, 9))
+    assert len(layer.body) * 4 < len(raw)
+
+
+def test_states_endpoint_serves_the_bundled_layer(client):
+    r = client.get("/api/geo/states", headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.json()["type"] == "Topology"
+
+    versioned = client.get(f"/api/geo/states/{states_topology.load_layer(states_topology.source_path()).version}")
+    assert versioned.status_code == 200
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.memory_repo import MemoryRepository
+from backend.polygons import PolygonStore
+
+SQUARE = json.dumps(
+    {"type": "Polygon", "coordinates": [[[-97.8, 30.2], [-97.6, 30.2], [-97.6, 30.4], [-97.8, 30.4], [-97.8, 30.2]]]}
+)
+
+
+@pytest.fixture
+def legacy_app(monkeypatch):
+    from backend import main
+
+    store = MemoryRepository()
+    store.update_status({"city": "Austin", "state": "TX", "quote": "On the road", "city_polygon": SQUARE})
+    monkeypatch.setattr(main, "repo", store)
+    monkeypatch.setattr(main, "polygon_store", PolygonStore(store))
+    monkeypatch.setenv("SEED_SNAPSHOT", "")
+    return main, store
+
+
+def test_legacy_status_polygon_is_moved_at_startup(legacy_app):
+    main, store = legacy_app
+    with TestClient(main.app):
+        status = store.get_status()
+    assert status["city_polygon"] is None
+    assert store.get_polygon(status["cityPolygonRef"]["id"]) is not None
+
+
+def test_get_status_does_not_write(legacy_app, monkeypatch):
+    main, store = legacy_app
+    with TestClient(main.app) as client:
+        monkeypatch.setattr(store, "update_status", lambda *_: pytest.fail("GET /api/status wrote"))
+        r = client.get("/api/status")
+    assert r.status_code == 200
+    assert r.json()["cityPolygonRef"] is not None
+
+
+@pytest.fixture
+def admin_legacy_app(legacy_app):
+    main, store = legacy_app
+    main.app.dependency_overrides[main.get_current_admin] = lambda: None
+    yield main, store
+    main.app.dependency_overrides.pop(main.get_current_admin, None)
+
+
+@pytest.mark.parametrize("raw", ["[1, 2]", "3", '"Polygon"', "not json", '{"type": "Point", "coordinates": [0, 0]}'])
+def test_invalid_polygon_is_rejected(admin_legacy_app, raw):
+    main, _ = admin_legacy_app
+    with TestClient(main.app) as client:
+        r = client.post("/api/status", json={"lat": 30.3, "lng": -97.7, "quote": "On the road", "city_polygon": raw})
+    assert r.status_code == 422
+
+
+def test_posted_polygon_is_stored_by_reference(admin_legacy_app):
+    main, store = admin_legacy_app
+    with TestClient(main.app) as client:
+        r = client.post("/api/status", json={"lat": 30.3, "lng": -97.7, "quote": "On the road", "city_polygon": SQUARE})
+    assert r.status_code == 200
+    ref = r.json()["cityPolygonRef"]
+    assert r.json()["city_polygon"] is None
+    assert store.get_polygon(ref["id"]) is not None
@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+
+def test_timeline_accepts_mixed_naive_and_aware_bounds(client):
+    r = client.get("/api/timeline", params={"from": "2026-10-18T00:00:00", "to": "2026-10-19T00:00:00Z"})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["from"] == "2026-10-18T00:00:00+00:00"
+    assert body["to"] == "2026-10-19T00:00:00+00:00"
+
+
+def test_timeline_rejects_reversed_range_across_offsets(client):
+    r = client.get("/api/timeline", params={"from": "2026-10-19T02:00:00+01:00", "to": "2026-10-19T00:00:00"})
+    assert r.status_code == 400
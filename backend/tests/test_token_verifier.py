@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import asyncio
+import datetime as dt
+import time
+from types import SimpleNamespace
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from google.auth import crypt, jwt
+
+from backend import token_verifier
+from backend.token_verifier import ISSUER_PREFIX, CertStore, InvalidTokenError, TokenVerifier
+
+PROJECT = "speed-test"
+
+
+class _Certs(CertStore):
+    """Fixed certificates; never touches the network."""
+
+    def __init__(self, certs: dict[str, str]) -> None:
+        super().__init__()
+        self._certs = certs
+        self._expires_at = float("inf")
+
+    async def run_refresher(self) -> None:
+        pass
+
+
+@pytest.fixture(scope="module")
+def signing_key():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "securetoken")])
+    now = dt.datetime.now(dt.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(1)
+        .not_valid_before(now - dt.timedelta(days=1))
+        .not_valid_after(now + dt.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    pem_key = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    return crypt.RSASigner.from_string(pem_key, "kid-1"), cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+def _token(signer, **overrides) -> str:
+    now = int(time.time())
+    claims = {
+        "iss": ISSUER_PREFIX + PROJECT,
+        "aud": PROJECT,
+        "sub": "admin-uid",
+        "iat": now,
+        "exp": now + 3600,
+        **overrides,
+    }
+    return jwt.encode(signer, claims).decode()
+
+
+def _verifier(signing_key, **kwargs) -> TokenVerifier:
+    _, cert = signing_key
+    return TokenVerifier(PROJECT, certs=_Certs({"kid-1": cert}), **kwargs)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(token_verifier, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def _counting(verifier: TokenVerifier, exp: float) -> list:
+    calls: list = []
+
+    def verify_uncached(token):
+        calls.append(token)
+        return {"uid": "admin-uid", "iat": exp - 3600, "exp": exp}
+
+    verifier._verify_uncached = verify_uncached
+    return calls
+
+
+# ------------------ Signature and claims ------------------
+
+
+def test_valid_token_returns_claims_with_uid(signing_key):
+    signer, _ = signing_key
+    claims = asyncio.run(_verifier(signing_key).verify(_token(signer)))
+
+    assert claims["uid"] == "admin-uid"
+
+
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        {"aud": "other-project"},
+        {"iss": ISSUER_PREFIX + "other-project"},
+        {"sub": ""},
+        {"exp": int(time.time()) - 3600, "iat": int(time.time()) - 7200},
+    ],
+    ids=["audience", "issuer", "subject", "expired"],
+)
+def test_bad_claims_are_rejected(signing_key, overrides):
+    signer, _ = signing_key
+
+    with pytest.raises(InvalidTokenError):
+        asyncio.run(_verifier(signing_key).verify(_token(signer, **overrides)))
+
+
+def test_token_signed_by_another_key_is_rejected(signing_key):
+    other = crypt.RSASigner.from_string(
+        rsa.generate_private_key(public_exponent=65537, key_size=2048).private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        ),
+        "kid-1",
+    )
+
+    with pytest.raises(InvalidTokenError):
+        asyncio.run(_verifier(signing_key).verify(_token(other)))
+
+
+# ------------------ Cache ------------------
+
+
+def test_repeat_token_is_served_from_cache_until_exp(signing_key, clock):
+    verifier = _verifier(signing_key)
+    calls = _counting(verifier, exp=clock[0] + 60)
+
+    async def scenario():
+        await verifier.verify("token")
+        clock[0] += 59
+        await verifier.verify("token")
+        assert len(calls) == 1
+        clock[0] += 1
+        await verifier.verify("token")
+        assert len(calls) == 2
+
+    asyncio.run(scenario())
+
+
+def test_cache_is_bounded(signing_key, clock):
+    verifier = _verifier(signing_key, max_entries=2)
+    calls = _counting(verifier, exp=clock[0] + 60)
+
+    async def scenario():
+        for token in ("a", "b", "a", "c", "a", "b"):
+            await verifier.verify(token)
+
+    asyncio.run(scenario())
+    # "b" was least recently used when "c" arrived.
+    assert calls == ["a", "b", "c", "b"]
+
+
+# ------------------ Revocation ------------------
+
+
+def test_revocation_is_rechecked_after_the_interval(signing_key, clock, monkeypatch):
+    user = SimpleNamespace(disabled=False, tokens_valid_after_timestamp=0)
+    lookups: list = []
+
+    def get_user(uid):
+        lookups.append(uid)
+        return user
+
+    monkeypatch.setattr(token_verifier.firebase_auth, "get_user", get_user)
+    verifier = _verifier(signing_key, revocation_check_sec=30)
+    calls = _counting(verifier, exp=clock[0] + 3600)
+
+    async def scenario():
+        await verifier.verify("token")
+        clock[0] += 10
+        await verifier.verify("token")
+        assert len(lookups) == 1
+
+        # Sessions revoked after the token was issued.
+        user.tokens_valid_after_timestamp = clock[0] * 1000
+        clock[0] += 30
+        with pytest.raises(InvalidTokenError):
+            await verifier.verify("token")
+        assert len(lookups) == 2
+
+        # Dropped from the cache, so the next request verifies again.
+        with pytest.raises(InvalidTokenError):
+            await verifier.verify("token")
+        assert len(calls) == 2
+
+    asyncio.run(scenario())
+
+
+def test_disabled_user_is_rejected(signing_key, clock, monkeypatch):
+    monkeypatch.setattr(
+        token_verifier.firebase_auth,
+        "get_user",
+        lambda uid: SimpleNamespace(disabled=True, tokens_valid_after_timestamp=None),
+    )
+    verifier = _verifier(signing_key, revocation_check_sec=30)
+    _counting(verifier, exp=clock[0] + 3600)
+
+    with pytest.raises(InvalidTokenError):
+        asyncio.run(verifier.verify("token"))
@@ -0,0 +1,205 @@
+"""Status/location history with downsampled replay.
+
+``update_status`` overwrites ``status/current``; this module keeps the
+history so a whole tour can be replayed on the map.
+
+* **Track** – each location change is appended to
+  ``<TIMELINE_DIR>/<YYYY-MM-DD>.track`` as packed little-endian doubles
+  ``(epoch_sec, lat, lng)``: 24 bytes per point, read back straight into an
+  ``array('d')`` without parsing.
+* **Events** – other status changes (city, quote, sleep flag) go to
+  ``<YYYY-MM-DD>.events.jsonl``; they are rare and small.
+* **Downsampling** – ``downsample`` reduces a range to at most N points with
+  Largest-Triangle-Three-Buckets over the (lng, lat) path, or by taking the
+  last point of fixed time buckets.
+
+Files live on the local disk of the process that receives status updates.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import struct
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMELINE_DIR = Path(__file__).resolve().parent / "timeline"
+POINT = struct.Struct("<ddd")
+EVENT_FIELDS = ("city", "state", "quote", "isSleep", "cityPolygonRef")
+MIN_MOVE_DEG = 1e-6
+
+Track = tuple[array, array, array]  # times, lats, lngs
+
+
+def to_utc(dt: datetime) -> datetime:
+    """Aware UTC datetime; naive values are taken to be UTC already."""
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def _days(start: datetime, end: datetime) -> list[date]:
+    day, last = start.date(), end.date()
+    out = []
+    while day <= last:
+        out.append(day)
+        day += timedelta(days=1)
+    return out
+
+
+# ------------------ Store ------------------
+
+
+class TimelineStore:
+    def __init__(self, directory: Path = DEFAULT_TIMELINE_DIR) -> None:
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+        self._last_point: Optional[tuple[float, float]] = None
+        self._last_event: dict[str, Any] = {}
+
+    def _track_path(self, day: date) -> Path:
+        return self.directory / f"{day.isoformat()}.track"
+
+    def _events_path(self, day: date) -> Path:
+        return self.directory / f"{day.isoformat()}.events.jsonl"
+
+    def record(self, status: dict[str, Any], at: Optional[datetime] = None) -> None:
+        """Append whatever changed in **status** since the previous call."""
+        at = to_utc(at or datetime.now(timezone.utc))
+        lat, lng = status.get("lat"), status.get("lng")
+        event = {k: status.get(k) for k in EVENT_FIELDS if k in status}
+
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            if isinstance(lat, (int, float)) and isinstance(lng, (int, float)) and (lat or lng):
+                last = self._last_point
+                if last is None or abs(last[0] - lat) > MIN_MOVE_DEG or abs(last[1] - lng) > MIN_MOVE_DEG:
+                    with open(self._track_path(at.date()), "ab") as fh:
+                        fh.write(POINT.pack(at.timestamp(), float(lat), float(lng)))
+                    self._last_point = (float(lat), float(lng))
+
+            changed = {k: v for k, v in event.items() if self._last_event.get(k) != v}
+            if changed:
+                self._last_event.update(changed)
+                line = json.dumps({"t": at.timestamp(), **changed}, separators=(",", ":"), default=str)
+                with open(self._events_path(at.date()), "a", encoding="utf-8") as fh:
+                    fh.write(line + "\n")
+
+    def track(self, start: datetime, end: datetime) -> Track:
+        """All points with ``start <= t <= end``, as three parallel arrays."""
+        start, end = to_utc(start), to_utc(end)
+        t0, t1 = start.timestamp(), end.timestamp()
+        times, lats, lngs = array("d"), array("d"), array("d")
+        for day in _days(start, end):
+            path = self._track_path(day)
+            if not path.exists():
+                continue
+            raw = array("d")
+            data = path.read_bytes()
+            raw.frombytes(data[: len(data) - len(data) % POINT.size])  # ignore a torn tail
+            day_t = raw[0::3]
+            lo, hi = bisect_left(day_t, t0), bisect_right(day_t, t1)
+            times.extend(day_t[lo:hi])
+            lats.extend(raw[1::3][lo:hi])
+            lngs.extend(raw[2::3][lo:hi])
+        return times, lats, lngs
+
+    def events(self, start: datetime, end: datetime) -> list[dict[str, Any]]:
+        start, end = to_utc(start), to_utc(end)
+        t0, t1 = start.timestamp(), end.timestamp()
+        out = []
+        for day in _days(start, end):
+            path = self._events_path(day)
+            if not path.exists():
+                continue
+            with open(path, encoding="utf-8") as fh:
+                for line in fh:
+                    try:
+                        ev = json.loads(line)
+                    except ValueError:
+                        continue
+                    if t0 <= ev.get("t", 0) <= t1:
+                        out.append(ev)
+        return out
+
+
+# ------------------ Downsampling ------------------
+
+
+def lttb(times: Sequence[float], lats: Sequence[float], lngs: Sequence[float], threshold: int) -> List[int]:
+    """Largest-Triangle-Three-Buckets over the (lng, lat) path; returns kept indices.
+
+    Buckets are consecutive runs of points (time order). Within each bucket
+    the point forming the largest triangle with the previously kept point
+    and the next bucket's centroid is kept, so turns and detours survive
+    while straight stretches collapse. First and last points are always kept.
+    """
+    n = len(times)
+    if threshold >= n:
+        return list(range(n))
+    if threshold < 3:
+        return [0, n - 1][:threshold]
+    kept = [0]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        nxt_start, nxt_end = end, min(int((i + 2) * every) + 1, n)
+        span = max(nxt_end - nxt_start, 1)
+        avg_x = sum(lngs[nxt_start:nxt_end]) / span if nxt_end > nxt_start else lngs[n - 1]
+        avg_y = sum(lats[nxt_start:nxt_end]) / span if nxt_end > nxt_start else lats[n - 1]
+        ax, ay = lngs[a], lats[a]
+        best, best_area = start, -1.0
+        for j in range(start, min(end, n - 1)):
+            area = abs((ax - avg_x) * (lats[j] - ay) - (ax - lngs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        kept.append(best)
+        a = best
+    kept.append(n - 1)
+    return kept
+
+
+def time_buckets(times: Sequence[float], threshold: int) -> List[int]:
+    """First point, then the last point of each of ``threshold - 1`` equal time buckets."""
+    n = len(times)
+    if threshold >= n:
+        return list(range(n))
+    buckets = max(threshold - 1, 1)
+    t0 = times[0]
+    width = (times[-1] - t0) / buckets or 1.0
+
+    kept = [0]
+    current = 0
+    for i in range(1, n):
+        b = min(int((times[i] - t0) / width), buckets - 1)
+        if b != current:
+            if kept[-1] != i - 1:
+                kept.append(i - 1)
+            current = b
+    kept.append(n - 1)
+    return kept
+
+
+def downsample(track: Track, max_points: int, method: str = "lttb") -> list[list[float]]:
+    """``[[epoch_sec, lat, lng], ...]`` with at most **max_points** points."""
+    times, lats, lngs = track
+    pick = time_buckets(times, max_points) if method == "bucket" else lttb(times, lats, lngs, max_points)
+    return [[times[i], round(lats[i], 6), round(lngs[i], 6)] for i in pick]
+
+
+def store_from_env() -> Optional[TimelineStore]:
+    if os.getenv("TIMELINE_ENABLED", "1").lower() in ("0", "false", "no"):
+        return None
+    directory = os.getenv("TIMELINE_DIR")
+    return TimelineStore(Path(directory) if directory else DEFAULT_TIMELINE_DIR)
+
+
+store = store_from_env()
@@ -0,0 +1,214 @@
+"""Cached, non-blocking verification of Firebase ID tokens.
+
+``firebase_auth.verify_id_token`` re-does an RSA signature check on every
+call and may fetch Google's signing certificates synchronously, which used to
+happen on the event loop for every admin request. This module instead:
+
+* keeps the x509 signing certificates in memory and refreshes them in a
+  background task shortly before their ``Cache-Control`` max-age runs out;
+* verifies a token once (signature, ``aud``, ``iss``, ``sub``, ``exp``) in a
+  worker thread and caches the claims under a SHA-256 of the token until its
+  ``exp`` – repeat requests are a dict lookup;
+* optionally re-checks revocation / disabled users every
+  ``FIREBASE_REVOCATION_CHECK_SEC`` seconds per token (0 disables).
+
+The claim checks mirror the Firebase Admin SDK. When the Auth emulator is in
+use (``FIREBASE_AUTH_EMULATOR_HOST``) verification is delegated to the SDK.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+import httpx
+from firebase_admin import auth as firebase_auth
+from google.auth import jwt
+
+from backend import metrics
+
+logger = logging.getLogger(__name__)
+
+CERT_URL = "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+ISSUER_PREFIX = "https://securetoken.google.com/"
+
+DEFAULT_CERT_MAX_AGE_SEC = 3600
+REFRESH_MARGIN_SEC = 300
+MIN_REFRESH_SEC = 60
+CLOCK_SKEW_SEC = 5
+
+
+class InvalidTokenError(Exception):
+    """The token failed verification (bad signature, claims, expired, revoked)."""
+
+
+def token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+# ------------------ Certificates ------------------
+
+
+class CertStore:
+    """Google's ID-token signing certificates, held in memory."""
+
+    def __init__(self, url: str = CERT_URL) -> None:
+        self.url = url
+        self._certs: dict[str, str] = {}
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def expires_at(self) -> float:
+        return self._expires_at
+
+    def get(self) -> dict[str, str]:
+        """Current certificates; fetches synchronously only if none are held yet."""
+        if not self._certs or time.time() >= self._expires_at:
+            with self._lock:
+                if not self._certs or time.time() >= self._expires_at:
+                    self.refresh()
+        return self._certs
+
+    def refresh(self) -> None:
+        resp = httpx.get(self.url, timeout=10)
+        outcome = "ok" if resp.status_code < 400 else str(resp.status_code)
+        metrics.outbound_requests.inc(service="google", endpoint="firebase-certs", outcome=outcome)
+        resp.raise_for_status()
+        certs = resp.json()
+        match = re.search(r"max-age=(\d+)", resp.headers.get("cache-control", ""))
+        max_age = int(match.group(1)) if match else DEFAULT_CERT_MAX_AGE_SEC
+        # Swap in one assignment so readers never see a partial dict.
+        self._certs = certs
+        self._expires_at = time.time() + max_age
+        logger.debug("Refreshed %d Firebase signing certs (max-age %ds)", len(certs), max_age)
+
+    async def run_refresher(self) -> None:
+        """Background loop keeping the certificates fresh ahead of expiry."""
+        while True:
+            delay = max(self._expires_at - time.time() - REFRESH_MARGIN_SEC, MIN_REFRESH_SEC)
+            await asyncio.sleep(delay)
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception:
+                logger.exception("Failed to refresh Firebase signing certs; retrying")
+
+
+# ------------------ Verifier ------------------
+
+
+class TokenVerifier:
+    """Verify Firebase ID tokens, caching results until each token expires."""
+
+    def __init__(
+        self,
+        project_id: Optional[str],
+        certs: Optional[CertStore] = None,
+        max_entries: int = 1024,
+        revocation_check_sec: float = 0,
+    ) -> None:
+        self.project_id = project_id
+        self.certs = certs or CertStore()
+        self.max_entries = max_entries
+        self.revocation_check_sec = revocation_check_sec
+        # token hash -> [claims, exp, last revocation check]
+        self._cache: "OrderedDict[str, list[Any]]" = OrderedDict()
+        self._refresher: Optional[asyncio.Task] = None
+
+    async def verify(self, token: str) -> dict[str, Any]:
+        """Return the token's claims or raise ``InvalidTokenError``.
+
+        Cache hits are served without leaving the event loop; misses and due
+        revocation checks run in a worker thread.
+        """
+        self._ensure_refresher()
+        key = token_hash(token)
+        now = time.time()
+        entry = self._cache.get(key)
+        if entry is not None and now < entry[1]:
+            self._cache.move_to_end(key)
+            if self.revocation_check_sec and now - entry[2] >= self.revocation_check_sec:
+                try:
+                    await asyncio.to_thread(self._check_revoked, entry[0])
+                except InvalidTokenError:
+                    self._cache.pop(key, None)
+                    raise
+                entry[2] = now
+            return entry[0]
+        if entry is not None:
+            self._cache.pop(key, None)
+
+        claims = await asyncio.to_thread(self._verify_uncached, token)
+        if self.revocation_check_sec:
+            await asyncio.to_thread(self._check_revoked, claims)
+        self._cache[key] = [claims, float(claims["exp"]), now]
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return claims
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def _ensure_refresher(self) -> None:
+        if self._refresher is None or self._refresher.done():
+            self._refresher = asyncio.get_running_loop().create_task(self.certs.run_refresher())
+
+    def _verify_uncached(self, token: str) -> dict[str, Any]:
+        if os.getenv("FIREBASE_AUTH_EMULATOR_HOST"):
+            try:
+                return firebase_auth.verify_id_token(token)
+            except Exception as exc:
+                raise InvalidTokenError(str(exc)) from exc
+
+        if not self.project_id:
+            raise InvalidTokenError("Firebase project id unknown; cannot verify ID tokens")
+        try:
+            header = jwt.decode_header(token)
+        except ValueError as exc:
+            raise InvalidTokenError(str(exc)) from exc
+        if header.get("alg") != "RS256" or not header.get("kid"):
+            raise InvalidTokenError("ID token must be RS256 with a kid")
+
+        try:
+            claims = dict(
+                jwt.decode(
+                    token,
+                    certs=self.certs.get(),
+                    audience=self.project_id,
+                    clock_skew_in_seconds=CLOCK_SKEW_SEC,
+                )
+            )
+        except ValueError as exc:  # google.auth errors subclass ValueError
+            raise InvalidTokenError(str(exc)) from exc
+
+        if claims.get("iss") != ISSUER_PREFIX + self.project_id:
+            raise InvalidTokenError("ID token has an unexpected issuer")
+        sub = claims.get("sub")
+        if not isinstance(sub, str) or not sub or len(sub) > 128:
+            raise InvalidTokenError("ID token has an invalid subject")
+        claims["uid"] = sub
+        return claims
+
+    def _check_revoked(self, claims: dict[str, Any]) -> None:
+        try:
+            user = firebase_auth.get_user(claims["uid"])
+        except Exception as exc:
+            raise InvalidTokenError(f"Could not check revocation: {exc}") from exc
+        valid_after_ms = user.tokens_valid_after_timestamp or 0
+        if user.disabled or claims.get("iat", 0) * 1000 < valid_after_ms:
+            raise InvalidTokenError("ID token has been revoked or the user is disabled")
+
+
+def verifier_from_env(project_id: Optional[str]) -> TokenVerifier:
+    return TokenVerifier(
+        project_id=project_id or os.getenv("GOOGLE_CLOUD_PROJECT"),
+        max_entries=int(os.getenv("FIREBASE_TOKEN_CACHE_SIZE", 1024)),
+        revocation_check_sec=float(os.getenv("FIREBASE_REVOCATION_CHECK_SEC", 0)),
+    )
@@ -0,0 +1,358 @@
+"""Lightweight request tracing.
+
+``span(name, **attributes)`` opens a child of the current span (held in a
+``ContextVar``, so it follows ``await`` and ``asyncio.to_thread``);
+``traced(name)`` does the same for a whole function. ``TracingMiddleware``
+opens the root span per HTTP request, honouring an incoming W3C
+``traceparent`` and returning ``X-Trace-Id``.
+
+Instrumented: routes (middleware), every repository call (via
+``backend.metrics.InstrumentedRepository``), ``auth.verify_token``,
+``geocode_city``/``search_places`` and ``social_scraper._run_actor``.
+
+Configuration:
+
+* ``TRACING_ENABLED`` – off by default. When off, ``traced`` returns the
+  function unchanged and ``span`` returns a shared no-op, so the cost is
+  one flag check.
+* ``TRACE_SAMPLE_RATE`` – fraction of root spans recorded (default 1.0);
+  children follow their root's decision.
+* ``TRACE_EXPORTER`` – ``file`` (JSON lines at ``TRACE_FILE``, default
+  ``backend/.cache/traces.jsonl``) or ``otlp`` (OTLP/HTTP JSON posted to
+  ``OTLP_ENDPOINT``, default ``http://localhost:4318/v1/traces``).
+
+Finished spans go through a bounded queue to one background exporter
+thread; when the queue is full spans are dropped rather than slowing
+requests.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRACE_FILE = Path(__file__).resolve().parent / ".cache" / "traces.jsonl"
+QUEUE_SIZE = 10_000
+EXPORT_BATCH = 256
+EXPORT_INTERVAL_SEC = 2.0
+
+KIND_INTERNAL, KIND_SERVER, KIND_CLIENT = 1, 2, 3
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+def _env_flag(name: str, default: str = "0") -> bool:
+    return os.getenv(name, default).lower() not in ("0", "false", "no", "")
+
+
+enabled = _env_flag("TRACING_ENABLED")
+sample_rate = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+
+
+# ------------------ Spans ------------------
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], kind: int, attributes: dict[str, Any]) -> None:
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.error: Optional[str] = None
+
+    def set(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": self.start_ns / 1e9,
+            "durationMs": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NotSampled:
+    """Marker for a trace whose root lost the sampling draw."""
+
+    def set(self, key: str, value: Any) -> None:
+        pass
+
+
+NOT_SAMPLED = _NotSampled()
+_current: ContextVar[Any] = ContextVar("current_span", default=None)
+
+
+class _NoopSpan:
+    def __enter__(self) -> _NotSampled:
+        return NOT_SAMPLED
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+_NOOP = _NoopSpan()
+
+
+class _SpanContext:
+    __slots__ = ("name", "kind", "attributes", "root", "span", "token")
+
+    def __init__(self, name: str, kind: int, attributes: dict[str, Any], root: Optional[tuple] = None) -> None:
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.root = root  # (trace_id, parent_id, sampled) for a root span
+
+    def __enter__(self) -> Any:
+        parent = _current.get()
+        if self.root is not None:
+            trace_id, parent_id, sampled = self.root
+            if not sampled:
+                self.span, self.token = None, _current.set(NOT_SAMPLED)
+                return NOT_SAMPLED
+        elif parent is None or parent is NOT_SAMPLED:
+            # Outside a request (scheduler, scripts) spans start their own trace.
+            if parent is NOT_SAMPLED or random.random() >= sample_rate:
+                self.span, self.token = None, None
+                return NOT_SAMPLED
+            trace_id, parent_id = f"{random.getrandbits(128):032x}", None
+        else:
+            trace_id, parent_id = parent.trace_id, parent.span_id
+        self.span = Span(self.name, trace_id, parent_id, self.kind, self.attributes)
+        self.token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type: Any, exc: Any, _tb: Any) -> None:
+        if self.token is not None:
+            _current.reset(self.token)
+        if self.span is not None:
+            self.span.end_ns = time.time_ns()
+            if exc is not None:
+                self.span.error = f"{exc_type.__name__}: {exc}"
+            _exporter().submit(self.span)
+
+
+def span(name: str, kind: int = KIND_INTERNAL, **attributes: Any):
+    """Context manager for a child span of the current one (no-op when disabled)."""
+    if not enabled:
+        return _NOOP
+    return _SpanContext(name, kind, attributes)
+
+
+def root_span(name: str, traceparent: Optional[str] = None, **attributes: Any):
+    """Start a trace, continuing **traceparent** when one is given."""
+    if not enabled:
+        return _NOOP
+    match = _TRACEPARENT.match(traceparent or "")
+    if match:
+        root = (match.group(1), match.group(2), bool(int(match.group(3), 16) & 1))
+    else:
+        root = (f"{random.getrandbits(128):032x}", None, random.random() < sample_rate)
+    return _SpanContext(name, KIND_SERVER, attributes, root=root)
+
+
+def traced(name: Optional[str] = None, kind: int = KIND_INTERNAL) -> Callable[[Callable], Callable]:
+    """Decorator wrapping sync or async functions in a span; identity when disabled."""
+
+    def decorate(fn: Callable) -> Callable:
+        if not enabled:
+            return fn
+        span_name = name or f"{fn.__module__}.{fn.__qualname__}"
+        if asyncio.iscoroutinefunction(fn):
+
+            @wraps(fn)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with _SpanContext(span_name, kind, {}):
+                    return await fn(*args, **kwargs)
+
+            return async_wrapper
+
+        @wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with _SpanContext(span_name, kind, {}):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def current_trace_id() -> Optional[str]:
+    current = _current.get()
+    return current.trace_id if isinstance(current, Span) else None
+
+
+# ------------------ Export ------------------
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_span(s: Span) -> dict[str, Any]:
+    out = {
+        "traceId": s.trace_id,
+        "spanId": s.span_id,
+        "name": s.name,
+        "kind": s.kind,
+        "startTimeUnixNano": str(s.start_ns),
+        "endTimeUnixNano": str(s.end_ns),
+        "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+        "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+    }
+    if s.parent_id:
+        out["parentSpanId"] = s.parent_id
+    return out
+
+
+class Exporter:
+    """Bounded queue drained by one background thread in batches."""
+
+    def __init__(self, kind: str, path: Path, endpoint: str, service: str) -> None:
+        self.kind = kind
+        self.path = path
+        self.endpoint = endpoint
+        self.service = service
+        self.dropped = 0
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue(maxsize=QUEUE_SIZE)
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def submit(self, s: Span) -> None:
+        try:
+            self._queue.put_nowait(s)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout: float = 5.0) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            batch: list[Span] = []
+            stop = False
+            try:
+                item = self._queue.get(timeout=EXPORT_INTERVAL_SEC)
+                while True:
+                    if item is None:
+                        stop = True
+                        break
+                    batch.append(item)
+                    if len(batch) >= EXPORT_BATCH:
+                        break
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            if batch:
+                try:
+                    self._export(batch)
+                except Exception:
+                    logger.exception("Failed to export %d spans", len(batch))
+            if stop:
+                return
+
+    def _export(self, batch: list[Span]) -> None:
+        if self.kind == "otlp":
+            import httpx
+
+            body = {
+                "resourceSpans": [{
+                    "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service}}]},
+                    "scopeSpans": [{"scope": {"name": __name__}, "spans": [_otlp_span(s) for s in batch]}],
+                }]
+            }
+            httpx.post(self.endpoint, json=body, timeout=10).raise_for_status()
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as fh:
+                for s in batch:
+                    fh.write(json.dumps(s.to_dict(), default=str) + "\n")
+
+
+_exporter_instance: Optional[Exporter] = None
+_exporter_lock = threading.Lock()
+
+
+def _exporter() -> Exporter:
+    """Started on the first finished span, so disabled tracing never starts a thread."""
+    global _exporter_instance
+    if _exporter_instance is None:
+        with _exporter_lock:
+            if _exporter_instance is None:
+                trace_file = os.getenv("TRACE_FILE")
+                _exporter_instance = Exporter(
+                    kind=os.getenv("TRACE_EXPORTER", "file").lower(),
+                    path=Path(trace_file) if trace_file else DEFAULT_TRACE_FILE,
+                    endpoint=os.getenv("OTLP_ENDPOINT", "http://localhost:4318/v1/traces"),
+                    service=os.getenv("TRACE_SERVICE_NAME", "speed-backend"),
+                )
+    return _exporter_instance
+
+
+def shutdown() -> None:
+    """Flush queued spans (app shutdown)."""
+    if _exporter_instance is not None:
+        _exporter_instance.close()
+
+
+# ------------------ HTTP ------------------
+
+
+class TracingMiddleware:
+    """ASGI middleware opening the root span of each HTTP request."""
+
+    def __init__(self, app: Any, router_app: Any = None) -> None:
+        self.app = app
+        self.router_app = router_app
+
+    async def __call__(self, scope: dict[str, Any], receive: Callable, send: Callable) -> None:
+        if not enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        from backend.metrics import route_template
+
+        route = route_template(self.router_app, scope) if self.router_app is not None else scope["path"]
+        headers = dict(scope.get("headers") or [])
+        traceparent = headers.get(b"traceparent", b"").decode("latin-1") or None
+        method = scope["method"]
+
+        with root_span(f"{method} {route}", traceparent, **{"http.method": method, "http.route": route}) as root:
+
+            async def send_wrapper(message: dict[str, Any]) -> None:
+                if message["type"] == "http.response.start":
+                    root.set("http.status_code", message["status"])
+                    if isinstance(root, Span):
+                        message = {**message, "headers": [*message.get("headers", []), (b"x-trace-id", root.trace_id.encode())]}
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
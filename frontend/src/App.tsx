@@ -4,7 +4,12 @@ import { Header } from "./components/Header";
 import { Footer } from "./components/Footer";
 import { Quote } from "./components/Quote";
 import type { Status, JourneyResponse } from "./types";
-import { fetchStatus, fetchJourney, fetchSleep } from "./services/api";
+import {
+  fetchStatus,
+  fetchJourney,
+  fetchSleep,
+  readInitialState,
+} from "./services/api";
 import type { SleepResponse } from "./types";
 import "./App.css";
 import { Drawer } from "./components/primitives/Drawer";
@@ -20,10 +25,18 @@ const SHOW_ADMIN_BTN = false;
 
 function App() {
   const tips = useTips();
-  const [status, setStatus] = useState<Status | null>(null);
-  const [journey, setJourney] = useState<JourneyResponse | null>(null);
-  const [sleep, setSleep] = useState<SleepResponse | null>(null);
-  const [loading, setLoading] = useState(true);
+  // Inlined by the backend into index.html: first frame without API calls
+  const [initialState] = useState(readInitialState);
+  const [status, setStatus] = useState<Status | null>(
+    initialState?.status ?? null
+  );
+  const [journey, setJourney] = useState<JourneyResponse | null>(
+    initialState?.journey ?? null
+  );
+  const [sleep, setSleep] = useState<SleepResponse | null>(
+    initialState?.sleep ?? null
+  );
+  const [loading, setLoading] = useState(initialState === null);
   const [shopOpen, setShopOpen] = useState(false);
   const [shopSlidePx, setShopSlidePx] = useState<number | null>(null);
   const [shopDragging, setShopDragging] = useState(false);
@@ -42,6 +55,7 @@ function App() {
   }, [journey?.path, journey?.currentCity]);
 
   useEffect(() => {
+    if (initialState) return;
     const loadData = async () => {
       try {
         const [statusRes, journeyRes, sleepRes] = await Promise.all([
@@ -60,7 +74,7 @@ function App() {
     };
 
     loadData();
-  }, []);
+  }, [initialState]);
 
   if (loading) {
     return <div className="app loading">Loading...</div>;
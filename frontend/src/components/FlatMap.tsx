@@ -10,6 +10,7 @@ import type { JourneyCity } from "../types";
 import { CityPopup } from "./CityPopup";
 import { Drawer } from "./primitives/Drawer";
 import { useMediaQuery } from "../hooks/useMediaQuery";
+import { loadStatesGeo } from "../services/statesGeo";
 
 interface FlatMapProps {
   lat: number;
@@ -36,17 +37,6 @@ const getCSSVariable = (name: string) =>
 
 // getRandomIcon no longer needed (legacy)
 
-// Free US states geojson (same as 3D version)
-const STATES_URL =
-  "https://raw.githubusercontent.com/PublicaMundi/MappingAPI/master/data/geojson/us-states.json";
-let statesGeo: any | null = null;
-const ensureStates = async () => {
-  if (statesGeo) return statesGeo;
-  const res = await fetch(STATES_URL);
-  statesGeo = await res.json();
-  return statesGeo;
-};
-
 import React from "react";
 
 function FlatMapInner({
@@ -97,7 +87,7 @@ function FlatMapInner({
     const borderId = "state-border";
     const highlightId = "state-highlight";
 
-    const geojson = await ensureStates();
+    const geojson = await loadStatesGeo();
     // add all states source once
     if (!mapRef.current.getSource(sourceId)) {
       mapRef.current.addSource(sourceId, {
@@ -10,6 +10,7 @@ import { Text } from "./primitives";
 // Path to GLB model (copied via Vite asset pipeline)
 // @ts-ignore – vite url loader
 import pinModelUrl from "../assets/3D/SpeedPin.glb?url";
+import { loadStatesGeo } from "../services/statesGeo";
 
 interface MapProps {
   lat: number;
@@ -39,19 +40,6 @@ const getCSSVariable = (varName: string): string => {
 
 // Radius + random offset removed – we’ll center directly on provided coords
 
-// URL to free US states GeoJSON (public domain)
-const STATES_GEOJSON_URL =
-  "https://raw.githubusercontent.com/PublicaMundi/MappingAPI/master/data/geojson/us-states.json";
-
-let statesGeo: any | null = null; // cached geojson
-
-async function ensureStatesGeo(): Promise<any> {
-  if (statesGeo) return statesGeo;
-  const res = await fetch(STATES_GEOJSON_URL);
-  statesGeo = await res.json();
-  return statesGeo;
-}
-
 export function Map({ lat, lng, state }: MapProps) {
   const mapContainer = useRef<HTMLDivElement>(null);
   const map = useRef<mapboxgl.Map | null>(null);
@@ -224,7 +212,7 @@ export function Map({ lat, lng, state }: MapProps) {
     const layerId = "state-geo-outline";
     const fillId = "state-geo-fill";
 
-    ensureStatesGeo().then((geojson) => {
+    loadStatesGeo().then((geojson) => {
       // find feature for stateName
       const feature = geojson.features.find(
         (f: any) => f.properties && f.properties.name === stateName
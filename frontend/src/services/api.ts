@@ -18,15 +18,7 @@ export class ApiError extends Error {
   }
 }
 
-export async function fetchStatus(): Promise<Status> {
-  const response = await fetch(`${API_BASE_URL}/api/status`);
-
-  if (!response.ok) {
-    throw new ApiError(response.status, "Failed to fetch status");
-  }
-
-  const data = await response.json();
-
+function normalizeStatus(data: any): Status {
   const res: Status = {
     ...data,
     cityPolygon: data.cityPolygon ?? data.city_polygon ?? null,
@@ -40,6 +32,43 @@ export async function fetchStatus(): Promise<Status> {
   return res;
 }
 
+export async function fetchStatus(): Promise<Status> {
+  const response = await fetch(`${API_BASE_URL}/api/status`);
+
+  if (!response.ok) {
+    throw new ApiError(response.status, "Failed to fetch status");
+  }
+
+  return normalizeStatus(await response.json());
+}
+
+export interface InitialState {
+  status: Status;
+  journey: JourneyResponse;
+  sleep: SleepResponse;
+  // Versioned URL of the states boundary layer (see services/statesGeo.ts)
+  statesUrl?: string;
+}
+
+// State the backend inlined into index.html (see backend/initial_state.py),
+// or null when the page was served without it (e.g. the Vite dev server).
+export function readInitialState(): InitialState | null {
+  const el = document.getElementById("initial-state");
+  if (!el?.textContent) return null;
+  try {
+    const data = JSON.parse(el.textContent);
+    if (!data.status || !data.journey || !data.sleep) return null;
+    return {
+      status: normalizeStatus(data.status),
+      journey: data.journey,
+      sleep: data.sleep,
+      statesUrl: data.statesUrl,
+    };
+  } catch {
+    return null;
+  }
+}
+
 export async function updateStatus(
   data: StatusUpdate,
   token: string
@@ -242,9 +271,47 @@ export async function fetchCityPosts(cityId: number): Promise<SocialPost[]> {
   return data;
 }
 
+export interface ScrapeJob {
+  id: string;
+  city_id: number;
+  city: string;
+  source: "manual" | "scheduler";
+  status: "queued" | "running" | "succeeded" | "failed";
+  updated_at: string; // heartbeat from the worker running the job
+  progress: Record<string, { status: string; items: number }>;
+  saved: number | null;
+  new: number | null;
+  error: string | null;
+}
+
+export async function fetchScrapeJob(
+  jobId: string,
+  token: string
+): Promise<ScrapeJob> {
+  const res = await fetch(`${API_BASE_URL}/api/scrape-jobs/${jobId}`, {
+    headers: {
+      Authorization: `Bearer ${token}`,
+    },
+  });
+  if (!res.ok) {
+    const err = await res.json();
+    throw new ApiError(res.status, err.detail || "Failed to fetch scrape job");
+  }
+  return res.json();
+}
+
+// Matches the backend's SCRAPE_JOB_STALE_SEC default: a live job's worker
+// heartbeats it well within this window.
+const SCRAPE_JOB_STALE_MS = 10 * 60 * 1000;
+const SCRAPE_MAX_WAIT_MS = 30 * 60 * 1000;
+
+// Submits a scrape job (or attaches to the city's running one) and polls it
+// until it finishes; resolves with the number of posts saved. Gives up with
+// an ApiError once the job stops heartbeating or runs past the maximum wait.
 export async function runScrape(
   cityId: number,
-  token: string
+  token: string,
+  onProgress?: (job: ScrapeJob) => void
 ): Promise<number> {
   const res = await fetch(`${API_BASE_URL}/api/cities/${cityId}/scrape`, {
     method: "POST",
@@ -256,8 +323,32 @@ export async function runScrape(
     const err = await res.json();
     throw new ApiError(res.status, err.detail || "Failed to run scrape");
   }
-  const data = await res.json();
-  return data.saved as number;
+  const { jobId } = await res.json();
+  const startedAt = Date.now();
+  // Heartbeats are compared by when they changed on this clock, not by
+  // their server timestamps, so clock skew does not matter.
+  let heartbeat: string | null = null;
+  let heartbeatSeenAt = startedAt;
+  for (;;) {
+    await new Promise((resolve) => setTimeout(resolve, 2000));
+    const job = await fetchScrapeJob(jobId, token);
+    onProgress?.(job);
+    if (job.status === "succeeded") return job.saved ?? 0;
+    if (job.status === "failed") {
+      throw new ApiError(500, job.error || "Scrape failed");
+    }
+    const now = Date.now();
+    if (job.updated_at !== heartbeat) {
+      heartbeat = job.updated_at;
+      heartbeatSeenAt = now;
+    }
+    if (now - heartbeatSeenAt > SCRAPE_JOB_STALE_MS) {
+      throw new ApiError(504, "Scrape job stopped responding");
+    }
+    if (now - startedAt > SCRAPE_MAX_WAIT_MS) {
+      throw new ApiError(504, "Scrape is taking too long");
+    }
+  }
 }
 
 // ---------------- Settings ----------------
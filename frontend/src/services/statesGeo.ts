@@ -0,0 +1,97 @@
+import { readInitialState } from "./api";
+
+// US states boundaries, served by the backend as simplified, quantized
+// TopoJSON (see backend/states_topology.py) and decoded here to the
+// GeoJSON FeatureCollection both maps use (features matched by
+// properties.name).
+const STATES_TOPOLOGY_PATH = "/api/geo/states";
+// Used only when the backend has no states layer (e.g. no bundled source).
+const FALLBACK_GEOJSON_URL =
+  "https://raw.githubusercontent.com/PublicaMundi/MappingAPI/master/data/geojson/us-states.json";
+
+const API_BASE_URL =
+  (import.meta.env.VITE_API_BASE_URL as string | undefined) ||
+  window.location.origin;
+
+interface Topology {
+  transform: { scale: [number, number]; translate: [number, number] };
+  arcs: [number, number][][];
+  objects: Record<string, { geometries: any[] }>;
+}
+
+function decodeArcs(topo: Topology): number[][][] {
+  const [sx, sy] = topo.transform.scale;
+  const [tx, ty] = topo.transform.translate;
+  return topo.arcs.map((arc) => {
+    let x = 0;
+    let y = 0;
+    return arc.map(([dx, dy]) => {
+      x += dx;
+      y += dy;
+      return [x * sx + tx, y * sy + ty];
+    });
+  });
+}
+
+function ring(arcs: number[][][], refs: number[]): number[][] {
+  const points: number[][] = [];
+  for (const ref of refs) {
+    const arc = ref < 0 ? arcs[~ref].slice().reverse() : arcs[ref];
+    // Consecutive arcs share their junction point.
+    points.push(...(points.length ? arc.slice(1) : arc));
+  }
+  return points;
+}
+
+export function topologyToGeoJSON(topo: Topology, name = "states"): any {
+  const arcs = decodeArcs(topo);
+  const features = topo.objects[name].geometries.map((g) => {
+    let geometry: any = null;
+    if (g.type === "Polygon") {
+      geometry = {
+        type: "Polygon",
+        coordinates: g.arcs.map((r: number[]) => ring(arcs, r)),
+      };
+    } else if (g.type === "MultiPolygon") {
+      geometry = {
+        type: "MultiPolygon",
+        coordinates: g.arcs.map((p: number[][]) =>
+          p.map((r) => ring(arcs, r))
+        ),
+      };
+    }
+    return {
+      type: "Feature",
+      ...(g.id !== undefined ? { id: g.id } : {}),
+      properties: g.properties ?? {},
+      geometry,
+    };
+  });
+  return { type: "FeatureCollection", features };
+}
+
+let statesGeo: Promise<any> | null = null;
+
+async function fetchStatesGeo(): Promise<any> {
+  // The inlined versioned URL is cached immutably by the browser.
+  const path = readInitialState()?.statesUrl ?? STATES_TOPOLOGY_PATH;
+  try {
+    const res = await fetch(`${API_BASE_URL}${path}`);
+    if (res.ok) return topologyToGeoJSON(await res.json());
+  } catch (error) {
+    console.error("Failed to load states topology:", error);
+  }
+  const res = await fetch(FALLBACK_GEOJSON_URL);
+  return await res.json();
+}
+
+// Shared by both maps; fetched once per page load.
+export function loadStatesGeo(): Promise<any> {
+  if (!statesGeo) {
+    statesGeo = fetchStatesGeo().catch((error) => {
+      statesGeo = null;
+      throw error;
+    });
+  }
+  return statesGeo;
+}
@@ -1,10 +1,19 @@
+// Pointer to a stored city polygon; levels are served by
+// GET /api/polygons/{id}/{level}.
+export interface PolygonRef {
+  id: string;
+  levels: string[]; // zoom levels ("4", "8", "12") and "full"
+  bbox: [number, number, number, number];
+}
+
 export interface Status {
   lat: number;
   lng: number;
   state?: string | null;
   quote: string;
   city?: string | null;
-  cityPolygon?: string | null; // GeoJSON string
+  cityPolygon?: string | null; // GeoJSON string (legacy; now cityPolygonRef)
+  cityPolygonRef?: PolygonRef | null;
   lastUpdated: string;
 }
 